@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# benchmarks/load_test.py
+#
+# HTTP load test of server.py's /api/generate.
+#
+#   python benchmarks/load_test.py [--concurrency 1,4,16] [--duration S] [--warmup S]
+#                                  [--mix ELEMENT[:WEIGHT],...] [--questions N|MIN-MAX]
+#                                  [--seeded-ratio R] [--users N]
+#                                  [--url URL [--pid PID]] [--output FILE] [--compare FILE]
+#
+# Starts server.py under uvicorn in a subprocess on a free local port (or
+# drives an already running server given by --url), then for each concurrency
+# level runs that many clients, each sending its next request as soon as the
+# previous one is answered, for --warmup + --duration seconds. Reported per
+# level, over the --duration window only:
+#   - requests/sec
+#   - p50/p95/p99 latency of successful (2xx) responses
+#   - error rate, by status (429/503 are the executor's queue rejections)
+#   - server CPU (percent of one core) and RSS, summed over the server
+#     process and its children (process-mode workers), read from /proc
+# The client runs on the same machine, so it competes with the server for CPU.
+#
+# Requests pick an element from --mix by weight. --seeded-ratio sends that
+# share of requests with one of a few fixed seeds (these hit the response
+# cache); --users spreads requests over that many user_ids (seen-question
+# histories). --compare prints the change against an earlier report.
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "Copper.txt:2,Gold.txt,Cacbon.txt,Clo.txt,Argon.txt"
+DEFAULT_CONCURRENCY = "1,4,16"
+SEED_POOL = 16
+STARTUP_TIMEOUT = 60.0
+REQUEST_TIMEOUT = 60.0
+SAMPLE_INTERVAL = 0.25
+
+# "Copper.txt:2,Gold.txt" -> [("Copper.txt", 2.0), ("Gold.txt", 1.0)]
+def parse_mix(text):
+    mix = []
+    for item in text.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name:
+            mix.append((name, float(weight) if weight else 1.0))
+    if not mix:
+        raise ValueError("--mix lists no element files")
+    return mix
+
+# "5" -> (5, 5), "3-10" -> (3, 10)
+def parse_questions(text):
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# server.py under uvicorn in a subprocess, from start() until stop()
+class ServerProcess:
+    def __init__(self, port):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT_DIR
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server.py exited during startup (status {self.process.returncode})")
+            try:
+                status, _ = http_get(self.url, "/health")
+                if status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"server.py did not answer /health within {STARTUP_TIMEOUT:.0f}s")
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+def http_get(url, path):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+# CPU time and RSS of a process and its descendants, from /proc (Linux only)
+"""
+A background thread samples every SAMPLE_INTERVAL seconds. cpu_ticks() gives
+{pid: utime + stime} so a window's CPU is the difference of two calls; CPU of
+children that exit within a window is not counted.
+"""
+class ProcessSampler:
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks_per_second = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.rss_samples = []  # (monotonic time, total RSS bytes, process count)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+
+    @staticmethod
+    def available():
+        return os.path.isdir("/proc/self") and hasattr(os, "sysconf")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            pids = self._process_tree()
+            rss = sum(self._read_rss(pid) for pid in pids)
+            self.rss_samples.append((time.monotonic(), rss, len(pids)))
+            self._stop.wait(SAMPLE_INTERVAL)
+
+    def cpu_ticks(self):
+        ticks = {}
+        for pid in self._process_tree():
+            stat = self._read_stat(pid)
+            if stat is not None:
+                ticks[pid] = int(stat[11]) + int(stat[12])
+        return ticks
+
+    # Server stats between two cpu_ticks() snapshots taken at start and end
+    def window(self, start_ticks, end_ticks, start, end):
+        cpu_seconds = sum(ticks - start_ticks.get(pid, 0) for pid, ticks in end_ticks.items()) / self.ticks_per_second
+        samples = [(rss, count) for at, rss, count in self.rss_samples if start <= at <= end]
+        if not samples:
+            return {'cpu_percent': round(cpu_seconds / (end - start) * 100, 1)}
+        rss_values = [rss for rss, _ in samples]
+        return {
+            'cpu_percent': round(cpu_seconds / (end - start) * 100, 1),
+            'rss_mb_mean': round(statistics.fmean(rss_values) / 2 ** 20, 1),
+            'rss_mb_peak': round(max(rss_values) / 2 ** 20, 1),
+            'processes': max(count for _, count in samples)
+        }
+
+    def _process_tree(self):
+        children = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                stat = self._read_stat(int(name))
+                if stat is not None:
+                    children.setdefault(int(stat[1]), []).append(int(name))
+        tree = []
+        pending = [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(children.get(pid, ()))
+        return tree
+
+    # Fields of /proc/<pid>/stat after the command name (state, ppid, ...), or None
+    @staticmethod
+    def _read_stat(pid):
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return data[data.rindex(")") + 2:].split()
+
+    def _read_rss(self, pid):
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                return int(f.read().split()[1]) * self.page_size
+        except (OSError, IndexError, ValueError):
+            return 0
+
+# One client: sends requests back to back until stop_at, recording those started after measure_from
+def run_client(url, make_request, stop_at, measure_from, results):
+    parts = urlsplit(url)
+    conn = None
+    while time.monotonic() < stop_at:
+        if conn is None:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=REQUEST_TIMEOUT)
+        body = json.dumps(make_request(), ensure_ascii=False).encode("utf-8")
+        start = time.monotonic()
+        try:
+            conn.request("POST", "/api/generate", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            status = type(e).__name__
+            conn.close()
+            conn = None
+        if start >= measure_from:
+            results.append((time.monotonic() - start, status))
+    if conn is not None:
+        conn.close()
+
+def make_request_factory(mix, questions, seeded_ratio, users, rng):
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def make_request():
+        request = {
+            "element_file": rng.choices(names, weights)[0],
+            "number_of_questions": rng.randint(*questions)
+        }
+        if rng.random() < seeded_ratio:
+            request["seed"] = rng.randrange(SEED_POOL)
+        if users:
+            request["user_id"] = f"load-user-{rng.randrange(users)}"
+        return request
+
+    return make_request
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Nearest rank
+    position = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return round(sorted_values[position], 2)
+
+def summarize_step(concurrency, results, duration):
+    latencies = sorted(latency * 1000 for latency, status in results if isinstance(status, int) and status < 300)
+    errors = {}
+    for _, status in results:
+        if not (isinstance(status, int) and status < 300):
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    error_count = sum(errors.values())
+    return {
+        'concurrency': concurrency,
+        'requests': len(results),
+        'rps': round(len(results) / duration, 2),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 2) if latencies else None,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': round(latencies[-1], 2) if latencies else None
+        },
+        'errors': {
+            'count': error_count,
+            'rate': round(error_count / len(results), 4) if results else 0.0,
+            'by_status': errors
+        }
+    }
+
+# One concurrency level: warm-up, then the measured window
+def run_step(url, concurrency, args, mix, questions, sampler, seed):
+    results = []
+    start = time.monotonic()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+    threads = []
+    for i in range(concurrency):
+        make_request = make_request_factory(mix, questions, args.seeded_ratio, args.users,
+                                            random.Random(seed * 1000 + i))
+        thread = threading.Thread(target=run_client, args=(url, make_request, stop_at, measure_from, results),
+                                  daemon=True)
+        threads.append(thread)
+        thread.start()
+
+    time.sleep(max(0.0, measure_from - time.monotonic()))
+    start_ticks = sampler.cpu_ticks() if sampler else None
+    window_start = time.monotonic()
+    time.sleep(max(0.0, stop_at - time.monotonic()))
+    end_ticks = sampler.cpu_ticks() if sampler else None
+    window_end = time.monotonic()
+    for thread in threads:
+        thread.join()
+
+    step = summarize_step(concurrency, results, args.duration)
+    step['server'] = sampler.window(start_ticks, end_ticks, window_start, window_end) if sampler else None
+    return step
+
+def run(args):
+    mix = parse_mix(args.mix)
+    questions = parse_questions(args.questions)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    server = None
+    url = args.url
+    pid = args.pid
+    if url is None:
+        server = ServerProcess(args.port or free_port()).start()
+        url = server.url
+        pid = server.process.pid
+
+    sampler = None
+    if pid is not None and ProcessSampler.available():
+        sampler = ProcessSampler(pid).start()
+
+    try:
+        _, health = http_get(url, "/health")
+        steps = []
+        for index, concurrency in enumerate(levels):
+            step = run_step(url, concurrency, args, mix, questions, sampler, args.seed + index)
+            steps.append(step)
+            print_step(step)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if server is not None:
+            server.stop()
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'url': url if server is None else "local subprocess",
+            'server_health': json.loads(health),
+            'mix': dict(mix),
+            'questions': list(questions),
+            'seeded_ratio': args.seeded_ratio,
+            'users': args.users,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'seed': args.seed
+        },
+        'steps': steps
+    }
+
+def print_step(step):
+    latency = step['latency_ms']
+    line = (f"c={step['concurrency']:<4d} {step['rps']:9.2f} req/s  "
+            f"p50 {latency['p50'] or 0:8.2f}  p95 {latency['p95'] or 0:8.2f}  p99 {latency['p99'] or 0:8.2f} ms  "
+            f"errors {step['errors']['rate'] * 100:5.1f}%")
+    server = step['server']
+    if server and 'rss_mb_peak' in server:
+        line += f"  cpu {server['cpu_percent']:6.1f}%  rss {server['rss_mb_peak']:7.1f} MB"
+    print(line)
+
+# Lines comparing two reports, matched by concurrency level
+def compare_results(baseline, current):
+    baseline_steps = {step['concurrency']: step for step in baseline['steps']}
+    lines = []
+    for step in current['steps']:
+        before = baseline_steps.get(step['concurrency'])
+        if before is None:
+            continue
+        parts = [f"c={step['concurrency']:<4d}"]
+        for label, old, new in (
+            ("req/s", before['rps'], step['rps']),
+            ("p95", before['latency_ms']['p95'], step['latency_ms']['p95']),
+            ("p99", before['latency_ms']['p99'], step['latency_ms']['p99'])
+        ):
+            if old and new is not None:
+                parts.append(f"{label} {old:.2f} -> {new:.2f} ({(new - old) / old * 100:+.1f}%)")
+        lines.append("  ".join(parts))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test of server.py /api/generate")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="Comma-separated client counts, one measured step each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each step")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="element_file[:weight],... picked per request")
+    parser.add_argument("--questions", default="5", help="number_of_questions, N or MIN-MAX")
+    parser.add_argument("--seeded-ratio", type=float, default=0.0,
+                        help="Share of requests sent with a seed (response cache hits)")
+    parser.add_argument("--users", type=int, default=0, help="Spread requests over this many user_ids")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed of the request mix")
+    parser.add_argument("--url", help="Drive a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="With --url: server process to sample CPU/RSS from")
+    parser.add_argument("--port", type=int, help="Port for the started server (default: a free one)")
+    parser.add_argument("--output", default="benchmarks/baselines/load_latest.json")
+    parser.add_argument("--compare", help="Earlier report to compare this run against")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    output_path = os.path.join(ROOT_DIR, args.output)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared to {args.compare}:")
+        for line in compare_results(baseline, result):
+            print(f"  {line}")
+
+    failed_steps = [step for step in result['steps'] if step['requests'] == 0]
+    if failed_steps:
+        print("FAILED: no requests completed at concurrency "
+              f"{', '.join(str(step['concurrency']) for step in failed_steps)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
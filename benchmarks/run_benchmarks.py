@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# benchmarks/run_benchmarks.py
+#
+# Per-stage benchmarks over the full element corpus.
+#
+#   python benchmarks/run_benchmarks.py run [--output FILE] [--seed N] [--repeat N]
+#   python benchmarks/run_benchmarks.py compare BASELINE [--current FILE] [--threshold PCT]
+#
+# 'run' writes a JSON baseline. 'compare' runs the suite again (or reads
+# --current) and exits with status 1 when any stage's median time regressed
+# by more than --threshold percent. Both also exit with status 1 when the
+# indexed Deduplicator's verdicts differ from the linear scan's.
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from src.utils import load_config, is_pure_numeric
+from src.logger import configure_logging
+from src.fact_extractor import FactExtractor, clear_parse_cache
+from src.knowledge_base import KnowledgeBase
+from src.deduplicator import Deduplicator
+from src.question_generator import QuestionGenerator
+from src.question_templates import QUESTION_TEMPLATES
+
+ELEMENT_DIRS = ["data/questions_context_fetching_database", "data/chemistry_files"]
+DEDUP_BANK_SIZES = [100, 500, 1000, 2000]
+DEDUP_LINEAR_MAX_BANK = 1000
+DEDUP_QUERIES = 50
+DEFAULT_THRESHOLD = 25.0
+# Verdict-equivalence check: linear vs indexed dedup on the same inputs
+EQUIVALENCE_STORED_QUESTIONS = 100
+EQUIVALENCE_QUERIES = 300
+EQUIVALENCE_THRESHOLDS = [0.7, 0.99]
+
+def list_element_files():
+    files = []
+    for directory in ELEMENT_DIRS:
+        files.extend(
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith('.txt')
+        )
+    return files
+
+# Collects per-call timings for one stage
+class StageTimer:
+    def __init__(self):
+        self.samples = []
+
+    def time(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        samples_ms = sorted(s * 1000 for s in self.samples)
+        if not samples_ms:
+            return {'count': 0}
+        return {
+            'count': len(samples_ms),
+            'total_ms': round(sum(samples_ms), 4),
+            'mean_ms': round(statistics.fmean(samples_ms), 4),
+            'median_ms': round(statistics.median(samples_ms), 4),
+            'p95_ms': round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 4),
+            'max_ms': round(samples_ms[-1], 4)
+        }
+
+def bench_fact_extraction(files, repeat):
+    cold = StageTimer()
+    warm = StageTimer()
+    for _ in range(repeat):
+        clear_parse_cache()
+        for path in files:
+            cold.time(FactExtractor().extract_from_file, path)
+        for path in files:
+            warm.time(FactExtractor().extract_from_file, path)
+    return {'fact_extraction_cold': cold.summary(), 'fact_extraction_cached': warm.summary()}
+
+def bench_distractors(knowledge_base, files, repeat, seed):
+    loader = knowledge_base.distractors
+    numeric = StageTimer()
+    string_cold = StageTimer()
+    string_warm = StageTimer()
+
+    lookups = []
+    for path in files:
+        facts = FactExtractor().extract_from_file(path)['facts']
+        for spec in knowledge_base.template_specs.values():
+            if spec['column'] is None or spec['fact_key'] not in facts:
+                continue
+            raw = facts[spec['fact_key']]
+            for answer in (raw if isinstance(raw, tuple) else (raw,)):
+                lookups.append((answer, spec['column']))
+
+    for _ in range(repeat):
+        random.seed(seed)
+        loader._ranked_string_positions.cache_clear()
+        for answer, column in lookups:
+            timer = numeric if is_pure_numeric(answer) else string_cold
+            timer.time(loader.get_distractors, answer, column, 10)
+        for answer, column in lookups:
+            if not is_pure_numeric(answer):
+                string_warm.time(loader.get_distractors, answer, column, 10)
+
+    return {
+        'distractors_numeric': numeric.summary(),
+        'distractors_string_cold': string_cold.summary(),
+        'distractors_string_cached': string_warm.summary()
+    }
+
+def build_question_bank(files, size, seed):
+    names = []
+    for path in files:
+        name = FactExtractor().extract_from_file(path)['vietnamese_name']
+        if name:
+            names.append(name)
+    bank = [template["Vietnamese"].format(element=name)
+            for name in names for template in QUESTION_TEMPLATES.values()]
+
+    rng = random.Random(seed)
+    # Pad with single-character edits so large banks are not just repeats
+    while len(bank) < size:
+        chars = list(rng.choice(bank))
+        chars[rng.randrange(len(chars))] = rng.choice("abcdeghiklmnopqrstuvxy ")
+        bank.append(''.join(chars))
+    rng.shuffle(bank)
+    return bank
+
+def bench_dedup(config, files, seed):
+    threshold = config['deduplication']['similarity_threshold']
+    results = {}
+    bank = build_question_bank(files, max(DEDUP_BANK_SIZES) + DEDUP_QUERIES, seed)
+
+    for size in DEDUP_BANK_SIZES:
+        stored = bank[:size]
+        queries = bank[size:size + DEDUP_QUERIES]
+        modes = [('index', True)]
+        if size <= DEDUP_LINEAR_MAX_BANK:
+            modes.append(('linear', False))
+
+        for mode, use_index in modes:
+            dedup = Deduplicator(similarity_threshold=threshold, use_index=use_index)
+            for question in stored:
+                dedup.add_question(question)
+            timer = StageTimer()
+            for question in queries:
+                timer.time(dedup.is_duplicate, question)
+            results[f"dedup_{mode}_{size}"] = timer.summary()
+
+    return results
+
+# Copy of text with 1-3 random single-character edits (substitute, insert or delete)
+def perturb(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        position = rng.randrange(len(chars))
+        edit = rng.choice(("substitute", "insert", "delete"))
+        if edit == "substitute":
+            chars[position] = rng.choice("abcdeghiklmnopqrstuvxy ")
+        elif edit == "insert":
+            chars.insert(position, rng.choice("abcdeghiklmnopqrstuvxy "))
+        elif len(chars) > 1:
+            del chars[position]
+    return ''.join(chars)
+
+# Compare linear and indexed Deduplicator verdicts on the same inputs
+"""
+Stored texts are element names (short: one typo shares no word with the
+original) and template questions. Queries are copies of stored texts with
+1-3 character edits, so many pairs sit near the threshold. Checked at the
+configured threshold and at EQUIVALENCE_THRESHOLDS: is_duplicate() results
+(verdict, reported match and similarity) and get_duplicates_in_batch() pairs.
+
+Returns:
+    Dict: checked, duplicates (linear verdicts), mismatches and the first few
+    mismatching inputs
+"""
+def check_dedup_equivalence(config, files, seed):
+    rng = random.Random(seed)
+    names = []
+    for path in files:
+        extracted = FactExtractor().extract_from_file(path)
+        names.extend(name for name in (extracted['vietnamese_name'], extracted['english_name']) if name)
+    stored = list(dict.fromkeys(names)) + build_question_bank(files, 0, seed)[:EQUIVALENCE_STORED_QUESTIONS]
+    queries = [perturb(rng.choice(stored), rng) for _ in range(EQUIVALENCE_QUERIES)]
+
+    thresholds = sorted({config['deduplication']['similarity_threshold'], *EQUIVALENCE_THRESHOLDS})
+    checked = 0
+    duplicates = 0
+    mismatches = []
+    for threshold in thresholds:
+        linear = Deduplicator(similarity_threshold=threshold, use_index=False)
+        indexed = Deduplicator(similarity_threshold=threshold, use_index=True)
+        for text in stored:
+            linear.add_question(text)
+            indexed.add_question(text)
+
+        for question in queries:
+            expected = linear.is_duplicate(question)
+            actual = indexed.is_duplicate(question)
+            checked += 1
+            duplicates += expected[0]
+            if expected != actual:
+                mismatches.append({'threshold': threshold, 'query': question,
+                                   'linear': list(expected), 'indexed': list(actual)})
+
+        expected_pairs = linear.get_duplicates_in_batch(queries)
+        actual_pairs = indexed.get_duplicates_in_batch(queries)
+        checked += 1
+        if expected_pairs != actual_pairs:
+            mismatches.append({'threshold': threshold, 'batch_pairs_linear': len(expected_pairs),
+                               'batch_pairs_indexed': len(actual_pairs)})
+
+    return {
+        'thresholds': thresholds,
+        'checked': checked,
+        'duplicates': duplicates,
+        'mismatches': len(mismatches),
+        'examples': mismatches[:5]
+    }
+
+def bench_end_to_end(config, knowledge_base, files, repeat, seed):
+    timer = StageTimer()
+    for _ in range(repeat):
+        random.seed(seed)
+        for path in files:
+            generator = QuestionGenerator(config, knowledge_base=knowledge_base)
+            timer.time(generator.generate_questions, path, 10)
+    return {'generate_questions_e2e': timer.summary()}
+
+def run_suite(seed, repeat):
+    config = load_config()
+    # Keep benchmark runs from flooding logs/debug.log
+    configure_logging({**config, 'logging': {**config.get('logging', {}), 'level': 'ERROR'}})
+
+    files = list_element_files()
+    random.seed(seed)
+
+    load_timer = StageTimer()
+    knowledge_base = load_timer.time(KnowledgeBase, config)
+
+    stages = {'knowledge_base_load': load_timer.summary()}
+    stages.update(bench_fact_extraction(files, repeat))
+    stages.update(bench_distractors(knowledge_base, files, repeat, seed))
+    stages.update(bench_dedup(config, files, seed))
+    stages.update(bench_end_to_end(config, knowledge_base, files, repeat, seed))
+    checks = {'dedup_equivalence': check_dedup_equivalence(config, files, seed)}
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'element_files': len(files)
+        },
+        'stages': stages,
+        'checks': checks
+    }
+
+# Compare median times per stage
+"""
+Returns:
+    Tuple: (report_lines, regressed) where regressed is True when any stage's
+    median exceeds the baseline by more than threshold percent
+"""
+def compare_results(baseline, current, threshold):
+    lines = []
+    regressed = False
+    for stage, base in sorted(baseline['stages'].items()):
+        now = current['stages'].get(stage)
+        if not now or not base.get('count') or not now.get('count'):
+            lines.append(f"{stage:32s} skipped (missing in one run)")
+            continue
+
+        base_ms = base['median_ms']
+        now_ms = now['median_ms']
+        change = ((now_ms - base_ms) / base_ms * 100) if base_ms else 0.0
+        status = "ok"
+        if change > threshold:
+            status = "REGRESSION"
+            regressed = True
+        lines.append(f"{stage:32s} {base_ms:10.4f} ms -> {now_ms:10.4f} ms  {change:+7.1f}%  {status}")
+    return lines, regressed
+
+# Print the dedup verdict-equivalence check; False when it found mismatches
+def report_equivalence(result):
+    check = result.get('checks', {}).get('dedup_equivalence')
+    if check is None:
+        return True
+    print(f"{'dedup verdict equivalence':32s} {check['checked']} checks, {check['mismatches']} mismatches "
+          f"(thresholds {', '.join(str(t) for t in check['thresholds'])})")
+    if check['mismatches']:
+        print("FAILED: indexed dedup verdicts differ from the linear scan")
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmarks for the question generator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the suite and write a JSON baseline")
+    run_parser.add_argument("--output", default="benchmarks/baselines/latest.json")
+    run_parser.add_argument("--seed", type=int, default=1234)
+    run_parser.add_argument("--repeat", type=int, default=3)
+
+    compare_parser = subparsers.add_parser("compare", help="Fail if a stage regressed past the threshold")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--current", help="Existing result file (default: run the suite now)")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Allowed slowdown of the median, in percent")
+    compare_parser.add_argument("--seed", type=int)
+    compare_parser.add_argument("--repeat", type=int)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        result = run_suite(args.seed, args.repeat)
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        for stage, summary in result['stages'].items():
+            print(f"{stage:32s} median {summary.get('median_ms', 0):10.4f} ms  (n={summary['count']})")
+        print(f"Results written to {args.output}")
+        return 0 if report_equivalence(result) else 1
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        current = run_suite(
+            args.seed if args.seed is not None else baseline['meta']['seed'],
+            args.repeat if args.repeat is not None else baseline['meta']['repeat']
+        )
+
+    lines, regressed = compare_results(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if not report_equivalence(current):
+        return 1
+    if regressed:
+        print(f"FAILED: at least one stage regressed by more than {args.threshold}%")
+        return 1
+    print("OK: no stage regressed past the threshold")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
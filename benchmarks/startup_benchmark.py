@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# benchmarks/startup_benchmark.py
+#
+# Cold-start cost of the main.py CLI.
+#
+#   python benchmarks/startup_benchmark.py [--runs N] [--import-budget-ms MS]
+#                                          [--response-budget-ms MS] [--daemon]
+#                                          [--output FILE]
+#
+# Measures, in fresh interpreters:
+#   - import time of main.py, from `python -X importtime -c "import main"`
+#     (with the slowest modules it pulled in)
+#   - time to first response: wall time of `python main.py --no-daemon`
+#     answering one request on stdin (the compiled corpus is built by an
+#     untimed warm-up run); --no-daemon keeps a running daemon from turning
+#     this into a measure of the socket-forward path
+#   - with --daemon, also the wall time of a plain `python main.py` whose
+#     request a daemon answers (one is started for the run unless its socket
+#     is already there); reported, not budgeted
+# Exits with status 1 when a median exceeds its budget.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.utils import load_config
+from src.daemon import get_daemon_settings
+
+DEFAULT_REQUEST = {"element_file": "Copper.txt", "number_of_questions": 5}
+DEFAULT_IMPORT_BUDGET_MS = 300.0
+DEFAULT_RESPONSE_BUDGET_MS = 1000.0
+TOP_MODULES = 10
+DAEMON_STARTUP_TIMEOUT = 60.0
+
+# One `-X importtime` run: (main's cumulative ms, {module imported by main: cumulative ms})
+def measure_import_time():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    # Nested imports are listed (indented) before the top-level import that
+    # pulled them in, so collect lines until the top-level 'main' line
+    block = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        cumulative_ms = int(cumulative) / 1000
+        if name.startswith("  "):
+            block[name.strip()] = cumulative_ms
+        elif name.strip() == "main":
+            return cumulative_ms, block
+        else:
+            block = {}
+    raise RuntimeError("'import main' not found in -X importtime output")
+
+# One CLI run answering request on stdin, in milliseconds
+def measure_first_response(request, cli_args=("--no-daemon",)):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "main.py", *cli_args],
+        cwd=ROOT_DIR, input=json.dumps(request), capture_output=True, text=True, check=True
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    response = json.loads(result.stdout)
+    if response.get("status") != "success":
+        raise RuntimeError(f"main.py failed: {response}")
+    return elapsed_ms
+
+def summarize(samples):
+    return {
+        'runs': len(samples),
+        'median_ms': round(statistics.median(samples), 2),
+        'min_ms': round(min(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+# `python main.py daemon` on the configured socket, or None when one is already listening
+def start_daemon():
+    config = load_config(os.path.join(ROOT_DIR, "config", "config.json"))
+    socket_path = os.path.join(ROOT_DIR, get_daemon_settings(config)['socket_path'])
+    if os.path.exists(socket_path):
+        return None
+
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "daemon"],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + DAEMON_STARTUP_TIMEOUT
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            stop_daemon(process)
+            raise RuntimeError("main.py daemon did not open its socket")
+        time.sleep(0.1)
+    return process
+
+def stop_daemon(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def run(runs, request, with_daemon=False):
+    import_samples = []
+    slowest = {}
+    for _ in range(runs):
+        total_ms, modules = measure_import_time()
+        import_samples.append(total_ms)
+        for name, cumulative_ms in modules.items():
+            slowest.setdefault(name, []).append(cumulative_ms)
+
+    measure_first_response(request)  # warm-up: builds the compiled corpus if needed
+    response_samples = [measure_first_response(request) for _ in range(runs)]
+
+    daemon_samples = None
+    if with_daemon:
+        daemon = start_daemon()
+        try:
+            measure_first_response(request, cli_args=())
+            daemon_samples = [measure_first_response(request, cli_args=()) for _ in range(runs)]
+        finally:
+            stop_daemon(daemon)
+
+    top_modules = sorted(
+        ((name, statistics.median(samples)) for name, samples in slowest.items()),
+        key=lambda item: -item[1]
+    )[:TOP_MODULES]
+
+    result = {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'request': request
+        },
+        'import_main': summarize(import_samples),
+        'slowest_imports_ms': {name: round(ms, 2) for name, ms in top_modules},
+        'time_to_first_response': summarize(response_samples)
+    }
+    if daemon_samples is not None:
+        result['time_to_first_response_daemon'] = summarize(daemon_samples)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark for the main.py CLI")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--response-budget-ms", type=float, default=DEFAULT_RESPONSE_BUDGET_MS)
+    parser.add_argument("--daemon", action="store_true",
+                        help="Also time requests answered by a running main.py daemon")
+    parser.add_argument("--output", default="benchmarks/baselines/startup_latest.json")
+    args = parser.parse_args()
+
+    result = run(args.runs, DEFAULT_REQUEST, with_daemon=args.daemon)
+    result['budgets'] = {
+        'import_main_ms': args.import_budget_ms,
+        'time_to_first_response_ms': args.response_budget_ms
+    }
+
+    output_path = os.path.join(ROOT_DIR, args.output)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    import_ms = result['import_main']['median_ms']
+    response_ms = result['time_to_first_response']['median_ms']
+    print(f"{'import main':32s} median {import_ms:10.2f} ms  (budget {args.import_budget_ms:.0f} ms)")
+    for name, ms in result['slowest_imports_ms'].items():
+        print(f"    {name:28s} {ms:10.2f} ms")
+    print(f"{'time to first response':32s} median {response_ms:10.2f} ms  (budget {args.response_budget_ms:.0f} ms)")
+    if 'time_to_first_response_daemon' in result:
+        daemon_ms = result['time_to_first_response_daemon']['median_ms']
+        print(f"{'  ... answered by the daemon':32s} median {daemon_ms:10.2f} ms")
+    print(f"Results written to {args.output}")
+
+    failed = []
+    if import_ms > args.import_budget_ms:
+        failed.append("import time")
+    if response_ms > args.response_budget_ms:
+        failed.append("time to first response")
+    if failed:
+        print(f"FAILED: {' and '.join(failed)} over budget")
+        return 1
+    print("OK: startup within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
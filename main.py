@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
 # main.py
 
+import argparse
 import json
 import sys
 import os
+from collections import deque
 from src.utils import load_config, log_debug, get_timestamp
-from src.question_generator import QuestionGenerator
-from src.summary_generator import SummaryGenerator
+from src.logger import configure_logging, new_correlation_id
+from src.summary_aggregator import get_summary_aggregator
 from src.io_handler import IOHandler
+from src import serialization
+from src.daemon import answer_request, forward_request, get_daemon_settings, run_daemon
 
-def main():
+# Startup time is most of a single CLI run: modules only needed by one
+# command (process pools, the question bank builder) are imported inside it,
+# and so is the corpus loader (NumPy), which is skipped when a daemon answers.
+
+def main(args):
     try:
         # Load configuration
         config = load_config()
+        configure_logging(config)
         log_debug("=" * 50)
-        log_debug(f"Chemistry AI Question Generator Started - {get_timestamp()}")
+        log_debug("Chemistry AI Question Generator Started - %s", get_timestamp())
         log_debug("=" * 50)
         
         # Read request from stdin using IOHandler
@@ -27,57 +36,31 @@ def main():
                 f"Invalid JSON input: {error_msg}"
             )
             print(json.dumps(error_response, ensure_ascii=False))
-            log_debug(f"ERROR: Invalid JSON input - {error_msg}")
+            log_debug("Invalid JSON input - %s", error_msg, level='ERROR')
             return
         
-        log_debug(f"Received request: {request}")
+        log_debug("Received request: %s", request)
         
-        # Get base path for elements from config
-        elements_base_path = config['data_paths']['chemistry_files']
+        # A running daemon already has everything loaded
+        response = None
+        if not args.no_daemon and get_daemon_settings(config)['use_daemon']:
+            response = forward_request(request, config)
         
-        # Validate request using IOHandler (handles path resolution)
-        is_valid, error_msg, full_element_path = IOHandler.validate_generation_request(
-            request, 
-            base_path=elements_base_path
-        )
+        if response is None:
+            from src.corpus import load_knowledge_base
+            
+            # Load the compiled corpus (rebuilt automatically when sources changed)
+            knowledge_base = load_knowledge_base(config)
+            
+            # Validate, generate and summarize
+            response = answer_request(request, config, knowledge_base)
         
-        if not is_valid:
-            error_response = IOHandler.create_error_response(
-                error_msg,
-                f"Request validation failed"
-            )
-            print(json.dumps(error_response, ensure_ascii=False))
-            log_debug(f"ERROR: {error_msg}")
+        if response.get('status') != "success":
+            print(json.dumps(response, ensure_ascii=False))
             return
         
-        # Generate questions using the RESOLVED full_element_path
-        log_debug(f"Starting question generation for file: {full_element_path}")
-        qg = QuestionGenerator(config)
-        
-        questions = qg.generate_questions(
-            full_element_path,
-            request['number_of_questions']
-        )
-        
-        # Generate summary
-        summary_gen = SummaryGenerator()
-        summary = summary_gen.generate_summary(
-            request['element_file'], # Use original filename for report
-            len(questions),
-            qg.get_statistics(),
-            success=True
-        )
-        
-        # Save summary
-        summary_file = summary_gen.save_summary(summary)
-        log_debug(f"Summary saved: {summary_file}")
-        
-        # Create response
-        response = IOHandler.create_success_response(request, questions, summary_file)
-        
         # Output response
-        IOHandler.output_json(response)
-        log_debug(f"SUCCESS: Generated {len(questions)} questions")
+        IOHandler.output_json(response, compact=args.compact)
         log_debug("=" * 50)
         
     except Exception as e:
@@ -86,9 +69,211 @@ def main():
             f"Unexpected error: {type(e).__name__}"
         )
         print(json.dumps(error_response, ensure_ascii=False))
-        log_debug(f"ERROR: {str(e)}")
+        log_debug(str(e), level='ERROR')
         import traceback
-        log_debug(traceback.format_exc())
+        log_debug(traceback.format_exc(), level='ERROR')
+
+# --batch: one JSON request per input line, one JSON response per output line
+"""
+All requests share one loaded knowledge base (or, with --workers N, a pool of
+N warm worker processes). Responses carry the request's 'index' (0-based line
+number among non-empty lines) and its 'request_id' when given. By default they
+are written in input order; with --unordered, as soon as each one finishes.
+A bad line produces an error response instead of stopping the batch.
+"""
+def batch_command(args):
+    from src.corpus import load_knowledge_base
+    from src.worker_pool import generate_batch_item
+
+    config = load_config()
+    configure_logging(config)
+    log_debug("=" * 50)
+    log_debug("Chemistry AI Question Generator Batch Started - %s", get_timestamp())
+    log_debug("=" * 50)
+
+    summary_aggregator = get_summary_aggregator(config)
+    batch_id = new_correlation_id()
+
+    source = sys.stdin if args.batch == "-" else open(args.batch, 'r', encoding='utf-8')
+    try:
+        items = _read_batch_lines(source)
+        if args.workers and args.workers > 1:
+            results = _run_batch_in_pool(config, items, batch_id, args.workers, args.unordered)
+        else:
+            knowledge_base = load_knowledge_base(config)
+            results = (
+                _parse_error_result(index, parse_error) if parse_error
+                else generate_batch_item(index, request, config, knowledge_base)
+                for index, request, parse_error in items
+            )
+
+        count = 0
+        for result, summary in results:
+            if summary is not None:
+                summary_aggregator.record(summary)
+            sys.stdout.write(serialization.dumps(result) + "\n")
+            sys.stdout.flush()
+            count += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    summary_aggregator.flush()
+    log_debug("Batch complete: %d requests", count, level='INFO')
+
+# (index, request, parse_error) for every non-empty line
+def _read_batch_lines(source):
+    index = 0
+    for line in source:
+        if not line.strip():
+            continue
+        request, error_msg = IOHandler.read_json_input(line)
+        yield index, request, error_msg
+        index += 1
+
+def _parse_error_result(index, error_msg):
+    return {'index': index, **IOHandler.create_error_response(
+        "Failed to parse JSON line", f"Invalid JSON input: {error_msg}"
+    )}, None
+
+# Run batch items on a process pool, keeping at most 4 items per worker in flight
+"""
+Yields (result, summary) tuples, in input order unless unordered is set.
+"""
+def _run_batch_in_pool(config, items, batch_id, workers, unordered):
+    from src.worker_pool import create_worker_pool, run_batch_item
+
+    pool = create_worker_pool(config, max_workers=workers)
+    max_in_flight = workers * 4
+    pending = deque()
+    try:
+        for index, request, parse_error in items:
+            if parse_error:
+                pending.append(_completed_future(_parse_error_result(index, parse_error)))
+            else:
+                pending.append(pool.submit(run_batch_item, index, request, f"{batch_id}.{index}"))
+
+            while len(pending) >= max_in_flight:
+                yield from _drain(pending, unordered)
+
+        while pending:
+            yield from _drain(pending, unordered)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# Wait for and yield finished results: the oldest one in order mode, every finished one otherwise
+def _drain(pending, unordered):
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    if not unordered:
+        yield pending.popleft().result()
+        return
+
+    wait(pending, return_when=FIRST_COMPLETED)
+    for future in [f for f in pending if f.done()]:
+        pending.remove(future)
+        yield future.result()
+
+def _completed_future(result):
+    from concurrent.futures import Future
+
+    future = Future()
+    future.set_result(result)
+    return future
+
+# daemon: keep the knowledge base loaded and answer main.py runs over a Unix socket
+def daemon_command(args):
+    from src.corpus import load_knowledge_base
+    from src.source_watcher import KnowledgeBaseHolder, start_source_watcher
+
+    config = load_config()
+    configure_logging(config)
+    sources = KnowledgeBaseHolder(config, load_knowledge_base(config))
+    source_watcher = start_source_watcher(sources)
+    socket_path = run_daemon(sources, args.socket)
+    if source_watcher is not None:
+        source_watcher.stop()
+    get_summary_aggregator(config).flush()
+    print(json.dumps({"status": "stopped", "socket": socket_path}, ensure_ascii=False))
+
+# build-corpus: parse all element files and the facts CSV into one artifact
+def build_corpus_command(args):
+    from src.corpus import build_corpus
+
+    config = load_config()
+    configure_logging(config)
+    knowledge_base, corpus_path = build_corpus(config, args.output)
+    print(json.dumps({
+        "status": "success",
+        "corpus_file": corpus_path,
+        "elements": len(knowledge_base.elements),
+        "categories": len(knowledge_base.distractors.get_categories())
+    }, ensure_ascii=False))
+
+# build-question-bank: precompute every answerable question into a SQLite bank
+def build_question_bank_command(args):
+    from src.corpus import load_knowledge_base
+    from src.question_bank import build_question_bank
+
+    config = load_config()
+    configure_logging(config)
+    knowledge_base = load_knowledge_base(config)
+    report, bank_path = build_question_bank(
+        config, knowledge_base, args.output, distractor_sets=args.sets, seed=args.seed
+    )
+    print(json.dumps({
+        "status": "success",
+        "question_bank_file": bank_path,
+        **report
+    }, ensure_ascii=False, indent=2))
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Chemistry AI Question Generator. Without a command, reads one JSON request from stdin."
+    )
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="Process JSONL requests from FILE (or stdin) and write JSONL responses")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="With --batch: number of worker processes (default: run in this process)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="With --batch: write responses as they finish instead of in input order")
+    parser.add_argument("--compact", action="store_true",
+                        help="Print the response on one line without indentation (for machine clients)")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Generate in this process even when a daemon is running")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="Keep the generator loaded and answer main.py requests over a Unix domain socket"
+    )
+    daemon_parser.add_argument("--socket", help="Socket path (default: daemon.socket_path in config.json)")
+    
+    build_parser = subparsers.add_parser(
+        "build-corpus",
+        help="Compile element files and the facts CSV into a fast-loading corpus"
+    )
+    build_parser.add_argument("--output", help="Corpus path (default: data_paths.corpus in config.json)")
+    
+    bank_parser = subparsers.add_parser(
+        "build-question-bank",
+        help="Precompute every answerable question (with several distractor sets) into a SQLite bank"
+    )
+    bank_parser.add_argument("--output", help="Bank path (default: question_bank.path in config.json)")
+    bank_parser.add_argument("--sets", type=int, help="Distractor sets per question (default: question_bank.distractor_sets)")
+    bank_parser.add_argument("--seed", type=int, default=0, help="Seed for distractor sampling")
+    
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args(sys.argv[1:])
+    if args.command == "build-corpus":
+        build_corpus_command(args)
+    elif args.command == "build-question-bank":
+        build_question_bank_command(args)
+    elif args.command == "daemon":
+        daemon_command(args)
+    elif args.batch:
+        batch_command(args)
+    else:
+        main(args)
@@ -1,91 +1,359 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import asyncio
 import os
 
 from src.utils import load_config, log_debug, get_timestamp
-from src.question_generator import QuestionGenerator
-from src.summary_generator import SummaryGenerator
+from src.logger import configure_logging, correlation_context, get_correlation_id
+from src.metrics import registry as metrics_registry, request_timing, server_timing_header, timed
+from src.corpus import load_knowledge_base
+from src.summary_aggregator import get_summary_aggregator
+from src.response_cache import get_response_cache
+from src.worker_pool import create_worker_pool, run_batch_item
+from src.request_executor import GenerationExecutor, REJECTED_QUEUE_FULL
 from src.io_handler import IOHandler
+from src import serialization
+from src.quiz_assembler import assemble_quiz
+from src.source_watcher import KnowledgeBaseHolder, start_source_watcher
 
-# Initialize App and Config
+# Initialize App
+# Config, knowledge base and background threads are set up in startup_event,
+# not at import: batch worker processes are spawned, and spawn imports this
+# file again in every worker (as __mp_main__ under 'python server.py').
 app = FastAPI(title="Chemistry AI Generator", version="1.0.0")
-config = load_config()
+config = None
+
+# Shared, read-only knowledge base (CSV facts, element files, template table)
+# Loaded once on startup (from the compiled corpus when it is up to date) and reused by every request.
+# Edits to the sources are picked up by the source watcher, which swaps in a rebuilt
+# snapshot; each request reads sources.get() once and uses that snapshot throughout.
+sources = None
+
+# Rolling generation stats, flushed to a JSONL sink in the background
+summary_aggregator = None
+
+# Process pool for batch requests, bounded executor for single requests and
+# source watcher (created on startup)
+batch_pool = None
+generation_executor = None
+source_watcher = None
 
 # Define Request Model (Validation)
 class GenerationRequest(BaseModel):
     element_file: str
     number_of_questions: int
+    seed: Optional[int] = None
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+class BatchGenerationRequest(BaseModel):
+    items: List[GenerationRequest]
+
+class QuizRequest(BaseModel):
+    total_questions: int
+    elements: Optional[List[str]] = None
+    filters: Optional[Dict[str, Any]] = None
+    weights: Optional[Dict[str, float]] = None
+    seed: Optional[int] = None
+    shuffle: bool = False
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+# Tag all log lines of a request with one correlation ID (X-Request-ID if the client sent one)
+# and report its per-stage timings in a Server-Timing header
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    with correlation_context(request.headers.get("x-request-id")) as correlation_id, \
+            request_timing() as spans:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = correlation_id
+    if spans:
+        response.headers["Server-Timing"] = server_timing_header(spans)
+    return response
 
 @app.on_event("startup")
 async def startup_event():
+    global config, sources, summary_aggregator, batch_pool, generation_executor, source_watcher
+    config = load_config()
+    configure_logging(config)
+    sources = KnowledgeBaseHolder(config, load_knowledge_base(config))
+    summary_aggregator = get_summary_aggregator(config)
+
+    batch_settings = config.get('batch', {})
+    batch_pool = create_worker_pool(config, max_workers=batch_settings.get('max_workers'))
+    generation_executor = GenerationExecutor(sources, config.get('server'))
+    source_watcher = start_source_watcher(sources)
+    if source_watcher is not None:
+        source_watcher.add_listener(on_sources_reloaded)
+
     log_debug("=" * 50)
-    log_debug(f"API Server Started - {get_timestamp()}")
+    log_debug("API Server Started - %s", get_timestamp())
     log_debug("=" * 50)
 
+# Worker processes hold their own knowledge base: replace them after a reload
+# (called from the watcher thread; running batch items finish on the old pool)
+def on_sources_reloaded(snapshot):
+    global batch_pool
+    old_pool = batch_pool
+    batch_pool = create_worker_pool(snapshot.config, max_workers=snapshot.config.get('batch', {}).get('max_workers'))
+    old_pool.shutdown(wait=False)
+    generation_executor.reload_workers(snapshot.config)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if source_watcher is not None:
+        source_watcher.stop()
+    if batch_pool is not None:
+        batch_pool.shutdown(wait=False, cancel_futures=True)
+    if generation_executor is not None:
+        generation_executor.shutdown()
+    if summary_aggregator is not None:
+        summary_aggregator.flush()
+
 @app.post("/api/generate", response_model=Dict[str, Any])
 async def generate_questions_endpoint(req: GenerationRequest):
-    
+
     # Endpoint to generate chemistry questions.
     try:
         # Convert Pydantic model to dict for compatibility with your existing code
-        request_data = req.dict()
-        
-        log_debug(f"API Request received: {request_data}")
-        
-        # Get element path from config
-        elements_base_path = config['data_paths']['chemistry_files']
-        
-        # Validate request & Resolve Path
-        is_valid, error_msg, full_element_path = IOHandler.validate_generation_request(
-            request_data, 
-            base_path=elements_base_path
+        request_data = req.dict(exclude_none=True)
+
+        log_debug("API Request received: %s", request_data)
+
+        # Runs on the bounded executor so the event loop stays free
+        response, error_msg, rejection = await generation_executor.generate(
+            request_data,
+            record_summary=summary_aggregator.record
         )
-        
-        if not is_valid:
-            log_debug(f"Validation failed: {error_msg}")
+
+        if rejection is not None:
+            raise_rejection(rejection)
+
+        if response is None:
             raise HTTPException(status_code=400, detail=error_msg)
-            
-        # Generation
-        log_debug(f"Starting generation for: {full_element_path}")
-        qg = QuestionGenerator(config)
-        
-        questions = qg.generate_questions(
-            full_element_path,
-            request_data['number_of_questions']
-        )
-        
-        # Summary
-        summary_gen = SummaryGenerator()
-        summary = summary_gen.generate_summary(
-            request_data['element_file'],
-            len(questions),
-            qg.get_statistics(),
-            success=True
-        )
-        summary_file = summary_gen.save_summary(summary)
-        
-        # Response
-        response = IOHandler.create_success_response(request_data, questions, summary_file)
-        
-        log_debug(f"SUCCESS: Generated {len(questions)} questions")
-        return response
+
+        with timed('response_serialization'):
+            body = serialization.dumps_bytes(response)
+        return Response(content=body, media_type="application/json")
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        log_debug(f"SERVER ERROR: {str(e)}")
+        log_debug("SERVER ERROR: %s", e, level='ERROR')
         import traceback
-        log_debug(traceback.format_exc())
+        log_debug(traceback.format_exc(), level='ERROR')
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+# 429 when the generation queue is full, 503 when the request waited or ran too long
+def raise_rejection(rejection):
+    if rejection == REJECTED_QUEUE_FULL:
+        raise HTTPException(status_code=429, detail="Too many requests in progress, retry later",
+                            headers={"Retry-After": "1"})
+    raise HTTPException(status_code=503, detail=f"Generation unavailable ({rejection}), retry later",
+                        headers={"Retry-After": "5"})
+
+# Streaming variant of /api/generate.
+# Each question is sent as soon as it passes the duplicate check, then one final
+# 'summary' frame (or an 'error' frame). Frames are NDJSON lines, or Server-Sent
+# Events when the client sends "Accept: text/event-stream".
+@app.post("/api/generate/stream")
+async def generate_stream_endpoint(req: GenerationRequest, request: Request):
+    request_data = req.dict(exclude_none=True)
+
+    # Validate before streaming starts, so bad requests still get a 400
+    snapshot = sources.get()
+    is_valid, error_msg, _ = IOHandler.validate_generation_request(
+        request_data, base_path=snapshot.config['data_paths']['chemistry_files'],
+        catalog=snapshot.knowledge_base.catalog
+    )
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+
+    log_debug("API Stream request received: %s", request_data)
+
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    loop = asyncio.get_running_loop()
+    frames = asyncio.Queue()
+    summaries = []
+
+    def on_question(question):
+        loop.call_soon_threadsafe(frames.put_nowait, question)
+
+    def record_summary(summary):
+        summaries.append(summary)
+        return summary_aggregator.record(summary)
+
+    future, rejection = await generation_executor.start_stream(request_data, on_question, record_summary)
+    if rejection is not None:
+        raise_rejection(rejection)
+    # Runs after every queued question (callbacks are scheduled in order)
+    future.add_done_callback(lambda _: frames.put_nowait(None))
+
+    def encode(frame_type, payload):
+        with timed('response_serialization'):
+            data = serialization.dumps_bytes({"type": frame_type, **payload})
+        if use_sse:
+            return b"event: " + frame_type.encode() + b"\ndata: " + data + b"\n\n"
+        return data + b"\n"
+
+    async def stream_frames():
+        timeout = generation_executor.request_timeout
+        deadline = loop.time() + timeout if timeout else None
+        index = 0
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                question = await asyncio.wait_for(frames.get(), remaining)
+            except asyncio.TimeoutError:
+                log_debug("Stream timed out after %ss", timeout, level='WARNING')
+                yield encode("error", {"error_message": f"Generation timed out after {timeout}s"})
+                return
+            if question is None:
+                break
+            index += 1
+            yield encode("question", {"index": index, "question": question})
+
+        try:
+            response, error_msg = future.result()
+        except Exception as e:
+            log_debug("STREAM ERROR: %s", e, level='ERROR')
+            yield encode("error", {"error_message": f"Internal Server Error: {str(e)}"})
+            return
+
+        if response is None:
+            yield encode("error", {"error_message": error_msg})
+            return
+
+        summary = summaries[0] if summaries else None
+        yield encode("summary", {
+            "status": response['status'],
+            "element_file": response['element_file'],
+            "questions_generated": response['questions_generated'],
+            "summary_file": response['summary_file'],
+            "statistics": {
+                **summary['performance'],
+                **summary['quality_metrics']
+            } if summary else None
+        })
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(stream_frames(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Endpoint to assemble one quiz from many elements (see quiz_assembler.assemble_quiz)
+@app.post("/api/quiz", response_model=Dict[str, Any])
+async def quiz_endpoint(req: QuizRequest):
+    request_data = req.dict(exclude_none=True)
+    log_debug("API Quiz request received: %s", request_data)
+
+    snapshot = sources.get()
+    try:
+        result, rejection = await generation_executor.run_in_thread(
+            assemble_quiz, request_data, snapshot.config, snapshot.knowledge_base
+        )
+    except Exception as e:
+        log_debug("SERVER ERROR: %s", e, level='ERROR')
+        import traceback
+        log_debug(traceback.format_exc(), level='ERROR')
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+    if rejection is not None:
+        raise_rejection(rejection)
+
+    response, error_msg = result
+    if response is None:
+        raise HTTPException(status_code=400, detail=error_msg)
+
+    with timed('response_serialization'):
+        body = serialization.dumps_bytes(response)
+    return Response(content=body, media_type="application/json")
+
+# Endpoint to generate questions for many elements at once.
+# Items run in parallel on the worker pool; each result is streamed back as one
+# NDJSON line (tagged with its 'index') as soon as it finishes.
+@app.post("/api/generate/batch")
+async def generate_batch_endpoint(req: BatchGenerationRequest):
+    items = [item.dict(exclude_none=True) for item in req.items]
+
+    if not items:
+        raise HTTPException(status_code=400, detail="'items' must not be empty")
+
+    max_items = config.get('batch', {}).get('max_items', 120)
+    if len(items) > max_items:
+        raise HTTPException(status_code=400, detail=f"'items' must not exceed {max_items}")
+
+    log_debug("API Batch request received: %d items", len(items))
+
+    loop = asyncio.get_running_loop()
+    batch_id = get_correlation_id()
+    pool = batch_pool
+    futures = [
+        loop.run_in_executor(pool, run_batch_item, index, item, f"{batch_id}.{index}")
+        for index, item in enumerate(items)
+    ]
+
+    async def stream_results():
+        try:
+            for next_result in asyncio.as_completed(futures):
+                result, summary = await next_result
+                if summary is not None:
+                    summary_aggregator.record(summary)
+                with timed('response_serialization'):
+                    line = serialization.dumps_bytes(result) + b"\n"
+                yield line
+        finally:
+            # Client went away: drop the items that have not started yet
+            for future in futures:
+                future.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# Elements that can be requested, by file name, symbol or name
+# With ?q=..., the closest matches to q (accent-insensitive, typo-tolerant) with their similarity
+@app.get("/api/elements")
+async def elements_endpoint(q: Optional[str] = None, limit: Optional[int] = None):
+    catalog = sources.get().knowledge_base.catalog
+    if q is None:
+        elements = [public_entry(entry) for entry in catalog.entries]
+    else:
+        elements = [
+            {**public_entry(entry), "similarity": similarity}
+            for entry, similarity in catalog.search(q, limit=limit)
+        ]
+    return {"count": len(elements), "elements": elements}
+
+def public_entry(entry):
+    return {key: value for key, value in entry.items() if key != 'path'}
+
+# Aggregated generation stats (per element and overall) since server start
+@app.get("/api/summary")
+async def summary_endpoint():
+    return summary_aggregator.get_aggregates()
+
+# Stage timing histograms in Prometheus text format (this process only;
+# batch items run in worker processes and are not included)
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics_registry.render_prometheus(),
+                             media_type="text/plain; version=0.0.4")
+
 # Health check endpoint for verifying service status
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "Chemistry AI Generator"}
+    health = {"status": "ok", "service": "Chemistry AI Generator", "sources_version": sources.get().version}
+    if generation_executor is not None:
+        health["generation"] = generation_executor.get_stats()
+    response_cache = get_response_cache(config)
+    if response_cache is not None:
+        health["response_cache"] = response_cache.get_stats()
+    return health
 
 if __name__ == "__main__":
     # Run server: python server.py
     # Access at: http://localhost:8000
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
+    # Content edits (config.json, facts CSV, element files) are hot-reloaded by the
+    # source watcher; code changes need a restart
+    uvicorn.run("server:app", host="0.0.0.0", port=8000)
@@ -5,36 +5,67 @@ using templates.
 
 Modules:
 - utils: Utility functions (rounding, logging, config loading)
+- logger: Buffered background log writer with correlation IDs
 - fact_extractor: Parse chemistry data files
 - distractors_loader: Load distractors database CSV
 - question_templates: Question template definitions
+- template_planner: Template/CSV schema checks and per-element template plans
+- knowledge_base: Shared read-only data loaded once per process
+- element_catalog: Element lookup by file name, symbol or name (fuzzy search for suggestions)
+- corpus: Compiled, content-hashed snapshot of the knowledge base
+- question_bank: Precomputed SQLite question bank and a sampling generator over it
 - deduplicator: Duplicate detection and removal
+- bloom_filter: Bloom filter over 64-bit fingerprints
+- seen_store: Persistent per-user/session history of served questions
+- question: Immutable Question record returned by the generators
 - question_generator: Main generation orchestrator
 - summary_generator: Debug summary generation
+- summary_aggregator: Rolling summary stats with a background JSONL sink
+- metrics: Per-stage timing histograms (Prometheus /metrics, Server-Timing)
 - io_handler: Input/output validation
+- serialization: JSON encoding of responses (orjson when installed)
+- request_processor: End-to-end handling of one generation request
+- quiz_assembler: Multi-element quizzes with weighted apportioning and one shared dedup index
+- response_cache: LRU + TTL cache for seeded (reproducible) responses
+- worker_pool: Process pool with warm workers for batch generation
+- request_executor: Bounded, off-event-loop executor for single generation requests
+- daemon: Warm generator behind a Unix domain socket, and main.py's client for it
+- source_watcher: Hot reload of config and sources into atomically swapped snapshots
 """
 
 __version__ = "1.0.0"
 __author__ = "PT-LoiX86 and huyfan123"
 
-from src.utils import load_config, get_timestamp, log_debug, round_number
-from src.fact_extractor import FactExtractor
-from src.distractors_loader import DistractorsLoader
-from src.question_templates import get_all_templates, generate_question_text
-from src.deduplicator import Deduplicator
-from src.question_generator import QuestionGenerator
-from src.summary_generator import SummaryGenerator
+import importlib
 
-__all__ = [
-    'load_config',
-    'get_timestamp',
-    'log_debug',
-    'round_number',
-    'FactExtractor',
-    'FactsLoader',
-    'get_all_templates',
-    'generate_question_text',
-    'Deduplicator',
-    'QuestionGenerator',
-    'SummaryGenerator'
-]
+# Public names and the submodule defining each. Submodules are imported on
+# first attribute access, so "import src.utils" does not pull in NumPy or
+# the generator stack.
+_LAZY_ATTRIBUTES = {
+    'load_config': 'src.utils',
+    'get_timestamp': 'src.utils',
+    'log_debug': 'src.utils',
+    'round_number': 'src.utils',
+    'FactExtractor': 'src.fact_extractor',
+    'DistractorsLoader': 'src.distractors_loader',
+    'get_all_templates': 'src.question_templates',
+    'generate_question_text': 'src.question_templates',
+    'Deduplicator': 'src.deduplicator',
+    'KnowledgeBase': 'src.knowledge_base',
+    'Question': 'src.question',
+    'QuestionGenerator': 'src.question_generator',
+    'SummaryGenerator': 'src.summary_generator'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'src' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,218 @@
+from array import array
+from collections import Counter
+import numpy as np
+
+# Stored texts before the first re-ranking (then at every doubling)
+_INITIAL_REBUILD_SIZE = 64
+# Rank of tokens not seen by add() yet: they sort before every known one
+_UNSEEN_RANK = float('-inf')
+# Slack for float rounding in the overlap and length bounds
+_EPSILON = 1e-9
+
+# Stored texts that may reach a SequenceMatcher.ratio() threshold with a query, found without scanning them all
+"""
+ratio() is 2*M/T, where M is the number of matched characters and T the two
+lengths summed. M cannot exceed the size of the multiset intersection of the
+two texts' characters (difflib's quick_ratio() bound), and cannot exceed the
+shorter length (real_quick_ratio()). So at threshold t two texts of lengths
+a and b can only match when
+    - b lies in [a*t/(2-t), a*(2-t)/t] (the length window), and
+    - they share at least ceil(t*(a+b)/2) >= t*a/(2-t) characters.
+
+Each text is a set of tokens (char, k): its k-th occurrence of char, so that
+shared tokens are exactly the multiset intersection. Sorted in one fixed
+order, two texts sharing at least o tokens must share one among the first
+len - o + 1 tokens of each (prefix filtering). add() files a text under its
+prefix tokens only; candidates() looks up the query's prefix tokens, so
+stored texts sharing none of them are never touched. The texts found are
+then narrowed in three vectorized steps, each an upper bound of ratio():
+    - positional filter: the overlap still possible given where in both
+      prefixes the shared tokens sit (PPJoin)
+    - the length window
+    - the exact quick_ratio() bound, from each text's character counts
+A text whose ratio() reaches the threshold is never dropped, so checking
+only the candidates gives exactly the verdicts of checking every stored text.
+
+The order puts rare tokens first, which keeps the lists the prefixes are
+filed under short: tokens are ranked by how many stored texts contain them,
+re-ranked (and every text re-filed) each time the number of stored texts
+doubles, so the rebuilds cost O(1) amortized per add(). Tokens first seen
+between rebuilds rank before all others, the latest first.
+
+This is not a sub-linear lookup on question text, and a batch is not
+sub-quadratic. Characters are few and common, so even the rarest tokens of
+a question are shared by many stored texts: on the benchmark bank (template
+questions and near copies) a lookup at 0.85 reads postings of about 80% of
+the stored texts, about two entries each, against one full count row per
+text for a scan. Lookups stay O(n), roughly 4x cheaper than the scan at 40k
+texts of random words. The 2-3% of texts that come out as candidates are
+exactly those passing quick_ratio(). Memory is O(prefix + distinct
+characters) per text.
+
+Args:
+    threshold: The ratio() threshold the prefixes are cut for
+"""
+class CharCountIndex:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        # Character counts of every text, flattened: text p's (column, count)
+        # pairs are entries _count_starts[p] to _count_starts[p + 1]
+        self._columns = {}
+        self._chars = []
+        self._count_columns = array('q')
+        self._count_values = array('q')
+        self._count_starts = array('q', [0])
+        self._lengths = array('q')
+        # Prefix order: token -> rank, and token -> (positions, indexes in
+        # their prefixes) of the texts filed under it, ascending
+        self._ranks = {}
+        self._next_rank = -1
+        self._postings = {}
+        self._empty = []
+        self._rebuild_size = _INITIAL_REBUILD_SIZE
+        self.size = 0
+
+    # Store text; returns its position (texts are numbered in insertion order)
+    def add(self, text):
+        position = self.size
+        counts = Counter(text)
+        for char, count in counts.items():
+            column = self._columns.get(char)
+            if column is None:
+                column = self._columns[char] = len(self._chars)
+                self._chars.append(char)
+            self._count_columns.append(column)
+            self._count_values.append(count)
+        self._count_starts.append(len(self._count_columns))
+        self._lengths.append(len(text))
+        self.size += 1
+
+        tokens = _tokens(counts)
+        for token in tokens:
+            if token not in self._ranks:
+                self._ranks[token] = self._next_rank
+                self._next_rank -= 1
+
+        if self.size == self._rebuild_size:
+            self._rebuild()
+            self._rebuild_size *= 2
+        else:
+            self._file(position, tokens)
+        return position
+
+    # Positions (ascending) of stored texts whose ratio() with text may reach the threshold
+    """
+    Args:
+        limit: Only consider the first limit stored texts (default: all)
+    """
+    def candidates(self, text, limit=None):
+        size = self.size if limit is None else min(limit, self.size)
+        threshold = self.threshold
+        if threshold <= 0:
+            return list(range(size))
+        if threshold > 1 or size == 0:
+            return []
+        if not text:
+            # Two empty texts are identical (ratio() 1.0); anything else scores 0
+            return [position for position in self._empty if position < size]
+
+        counts = Counter(text)
+        tokens = _tokens(counts)
+        hit_positions, hit_i, hit_j = [], [], []
+        for i, token in enumerate(self._prefix(tokens)):
+            posting = self._postings.get(token)
+            if posting is not None:
+                hit_positions.append(np.frombuffer(posting[0], dtype=np.int64))
+                hit_j.append(np.frombuffer(posting[1], dtype=np.int64))
+                hit_i.append(np.full(len(posting[0]), i, dtype=np.int64))
+        if not hit_positions:
+            return []
+
+        # Hits grouped by stored text, in query prefix order within a group
+        positions = np.concatenate(hit_positions)
+        order = np.argsort(positions, kind='stable')
+        positions = positions[order]
+        i = np.concatenate(hit_i)[order]
+        j = np.concatenate(hit_j)[order]
+        lengths = np.frombuffer(self._lengths, dtype=np.int64)[positions]
+        starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+
+        # Positional filter: at a text's k-th hit the two texts have shared
+        # exactly k tokens so far, and can share at most 1 + min(tokens left in
+        # either) more. Every hit's bound must reach the overlap the pair needs.
+        k = np.arange(len(positions)) - np.repeat(starts, np.diff(np.r_[starts, len(positions)]))
+        bound = k + 1 + np.minimum(len(tokens) - i - 1, lengths - j - 1)
+        reaches = bound >= threshold * (len(tokens) + lengths) / 2 - _EPSILON
+        keep = np.logical_and.reduceat(reaches, starts)
+
+        low = len(text) * threshold / (2 - threshold) - _EPSILON
+        high = len(text) * (2 - threshold) / threshold + _EPSILON
+        positions = positions[starts]
+        lengths = lengths[starts]
+        keep &= (positions < size) & (lengths >= low) & (lengths <= high)
+        positions = positions[keep]
+        if len(positions) == 0:
+            return []
+
+        # Same arithmetic as difflib's quick_ratio() (2.0 * matches / length)
+        shared = self._shared_counts(positions, counts)
+        bound = 2.0 * shared / (lengths[keep] + len(text))
+        return positions[bound >= threshold].tolist()
+
+    # Size of the multiset intersection of the query's counts with each stored text's
+    def _shared_counts(self, positions, counts):
+        query = np.zeros(len(self._chars), dtype=np.int64)
+        for char, count in counts.items():
+            column = self._columns.get(char)
+            if column is not None:
+                query[column] = count
+
+        count_starts = np.frombuffer(self._count_starts, dtype=np.int64)
+        begins = count_starts[positions]
+        sizes = count_starts[positions + 1] - begins
+        offsets = np.cumsum(sizes) - sizes
+        entries = np.repeat(begins - offsets, sizes) + np.arange(sizes.sum())
+        columns = np.frombuffer(self._count_columns, dtype=np.int64)[entries]
+        values = np.frombuffer(self._count_values, dtype=np.int64)[entries]
+        # Every text filed under a token has at least one count entry
+        return np.add.reduceat(np.minimum(values, query[columns]), offsets)
+
+    def _file(self, position, tokens):
+        if tokens:
+            for j, token in enumerate(self._prefix(tokens)):
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = (array('q'), array('q'))
+                posting[0].append(position)
+                posting[1].append(j)
+        else:
+            self._empty.append(position)
+
+    # Rank tokens by the number of stored texts containing them and re-file every text
+    def _rebuild(self):
+        all_tokens = []
+        for position in range(self.size):
+            begin, end = self._count_starts[position], self._count_starts[position + 1]
+            counts = {self._chars[column]: count for column, count in
+                      zip(self._count_columns[begin:end], self._count_values[begin:end])}
+            all_tokens.append(_tokens(counts))
+
+        frequency = Counter(token for tokens in all_tokens for token in tokens)
+        ranked = sorted(frequency, key=lambda token: (frequency[token], token))
+        self._ranks = {token: rank for rank, token in enumerate(ranked)}
+        self._next_rank = -1
+        self._postings = {}
+        self._empty = []
+        for position, tokens in enumerate(all_tokens):
+            self._file(position, tokens)
+
+    # First tokens in the index order, enough to meet any text in the length window
+    def _prefix(self, tokens):
+        # Fewest shared tokens any partner needs (at least one for a threshold above 0)
+        overlap = max(1, int(self.threshold * len(tokens) / (2 - self.threshold)))
+        ordered = sorted(tokens, key=lambda token: (self._ranks.get(token, _UNSEEN_RANK), token))
+        return ordered[:len(tokens) - overlap + 1]
+
+# A text's (char, k) tokens from its character counts: one per occurrence, k counting from 1
+def _tokens(counts):
+    return [(char, k) for char, count in counts.items() for k in range(1, count + 1)]
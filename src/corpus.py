@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+from src.knowledge_base import KnowledgeBase
+from src.utils import log_debug
+
+# Bump when the snapshot layout (or anything pickled inside it) changes
+CORPUS_FORMAT_VERSION = 3
+DEFAULT_CORPUS_PATH = "data/compiled/corpus.pkl"
+
+# Compiled corpus: one pickled KnowledgeBase snapshot for fast warm starts
+"""
+The artifact holds the parsed element files, the facts CSV indexes (numeric
+keys, n-gram matrices), the weighted template table and the element catalog.
+It is tagged with CORPUS_FORMAT_VERSION and a SHA-256 over every source it was
+built from, so a stale artifact is detected on load and rebuilt instead of
+being served.
+"""
+
+def get_corpus_path(config):
+    return config['data_paths'].get('corpus', DEFAULT_CORPUS_PATH)
+
+# Hash the sources a KnowledgeBase is built from
+"""
+Covers the element .txt files, the facts CSV and the config sections that
+shape the knowledge base (question_types, data_paths).
+"""
+def compute_source_hash(config):
+    digest = hashlib.sha256()
+    digest.update(f"format:{CORPUS_FORMAT_VERSION}\n".encode('utf-8'))
+
+    relevant_config = {
+        'question_types': config.get('question_types', {}),
+        'data_paths': config.get('data_paths', {})
+    }
+    digest.update(json.dumps(relevant_config, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+    sources = [config['data_paths']['facts_database']]
+    elements_dir = config['data_paths']['chemistry_files']
+    if os.path.isdir(elements_dir):
+        sources.extend(
+            os.path.join(elements_dir, name)
+            for name in sorted(os.listdir(elements_dir))
+            if name.endswith('.txt')
+        )
+
+    for path in sources:
+        digest.update(f"\nfile:{os.path.basename(path)}\n".encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+# Build the knowledge base from sources and write it as a compiled corpus
+"""
+Returns:
+    Tuple: (knowledge_base, corpus_path)
+"""
+def build_corpus(config, output_path=None):
+    output_path = output_path or get_corpus_path(config)
+    source_hash = compute_source_hash(config)
+    knowledge_base = KnowledgeBase(config)
+    write_corpus(knowledge_base, source_hash, output_path)
+    return knowledge_base, output_path
+
+def write_corpus(knowledge_base, source_hash, output_path):
+    snapshot = {
+        'format_version': CORPUS_FORMAT_VERSION,
+        'source_hash': source_hash,
+        'created': datetime.now().isoformat(),
+        'knowledge_base': knowledge_base
+    }
+
+    # Write to a temp file first so readers never see a partial artifact
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output_path)
+
+    log_debug("Compiled corpus written: %s (source hash %s)", output_path, source_hash[:12])
+
+# Load the compiled corpus, rebuilding it when missing or out of date
+"""
+Returns:
+    KnowledgeBase ready to share between requests. If the artifact cannot be
+    written (e.g. read-only checkout) the freshly built knowledge base is still
+    returned.
+"""
+def load_knowledge_base(config, corpus_path=None):
+    corpus_path = corpus_path or get_corpus_path(config)
+    source_hash = compute_source_hash(config)
+
+    snapshot = None
+    if os.path.exists(corpus_path):
+        try:
+            with open(corpus_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            log_debug("Could not read compiled corpus %s: %s", corpus_path, e, level='WARNING')
+
+    if (snapshot is not None
+            and snapshot.get('format_version') == CORPUS_FORMAT_VERSION
+            and snapshot.get('source_hash') == source_hash):
+        knowledge_base = snapshot['knowledge_base']
+        knowledge_base.config = config
+        log_debug("Loaded compiled corpus: %s", corpus_path)
+        return knowledge_base
+
+    log_debug("Compiled corpus missing or stale, rebuilding: %s", corpus_path)
+    knowledge_base = KnowledgeBase(config)
+    try:
+        write_corpus(knowledge_base, source_hash, corpus_path)
+    except OSError as e:
+        log_debug("Could not write compiled corpus %s: %s", corpus_path, e, level='WARNING')
+    return knowledge_base
@@ -0,0 +1,178 @@
+import os
+import signal
+import socket
+import socketserver
+import threading
+from src import serialization
+from src.io_handler import IOHandler
+from src.logger import correlation_context, new_correlation_id
+from src.response_cache import compute_config_hash
+from src.utils import log_debug
+
+DEFAULT_SETTINGS = {
+    'socket_path': "data/run/quizgen.sock",
+    'use_daemon': True,
+    'max_workers': 4,
+    'connect_timeout': 0.5,
+    'response_timeout': 30.0,
+    'max_request_bytes': 1048576
+}
+
+# Warm generator daemon behind a Unix domain socket, and its main.py client
+"""
+'python main.py daemon' loads the knowledge base once and answers requests
+on daemon.socket_path. A plain 'python main.py' run first tries to forward
+its request there, and generates in-process when no daemon answers, so the
+stdin/stdout contract is the same either way.
+
+Protocol: one connection per request, one JSON line each way.
+    client -> {"request": {...}, "config_hash": "..."}
+    daemon -> {"response": {...}}  the exact response main.py would print
+           or {"error": "..."}     the daemon could not answer (the client
+                                   then falls back to in-process generation)
+
+The config hash (see response_cache.compute_config_hash) makes the client
+ignore a daemon running with a different config.json (e.g. one edited since,
+until the daemon's source watcher has reloaded it).
+"""
+
+def get_daemon_settings(config):
+    return {**DEFAULT_SETTINGS, **config.get('daemon', {})}
+
+# The response main.py prints for one parsed request (success or error)
+def answer_request(request, config, knowledge_base):
+    from src.request_processor import process_generation_request
+
+    response, error_msg = process_generation_request(request, config, knowledge_base)
+    if response is None:
+        log_debug(error_msg, level='ERROR')
+        return IOHandler.create_error_response(error_msg, "Request validation failed")
+    return response
+
+# Forward one request to a running daemon
+"""
+Returns:
+    The response dict, or None when no daemon is running, it cannot be
+    reached, it runs with a different config, or it fails to answer (the
+    caller then generates in-process)
+"""
+def forward_request(request, config, socket_path=None):
+    settings = get_daemon_settings(config)
+    socket_path = socket_path or settings['socket_path']
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+
+    message = serialization.dumps_bytes({
+        'request': request,
+        'config_hash': compute_config_hash(config)
+    }) + b"\n"
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(settings['connect_timeout'])
+        sock.connect(socket_path)
+        sock.settimeout(settings['response_timeout'])
+        sock.sendall(message)
+        with sock.makefile('rb') as reply_file:
+            reply = serialization.loads(reply_file.readline())
+    except (OSError, ValueError) as e:
+        log_debug("Daemon at %s not usable (%s), generating in-process", socket_path, e, level='WARNING')
+        return None
+    finally:
+        sock.close()
+
+    if 'response' not in reply:
+        log_debug("Daemon could not answer (%s), generating in-process", reply.get('error'), level='WARNING')
+        return None
+    log_debug("Request answered by daemon at %s", socket_path)
+    return reply['response']
+
+# One client connection: read the request line, answer, close
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        line = self.rfile.readline(server.max_request_bytes + 1)
+        with correlation_context(new_correlation_id()):
+            reply = server.handle_message(line)
+        self.wfile.write(serialization.dumps_bytes(reply) + b"\n")
+
+# Threaded Unix socket server answering from the current sources snapshot
+# (a source_watcher.KnowledgeBaseHolder)
+class GenerationDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, sources, socket_path=None):
+        settings = get_daemon_settings(sources.get().config)
+        self.sources = sources
+        self.max_request_bytes = settings['max_request_bytes']
+        self.socket_path = socket_path or settings['socket_path']
+        # Connections beyond max_workers wait here (clients time out on their own)
+        self._slots = threading.BoundedSemaphore(settings['max_workers'])
+
+        _remove_stale_socket(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        super().__init__(self.socket_path, _RequestHandler)
+        os.chmod(self.socket_path, 0o600)
+
+    # Reply dict for one raw request line
+    def handle_message(self, line):
+        if len(line) > self.max_request_bytes:
+            return {'error': f"Request larger than {self.max_request_bytes} bytes"}
+        try:
+            message = serialization.loads(line)
+        except ValueError as e:
+            return {'error': f"Invalid message: {e}"}
+        if not isinstance(message, dict) or not isinstance(message.get('request'), dict):
+            return {'error': "Invalid message: expected {\"request\": {...}}"}
+        snapshot = self.sources.get()
+        if message.get('config_hash') != compute_config_hash(snapshot.config):
+            return {'error': "Config mismatch: daemon runs with a different config.json"}
+
+        with self._slots:
+            try:
+                return {'response': answer_request(message['request'], snapshot.config, snapshot.knowledge_base)}
+            except Exception as e:
+                log_debug("Daemon request failed: %s", e, level='ERROR')
+                return {'error': f"{type(e).__name__}: {e}"}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+# Remove a socket file left behind by a daemon that did not exit cleanly
+def _remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        log_debug("Removing stale daemon socket %s", socket_path, level='INFO')
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+# Serve until SIGINT/SIGTERM, then remove the socket
+def run_daemon(sources, socket_path=None):
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError("The daemon needs Unix domain sockets, which this platform does not support")
+
+    daemon = GenerationDaemon(sources, socket_path)
+
+    def stop(signum, frame):
+        log_debug("Daemon received signal %d, stopping", signum, level='INFO')
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    log_debug("Daemon listening on %s", daemon.socket_path, level='INFO')
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.server_close()
+    log_debug("Daemon stopped", level='INFO')
+    return daemon.socket_path
@@ -1,4 +1,5 @@
 from difflib import SequenceMatcher
+from src.char_count_index import CharCountIndex
 
 # Detects and removes duplicate/similar questions
 """
@@ -6,11 +7,21 @@ Args:
     similarity_threshold: 0.0: No duplication - 1.0: Definiately duplication.
                       Ex: 0.85 means 85% similar = considered duplicate.
     threshold current value: 0.85
+    use_index: If True, look up identical normalized text in a hash map and only
+               run SequenceMatcher on the questions CharCountIndex finds by
+               their rarest characters and length instead of scanning every
+               processed question. Verdicts, and the question reported as
+               the match, are the same as without the index.
 """
 class Deduplicator:  
-    def __init__(self, similarity_threshold=0.85):
+    def __init__(self, similarity_threshold=0.85, use_index=False):
         self.similarity_threshold = similarity_threshold
         self.processed_questions = []
+        self.use_index = use_index
+        
+        # Index mode: normalized text -> position, plus a candidate index by position
+        self._exact_index = {}
+        self._char_index = CharCountIndex(similarity_threshold) if use_index else None
     
     # Normalize text for comparison (lowercase)
     def _normalize_text(self, text):
@@ -29,12 +40,28 @@ class Deduplicator:
         matcher = SequenceMatcher(None, norm1, norm2)
         return matcher.ratio()
     
+    # Same verdict as _calculate_similarity() >= threshold, skipping ratio() when
+    # difflib's cheap upper bounds already rule the pair out
+    def _similarity_if_above_threshold(self, norm1, norm2):
+        matcher = SequenceMatcher(None, norm1, norm2)
+        if matcher.real_quick_ratio() < self.similarity_threshold:
+            return None
+        if matcher.quick_ratio() < self.similarity_threshold:
+            return None
+        similarity = matcher.ratio()
+        if similarity >= self.similarity_threshold:
+            return similarity
+        return None
+    
     # Check if new_question is duplicate of any processed question
     """
     Returns:
         Tuple: (is_duplicate, most_similar_question, similarity_score)
     """
     def is_duplicate(self, new_question):
+        if self.use_index:
+            return self._is_duplicate_indexed(new_question)
+        
         for existing_q in self.processed_questions:
             similarity = self._calculate_similarity(new_question, existing_q)
             if similarity >= self.similarity_threshold:
@@ -42,8 +69,34 @@ class Deduplicator:
         
         return False, None, 0.0
     
+    def _is_duplicate_indexed(self, new_question):
+        norm_new = self._normalize_text(new_question)
+        
+        # Identical normalized text: only earlier questions could be reported instead
+        exact_position = self._exact_index.get(norm_new)
+        
+        # Full similarity only on the index's candidates, in insertion order
+        # (the linear scan reports the first match)
+        for position in self._char_index.candidates(norm_new, limit=exact_position):
+            existing_q = self.processed_questions[position]
+            similarity = self._similarity_if_above_threshold(
+                norm_new, self._normalize_text(existing_q)
+            )
+            if similarity is not None:
+                return True, existing_q, similarity
+        
+        if exact_position is not None:
+            return True, self.processed_questions[exact_position], 1.0
+        return False, None, 0.0
+    
     def add_question(self, question_text):
+        position = len(self.processed_questions)
         self.processed_questions.append(question_text)
+        
+        if self.use_index:
+            norm_text = self._normalize_text(question_text)
+            self._exact_index.setdefault(norm_text, position)
+            self._char_index.add(norm_text)
     
     # Find duplicates within a batch of questions
     """
@@ -51,6 +104,9 @@ class Deduplicator:
         List of tuples: (question_index, duplicate_index, similarity_score)
     """
     def get_duplicates_in_batch(self, questions_list):
+        if self.use_index:
+            return self._get_duplicates_in_batch_indexed(questions_list)
+        
         duplicates = []
         for i, q1 in enumerate(questions_list):
             for j, q2 in enumerate(questions_list):
@@ -61,6 +117,22 @@ class Deduplicator:
         
         return duplicates
     
+    def _get_duplicates_in_batch_indexed(self, questions_list):
+        duplicates = []
+        batch_index = CharCountIndex(self.similarity_threshold)
+        normalized = [self._normalize_text(q) for q in questions_list]
+        
+        for j, norm_j in enumerate(normalized):
+            for i in batch_index.candidates(norm_j):
+                similarity = self._similarity_if_above_threshold(normalized[i], norm_j)
+                if similarity is not None:
+                    duplicates.append((i, j, similarity))
+            batch_index.add(norm_j)
+        
+        # Same ordering as the pairwise scan
+        duplicates.sort(key=lambda d: (d[0], d[1]))
+        return duplicates
+    
     # Remove duplicates from a batch, keeping first occurrence
     def filter_duplicates_in_batch(self, questions_with_metadata):
         filtered = []
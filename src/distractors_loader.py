@@ -1,61 +1,240 @@
-import pandas as pd
+import csv
+import numpy as np
 import random
 import difflib
+from functools import lru_cache
+from src.similarity_index import NgramIndex
 from src.utils import log_debug, is_pure_numeric
 
-class DistractorsLoader:
-    def __init__(self, csv_path):
-        self.df = pd.read_csv(csv_path, encoding='utf-8')
-        self.column_names = list(self.df.columns)
-        log_debug(f"Loaded facts database with {len(self.df)} rows and columns: {self.column_names}")
-
-    def get_distractors(self, correct_answer, category, count=3):
-        if category not in self.column_names:
-            log_debug(f"WARNING: Category '{category}' not found in facts database")
-            return []
+# How many n-gram candidates are re-ranked with difflib for string answers
+STRING_SHORTLIST_SIZE = 32
+# Memoized (category, normalized answer) rankings kept per loader
+STRING_RANKING_CACHE_SIZE = 4096
+
+# Cell values read_csv() treats as missing (pandas' default NA strings)
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Read the facts CSV column by column with the csv module (no pandas import)
+"""
+Produces what pandas.read_csv(...)[column].dropna().unique().tolist() gave:
+    - duplicated headers are renamed "name.1", "name.2", ...
+    - missing cells (NA_VALUES) are dropped
+    - a column whose cells all parse as int becomes ints (floats if it also
+      has missing cells), one whose cells all parse as float becomes floats,
+      anything else stays as strings
+    - values are deduplicated in first-seen order
+
+Returns:
+    Tuple: (row_count, column_names, {column: [values]})
+"""
+def read_csv_columns(csv_path):
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        column_names = _dedupe_column_names(header)
+        cells = [[] for _ in column_names]
+        row_count = 0
+        for row in reader:
+            if not row:
+                continue
+            row_count += 1
+            for i, column in enumerate(cells):
+                column.append(row[i] if i < len(row) else '')
+
+    columns = {
+        name: _convert_column(column_cells)
+        for name, column_cells in zip(column_names, cells)
+    }
+    return row_count, column_names, columns
+
+def _dedupe_column_names(header):
+    seen = {}
+    names = []
+    for name in header:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(f"{name}.{count}" if count else name)
+    return names
+
+def _convert_column(cells):
+    present = [cell for cell in cells if cell not in NA_VALUES]
+    has_missing = len(present) < len(cells)
+
+    for convert in (int, float):
+        try:
+            converted = [convert(cell) for cell in present]
+        except ValueError:
+            continue
+        if convert is int and has_missing:
+            converted = [float(value) for value in converted]
+        return list(dict.fromkeys(converted))
+
+    return list(dict.fromkeys(present))
 
-        all_values = self.df[category].dropna().unique().tolist()
-        candidates = []
-        
-        # Helper to normalize for comparison
-        def normalize_for_comparison(val):
-            if is_pure_numeric(val):
+# Helper to normalize for comparison
+def normalize_for_comparison(val):
+    if is_pure_numeric(val):
+        try:
+            f = float(str(val).replace(',', '.'))
+            if f.is_integer():
+                return str(int(f))
+            return str(f)
+        except:
+            pass
+    return str(val).strip().lower()
+
+# Precomputed lookup data for one CSV column
+"""
+Built once per column when the facts database is loaded:
+    values: Deduplicated non-null values, in CSV order
+    normalized: normalize_for_comparison() of each value
+    numeric_keys: Sorted NumPy array of the parsed numeric values
+    numeric_positions: Index into `values` for each entry of numeric_keys
+    positions_by_normalized: normalized value -> positions in `values`
+    ngrams: Character n-gram TF-IDF index over `values`
+"""
+class CategoryIndex:
+    def __init__(self, values):
+        self.values = tuple(values)
+        self.normalized = tuple(normalize_for_comparison(v) for v in self.values)
+
+        positions_by_normalized = {}
+        for position, norm in enumerate(self.normalized):
+            positions_by_normalized.setdefault(norm, []).append(position)
+        self.positions_by_normalized = {k: tuple(v) for k, v in positions_by_normalized.items()}
+
+        numeric = []
+        for position, v in enumerate(self.values):
+            if is_pure_numeric(v):
                 try:
-                    f = float(str(val).replace(',', '.'))
-                    if f.is_integer():
-                        return str(int(f))
-                    return str(f)
-                except:
-                    pass
-            return str(val).strip().lower()
+                    numeric.append((float(str(v).replace(',', '.')), position))
+                except ValueError:
+                    continue
+        numeric.sort()
+
+        self.numeric_keys = np.array([key for key, _ in numeric], dtype=float)
+        self.numeric_positions = tuple(position for _, position in numeric)
+
+        self.ngrams = NgramIndex(self.values)
+
+    # All values whose normalized form differs from the target
+    def candidates_excluding(self, norm_target):
+        return [v for v, norm in zip(self.values, self.normalized) if norm != norm_target]
+
+    # Nearest numeric values to target, found from a searchsorted window
+    """
+    Walks outwards from the insertion point of target_val, so the cost is
+    O(log N + count) instead of sorting every candidate by distance.
+    Ties keep CSV order, matching the previous stable sort.
+    """
+    def nearest_numeric(self, target_val, norm_target, count):
+        keys = self.numeric_keys
+        positions = self.numeric_positions
+        right = int(np.searchsorted(keys, target_val))
+        left = right - 1
+
+        selected = []
+        while len(selected) < count and (left >= 0 or right < len(keys)):
+            if right >= len(keys):
+                take_left = True
+            elif left < 0:
+                take_left = False
+            else:
+                left_diff = target_val - keys[left]
+                right_diff = keys[right] - target_val
+                if left_diff == right_diff:
+                    take_left = positions[left] < positions[right]
+                else:
+                    take_left = left_diff < right_diff
+
+            if take_left:
+                position = positions[left]
+                left -= 1
+            else:
+                position = positions[right]
+                right += 1
+
+            if self.normalized[position] != norm_target:
+                selected.append(self.values[position])
+
+        return selected
+
+class DistractorsLoader:
+    # previous: an older loader of the same CSV (hot reload); indexes of
+    # columns whose values did not change are reused instead of rebuilt
+    def __init__(self, csv_path, previous=None):
+        self.row_count, self.column_names, columns = read_csv_columns(csv_path)
+        self.indexes = {}
+        reused = 0
+        for column in self.column_names:
+            index = previous.indexes.get(column) if previous is not None else None
+            if index is not None and index.values == tuple(columns[column]):
+                reused += 1
+            else:
+                index = CategoryIndex(columns[column])
+            self.indexes[column] = index
+        if previous is not None:
+            log_debug("Rebuilt %d of %d facts columns", len(self.column_names) - reused, len(self.column_names))
+        self._ranked_string_positions = lru_cache(maxsize=STRING_RANKING_CACHE_SIZE)(
+            self._rank_string_positions
+        )
+        log_debug("Loaded facts database with %d rows and columns: %s", self.row_count, self.column_names)
+
+    # Pickle support for compiled corpora
+    # The memo cache is not stored; it is recreated empty.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_ranked_string_positions', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._ranked_string_positions = lru_cache(maxsize=STRING_RANKING_CACHE_SIZE)(
+            self._rank_string_positions
+        )
+
+    def get_distractors(self, correct_answer, category, count=3, rng=random):
+        index = self.indexes.get(category)
+        if index is None:
+            log_debug("Category '%s' not found in facts database", category, level='WARNING')
+            return []
 
         norm_target = normalize_for_comparison(correct_answer)
-        
-        for v in all_values:
-            norm_val = normalize_for_comparison(v)
-            if norm_val != norm_target:
-                candidates.append(v)
+        candidates = None
 
         selected_distractors = []
         is_numeric_mode = is_pure_numeric(correct_answer)
-        
+
         if is_numeric_mode:
-            selected_distractors = self._get_numeric_distractors(correct_answer, candidates, count)
+            try:
+                target_val = float(str(correct_answer).replace(',', '.'))
+                selected_distractors = index.nearest_numeric(target_val, norm_target, count)
+            except Exception as e:
+                log_debug("Error in numeric distractor logic: %s", e, level='ERROR')
+                candidates = index.candidates_excluding(norm_target)
+                selected_distractors = rng.sample(candidates, min(len(candidates), count))
         else:
-            selected_distractors = self._get_string_distractors(correct_answer, candidates, count)
-            
+            limit = max(count, STRING_SHORTLIST_SIZE)
+            ranked = self._ranked_string_positions(category, norm_target, limit)
+            selected_distractors = [index.values[pos] for pos in ranked[:count]]
+
         # Fallback
         if len(selected_distractors) < count:
-            log_debug(f"WARNING: Only {len(candidates)} distractors available for {category}")
+            if candidates is None:
+                candidates = index.candidates_excluding(norm_target)
+            log_debug("Only %d distractors available for %s", len(candidates), category, level='WARNING')
             remaining = [c for c in candidates if c not in selected_distractors]
             needed = count - len(selected_distractors)
             if len(remaining) >= needed:
-                selected_distractors.extend(random.sample(remaining, needed))
-        
+                selected_distractors.extend(rng.sample(remaining, needed))
+
         if is_numeric_mode:
             selected_distractors = [self._format_if_integer(x) for x in selected_distractors]
-            
-        random.shuffle(selected_distractors)
+
+        rng.shuffle(selected_distractors)
         return selected_distractors
 
     def _format_if_integer(self, val):
@@ -68,39 +247,35 @@ class DistractorsLoader:
         except:
             return str(val)
 
-    def _get_numeric_distractors(self, target, candidates, count):
-        try:
-            target_val = float(str(target).replace(',', '.'))
-            candidate_diffs = []
-            for c in candidates:
-                if is_pure_numeric(c):
-                    c_val = float(str(c).replace(',', '.'))
-                    diff = abs(target_val - c_val)
-                    candidate_diffs.append((c, diff))
-            
-            candidate_diffs.sort(key=lambda x: x[1])
-            
-            return [item[0] for item in candidate_diffs[:count]]
-            
-        except Exception as e:
-            log_debug(f"Error in numeric distractor logic: {e}")
-            return random.sample(candidates, min(len(candidates), count))
-
-    def _get_string_distractors(self, target, candidates, count):
-        target_str = str(target).lower()
-        candidate_scores = []
-        for c in candidates:
-            c_str = str(c).lower()
-            score = difflib.SequenceMatcher(None, target_str, c_str).ratio()
-            candidate_scores.append((c, score))
-        
-        candidate_scores.sort(key=lambda x: x[1], reverse=True)
-        return [item[0] for item in candidate_scores[:count]]
-    
+    # Rank string distractors for one (category, normalized answer)
+    """
+    The n-gram index shortlists the most similar values with one vectorized
+    product; only that shortlist is re-scored with difflib, so the final order
+    stays comparable to a full SequenceMatcher ranking.
+
+    Returns:
+        Tuple of positions into the category's values, most similar first
+    """
+    def _rank_string_positions(self, category, norm_target, limit):
+        index = self.indexes[category]
+        excluded = index.positions_by_normalized.get(norm_target, ())
+        shortlist = index.ngrams.top_k(norm_target, limit, exclude=excluded)
+
+        scored = []
+        for position in shortlist:
+            c_str = str(index.values[position]).lower()
+            score = difflib.SequenceMatcher(None, norm_target, c_str).ratio()
+            scored.append((-score, position))
+
+        scored.sort()
+        return tuple(position for _, position in scored)
+
+    # Deduplicated values of a column (precomputed, do not modify)
     def get_all_values_for_category(self, category):
-        if category not in self.column_names:
-            return []
-        return self.df[category].dropna().unique().tolist()
-        
+        index = self.indexes.get(category)
+        if index is None:
+            return ()
+        return index.values
+
     def get_categories(self):
         return self.column_names
@@ -0,0 +1,213 @@
+import csv
+import os
+import re
+import unicodedata
+import numpy as np
+from src.similarity_index import NgramIndex
+from src.utils import log_debug
+
+# Fuzzy matches are only ever offered as suggestions, from this similarity up
+SUGGEST_SIMILARITY = 0.35
+MAX_SUGGESTIONS = 5
+
+# Element English name -> chemical symbol
+# The facts CSV has a 'Kí hiệu' column, but like its other fact columns it is
+# a pool of distractor values: its rows do not line up with the name columns.
+ELEMENT_SYMBOLS = {
+    'hydrogen': 'H', 'helium': 'He', 'lithium': 'Li', 'beryllium': 'Be', 'boron': 'B',
+    'carbon': 'C', 'nitrogen': 'N', 'oxygen': 'O', 'fluorine': 'F', 'neon': 'Ne',
+    'sodium': 'Na', 'magnesium': 'Mg', 'aluminium': 'Al', 'aluminum': 'Al', 'silicon': 'Si',
+    'phosphorus': 'P', 'sulfur': 'S', 'sulphur': 'S', 'chlorine': 'Cl', 'argon': 'Ar',
+    'potassium': 'K', 'calcium': 'Ca', 'scandium': 'Sc', 'titanium': 'Ti', 'vanadium': 'V',
+    'chromium': 'Cr', 'manganese': 'Mn', 'iron': 'Fe', 'cobalt': 'Co', 'nickel': 'Ni',
+    'copper': 'Cu', 'zinc': 'Zn', 'gallium': 'Ga', 'germanium': 'Ge', 'arsenic': 'As',
+    'selenium': 'Se', 'bromine': 'Br', 'krypton': 'Kr', 'rubidium': 'Rb', 'strontium': 'Sr',
+    'yttrium': 'Y', 'zirconium': 'Zr', 'niobium': 'Nb', 'molybdenum': 'Mo', 'technetium': 'Tc',
+    'ruthenium': 'Ru', 'rhodium': 'Rh', 'palladium': 'Pd', 'silver': 'Ag', 'cadmium': 'Cd',
+    'indium': 'In', 'tin': 'Sn', 'antimony': 'Sb', 'tellurium': 'Te', 'iodine': 'I',
+    'xenon': 'Xe', 'caesium': 'Cs', 'cesium': 'Cs', 'barium': 'Ba', 'lanthanum': 'La',
+    'cerium': 'Ce', 'praseodymium': 'Pr', 'neodymium': 'Nd', 'promethium': 'Pm', 'samarium': 'Sm',
+    'europium': 'Eu', 'gadolinium': 'Gd', 'terbium': 'Tb', 'dysprosium': 'Dy', 'holmium': 'Ho',
+    'erbium': 'Er', 'thulium': 'Tm', 'ytterbium': 'Yb', 'lutetium': 'Lu', 'hafnium': 'Hf',
+    'tantalum': 'Ta', 'tungsten': 'W', 'rhenium': 'Re', 'osmium': 'Os', 'iridium': 'Ir',
+    'platinum': 'Pt', 'gold': 'Au', 'mercury': 'Hg', 'thallium': 'Tl', 'lead': 'Pb',
+    'bismuth': 'Bi', 'polonium': 'Po', 'astatine': 'At', 'radon': 'Rn', 'francium': 'Fr',
+    'radium': 'Ra', 'actinium': 'Ac', 'thorium': 'Th', 'protactinium': 'Pa', 'uranium': 'U',
+    'neptunium': 'Np', 'plutonium': 'Pu', 'americium': 'Am', 'curium': 'Cm', 'berkelium': 'Bk',
+    'californium': 'Cf', 'einsteinium': 'Es', 'fermium': 'Fm', 'mendelevium': 'Md', 'nobelium': 'No',
+    'lawrencium': 'Lr', 'rutherfordium': 'Rf', 'dubnium': 'Db', 'seaborgium': 'Sg', 'bohrium': 'Bh',
+    'hassium': 'Hs', 'meitnerium': 'Mt', 'darmstadtium': 'Ds', 'roentgenium': 'Rg', 'copernicium': 'Cn',
+    'nihonium': 'Nh', 'flerovium': 'Fl', 'moscovium': 'Mc', 'livermorium': 'Lv', 'tennessine': 'Ts',
+    'oganesson': 'Og'
+}
+
+KNOWN_SYMBOLS = frozenset(ELEMENT_SYMBOLS.values())
+
+# Misspelled English names still map to a symbol above this similarity
+SYMBOL_MATCH_SIMILARITY = 0.6
+
+_PARENTHESIZED = re.compile(r'\(([^)]*)\)')
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+# Lookup form of a name: no accents (đ -> d), lowercase, words separated by one space
+def normalize_name(text):
+    decomposed = unicodedata.normalize('NFD', str(text).replace('đ', 'd').replace('Đ', 'D'))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', stripped.lower()).strip()
+
+# Name -> element lookup over the preloaded element files
+"""
+Every preloaded element becomes one entry:
+    - element_file: File name relative to data_paths.chemistry_files
+    - path: Resolved path, as request validation returns it
+    - symbol: Chemical symbol (from a "Name_Symbol.txt" file name, else from
+      the English name, misspellings included), or None
+    - vietnamese_name, english_name: From the element file headers
+    - aliases: Other names (Latin names in parentheses, names paired with the
+      element in the facts CSV name columns)
+    - templates: Number of answerable templates
+
+resolve() matches file name, file stem, symbol and every name exactly after
+normalize_name(); a trigram index over the names backs search() and the
+"did you mean" suggestions for typos. Lookups do not touch the filesystem. Built with each KnowledgeBase (and stored in the
+compiled corpus with it); read-only afterwards.
+"""
+class ElementCatalog:
+    def __init__(self, knowledge_base):
+        config = knowledge_base.config
+        elements_dir = config['data_paths']['chemistry_files']
+        abs_elements_dir = os.path.normcase(os.path.abspath(elements_dir))
+        csv_names = _read_csv_name_pairs(config['data_paths']['facts_database'])
+        symbol_index = _SymbolIndex()
+
+        self.entries = []
+        for key in sorted(knowledge_base.elements):
+            extracted = knowledge_base.elements[key]
+            element_file = os.path.relpath(key, abs_elements_dir)
+            english_name = extracted['english_name'] or ''
+            self.entries.append({
+                'element_file': element_file,
+                'path': os.path.join(elements_dir, element_file),
+                'symbol': _file_symbol(element_file) or symbol_index.lookup(english_name),
+                'vietnamese_name': extracted['vietnamese_name'],
+                'english_name': extracted['english_name'],
+                'aliases': _aliases(extracted['vietnamese_name'], english_name, csv_names),
+                'templates': len(knowledge_base.plans[key])
+            })
+
+        # Earlier passes win when two entries share a key (e.g. a file stem
+        # that is also another element's symbol)
+        self._exact = {}
+        for entry_keys in (
+            lambda e: [e['element_file'], os.path.splitext(e['element_file'])[0]],
+            lambda e: [e['symbol']] if e['symbol'] else [],
+            lambda e: [e['vietnamese_name'], e['english_name'], _PARENTHESIZED.sub(' ', e['english_name'] or '')],
+            lambda e: e['aliases']
+        ):
+            for position, entry in enumerate(self.entries):
+                for name in entry_keys(entry):
+                    self._exact.setdefault(normalize_name(name), position)
+        self._exact.pop('', None)
+
+        # Symbols are too short for trigrams; only names and file stems are fuzzy-matched
+        self._fuzzy_names = []
+        self._fuzzy_positions = []
+        for name, position in self._exact.items():
+            if len(name) > 2:
+                self._fuzzy_names.append(name)
+                self._fuzzy_positions.append(position)
+        self._fuzzy_index = NgramIndex(self._fuzzy_names, ngram_sizes=(3,))
+
+        log_debug("Element catalog ready: %d elements, %d lookup names", len(self.entries), len(self._exact))
+
+    # Entry whose file name, symbol or element name is exactly name (after normalize_name()), or None
+    """
+    Never a fuzzy match: a near miss is a different element as often as it is
+    a typo ("Terbi" / "Erbi"), so those are left to suggest().
+    """
+    def resolve(self, name):
+        position = self._exact.get(normalize_name(name))
+        return self.entries[position] if position is not None else None
+
+    # Fuzzy matches as [(entry, similarity), ...], best first, one per element
+    def search(self, query, limit=None):
+        limit = limit or MAX_SUGGESTIONS
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        position = self._exact.get(normalized)
+        if position is not None and len(normalized) <= 2:
+            return [(self.entries[position], 1.0)]
+
+        scores = self._fuzzy_index.scores(normalized)
+        best = {}
+        for name_id in np.argsort(-scores, kind='stable'):
+            score = float(scores[name_id])
+            if score < SUGGEST_SIMILARITY:
+                break
+            position = self._fuzzy_positions[name_id]
+            if position not in best:
+                best[position] = score
+                if len(best) >= limit:
+                    break
+        return [(self.entries[position], round(score, 3)) for position, score in best.items()]
+
+    # Display names of the closest elements, for "not found" messages
+    def suggest(self, name):
+        return [entry['element_file'] for entry, _ in self.search(name)]
+
+# English name -> symbol, tolerating misspellings ("Gadonlinium")
+class _SymbolIndex:
+    def __init__(self):
+        self.names = list(ELEMENT_SYMBOLS)
+        self.index = NgramIndex(self.names, ngram_sizes=(3,))
+
+    def lookup(self, english_name):
+        base = normalize_name(_PARENTHESIZED.sub(' ', english_name))
+        if not base:
+            return None
+        if base in ELEMENT_SYMBOLS:
+            return ELEMENT_SYMBOLS[base]
+        scores = self.index.scores(base)
+        best = int(scores.argmax())
+        if scores[best] >= SYMBOL_MATCH_SIMILARITY:
+            return ELEMENT_SYMBOLS[self.names[best]]
+        return None
+
+# Symbol written in a "Name_Symbol.txt" file name
+def _file_symbol(element_file):
+    stem = os.path.splitext(os.path.basename(element_file))[0]
+    if '_' not in stem:
+        return None
+    suffix = stem.rsplit('_', 1)[1]
+    return suffix if suffix in KNOWN_SYMBOLS else None
+
+def _aliases(vietnamese_name, english_name, csv_names):
+    own = {normalize_name(vietnamese_name), normalize_name(english_name)}
+    aliases = [name.strip() for name in _PARENTHESIZED.findall(english_name) if name.strip()]
+    for name in own:
+        aliases.extend(csv_names.get(name, ()))
+    return list(dict.fromkeys(a for a in aliases if normalize_name(a) not in own))
+
+# Facts CSV name columns (these two do line up row by row)
+"""
+Returns:
+    Dict: normalized Vietnamese or English name -> [Vietnamese name, English name]
+    of every row it appears in
+"""
+def _read_csv_name_pairs(csv_path):
+    try:
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    except OSError as e:
+        log_debug("Could not read element names from %s: %s", csv_path, e, level='WARNING')
+        return {}
+
+    names = {}
+    for row in rows:
+        pair = [(row.get('Tên tiếng Việt') or '').strip(), (row.get('Tên tiếng Anh') or '').strip()]
+        if not all(pair):
+            continue
+        for name in pair:
+            names.setdefault(normalize_name(name), []).extend(pair)
+    return names
@@ -1,66 +1,59 @@
+import os
 import re
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
 from src.utils import extract_number, round_number, log_debug, is_pure_numeric
 
+# Pattern: Key: Value
+FACT_PATTERN = re.compile(r'^[\s\-]*([^:]+):\s*(.+)$')
+SECTION_PREFIXES = ('I.', 'II.', 'III.', 'IV.', 'V.')
+
+# Parsed files kept in memory, keyed by (path, mtime, size)
+PARSE_CACHE_SIZE = 256
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
 class FactExtractor:
     def __init__(self):
         self.vietnamese_name = None
         self.english_name = None
         self.facts = {}
-    
+
+    # Parse an element file
+    """
+    Results are cached per (path, mtime, size), so repeat calls for an
+    unchanged file skip I/O and parsing. The returned dict (and its 'facts')
+    is read-only and shared between callers; multi-valued facts are tuples.
+    """
     def extract_from_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        self._extract_names(content)
-        
-        self._extract_structured_facts(content)
-        log_debug(f"Extracted {len(self.facts)} structured facts")
-        
-        return {
-            'vietnamese_name': self.vietnamese_name,
-            'english_name': self.english_name,
-            'facts': self.facts
-        }
-    
-    def _extract_names(self, content):
-        lines = content.split('\n')
-        for line in lines[:5]:
-            if "Tên tiếng Anh:" in line:
-                self.english_name = line.split(":")[-1].strip()
-            elif "Tên tiếng Việt:" in line:
-                self.vietnamese_name = line.split(":")[-1].strip()
-    
-    def _extract_structured_facts(self, content):
-        # Pattern: Key: Value
-        pattern = r'^[\s\-]*([^:]+):\s*(.+)$'
-        
-        for line in content.split('\n'):
-            if not line.strip() or line.startswith('I.') or line.startswith('II.') or line.startswith('III.') or line.startswith('IV.') or line.startswith('V.'):
-                continue
-            
-            match = re.match(pattern, line.strip())
-            if match:
-                key = match.group(1).strip()
-                raw_value = match.group(2).strip()
-                
-                if "Tên tiếng Việt" in key:
-                    continue
-                
-                value = raw_value
-                if is_pure_numeric(raw_value):
-                    num = extract_number(raw_value)
-                    if num is not None:
-                        value = round_number(num)
-                
-                if key in self.facts:
-                    existing = self.facts[key]
-                    if isinstance(existing, list):
-                        self.facts[key].append(value)
-                    else:
-                        self.facts[key] = [existing, value]
-                else:
-                    self.facts[key] = value
-    
+        stat = os.stat(file_path)
+        cache_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+        with _parse_cache_lock:
+            extracted = _parse_cache.get(cache_key)
+            if extracted is not None:
+                _parse_cache.move_to_end(cache_key)
+
+        if extracted is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            extracted = freeze_extracted(parse_content(content))
+            log_debug("Extracted %d structured facts", len(extracted['facts']))
+
+            with _parse_cache_lock:
+                _parse_cache[cache_key] = extracted
+                _parse_cache.move_to_end(cache_key)
+                while len(_parse_cache) > PARSE_CACHE_SIZE:
+                    _parse_cache.popitem(last=False)
+
+        # Reset per-file state so one instance never merges facts across files
+        self.vietnamese_name = extracted['vietnamese_name']
+        self.english_name = extracted['english_name']
+        self.facts = extracted['facts']
+
+        return extracted
+
     # Retrieve a specific fact
     """
     Args:
@@ -70,6 +63,79 @@ class FactExtractor:
     def get_fact(self, key, rounded=False):
         lookup_key = f"{key}_rounded" if rounded else key
         return self.facts.get(lookup_key, None)
-    
+
     def get_all_facts(self):
         return self.facts
+
+# Single-pass parser for the content of an element file
+"""
+Returns:
+    Dict with 'vietnamese_name', 'english_name' (from the first 5 lines) and
+    'facts' (Key: Value lines; repeated keys collect their values in a list)
+"""
+def parse_content(content):
+    vietnamese_name = None
+    english_name = None
+    facts = {}
+
+    # Some files start with a UTF-8 BOM, which would otherwise end up in the first key
+    content = content.lstrip('\ufeff')
+
+    for line_number, line in enumerate(content.split('\n')):
+        if line_number < 5:
+            if "Tên tiếng Anh:" in line:
+                english_name = line.split(":")[-1].strip()
+            elif "Tên tiếng Việt:" in line:
+                vietnamese_name = line.split(":")[-1].strip()
+
+        stripped = line.strip()
+        if not stripped or line.startswith(SECTION_PREFIXES):
+            continue
+
+        match = FACT_PATTERN.match(stripped)
+        if not match:
+            continue
+
+        key = match.group(1).strip()
+        raw_value = match.group(2).strip()
+
+        if "Tên tiếng Việt" in key:
+            continue
+
+        value = raw_value
+        if is_pure_numeric(raw_value):
+            num = extract_number(raw_value)
+            if num is not None:
+                value = round_number(num)
+
+        if key in facts:
+            existing = facts[key]
+            if isinstance(existing, list):
+                existing.append(value)
+            else:
+                facts[key] = [existing, value]
+        else:
+            facts[key] = value
+
+    return {
+        'vietnamese_name': vietnamese_name,
+        'english_name': english_name,
+        'facts': facts
+    }
+
+# Make a parse result read-only so it can be shared across requests
+def freeze_extracted(extracted):
+    facts = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in extracted['facts'].items()
+    }
+    return MappingProxyType({
+        'vietnamese_name': extracted['vietnamese_name'],
+        'english_name': extracted['english_name'],
+        'facts': MappingProxyType(facts)
+    })
+
+# Drop all cached parse results
+def clear_parse_cache():
+    with _parse_cache_lock:
+        _parse_cache.clear()
@@ -1,11 +1,11 @@
-import json
 import os
+from src import serialization
 from src.utils import log_debug
 
 # Handles JSON input/output and validation
 class IOHandler:
     
-    # Parse JSON input
+    # Parse JSON input (stdin requests and --batch lines; orjson when installed)
     """
     Returns:
         Tuple: (parsed_dict, error_message)
@@ -13,11 +13,11 @@ class IOHandler:
     @staticmethod
     def read_json_input(input_text):
         try:
-            data = json.loads(input_text)
+            data = serialization.loads(input_text)
             return data, None
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             error = f"Invalid JSON: {str(e)}"
-            log_debug(f"ERROR: {error}")
+            log_debug("Invalid JSON: %s", e, level='ERROR')
             return None, error
     
     # Validate question generation request
@@ -25,12 +25,15 @@ class IOHandler:
     Args:
         request: The JSON request dict
         base_path: Optional base directory to look for element files (e.g. from config)
+        catalog: Optional ElementCatalog; an 'element_file' that is no file
+                 may then also be an element's exact file name, symbol or
+                 name, and near misses are suggested in the error
     Returns:
         Tuple: (is_valid, error_message, full_path)
         - full_path is the resolved path if valid, or None if invalid
     """
     @staticmethod
-    def validate_generation_request(request, base_path=None):
+    def validate_generation_request(request, base_path=None, catalog=None):
         if not isinstance(request, dict):
             return False, "Request must be a JSON object", None
         
@@ -46,20 +49,28 @@ class IOHandler:
         if not isinstance(element_file, str):
             return False, "'element_file' must be a string", None
         
+        # A path that exists is taken as is; only a bare name that is no file
+        # is looked up in the catalog, and only exact matches are accepted
         full_path = element_file
-        
         if base_path and not os.path.exists(full_path):
             joined_path = os.path.join(base_path, element_file)
             if os.path.exists(joined_path):
                 full_path = joined_path
-                
-        # Final check
+        
         if not os.path.exists(full_path):
-            # Provide helpful error message showing where we looked
-            msg = f"Element file not found: {element_file}"
-            if base_path:
-                msg += f" (Checked in: {base_path})"
-            return False, msg, None
+            is_bare_name = os.path.basename(element_file) == element_file
+            entry = catalog.resolve(element_file) if catalog is not None and is_bare_name else None
+            if entry is not None:
+                full_path = entry['path']
+            else:
+                # Provide helpful error message showing where we looked
+                msg = f"Element file not found: {element_file}"
+                if base_path:
+                    msg += f" (Checked in: {base_path})"
+                suggestions = catalog.suggest(element_file) if catalog is not None else []
+                if suggestions:
+                    msg += f". Did you mean: {', '.join(suggestions)}?"
+                return False, msg, None
         
         # Validate number_of_questions
         try:
@@ -71,17 +82,99 @@ class IOHandler:
         except (ValueError, TypeError):
             return False, "'number_of_questions' must be an integer", None
         
+        # Validate optional seed (reproducible output)
+        seed = request.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return False, "'seed' must be an integer", None
+        
+        error = IOHandler.validate_history_ids(request)
+        if error:
+            return False, error, None
+        
         return True, None, full_path
     
+    # Validate quiz assembly request (see quiz_assembler.assemble_quiz)
+    """
+    Args:
+        request: The JSON request dict
+        max_questions: Upper bound for 'total_questions'
+    Returns:
+        Tuple: (is_valid, error_message)
+    """
+    @staticmethod
+    def validate_quiz_request(request, max_questions=500):
+        if not isinstance(request, dict):
+            return False, "Request must be a JSON object"
+        
+        if 'total_questions' not in request:
+            return False, "Missing required field: 'total_questions'"
+        
+        total = request['total_questions']
+        if isinstance(total, bool) or not isinstance(total, int):
+            return False, "'total_questions' must be an integer"
+        if total < 1:
+            return False, "'total_questions' must be at least 1"
+        if total > max_questions:
+            return False, f"'total_questions' must not exceed {max_questions}"
+        
+        elements = request.get('elements')
+        if elements is not None:
+            if not isinstance(elements, list) or not all(isinstance(e, str) for e in elements):
+                return False, "'elements' must be a list of element file names"
+            if not elements:
+                return False, "'elements' must not be empty"
+        
+        filters = request.get('filters')
+        if filters is not None and not isinstance(filters, dict):
+            return False, "'filters' must be an object"
+        
+        weights = request.get('weights')
+        if weights is not None:
+            if not isinstance(weights, dict):
+                return False, "'weights' must be an object"
+            for name, weight in weights.items():
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                    return False, f"Weight of '{name}' must be a non-negative number"
+        
+        seed = request.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return False, "'seed' must be an integer"
+        
+        error = IOHandler.validate_history_ids(request)
+        if error:
+            return False, error
+        
+        return True, None
+    
+    # Validate optional 'user_id' / 'session_id' (see seen_store)
+    """
+    Returns:
+        Error message, or None if valid
+    """
+    @staticmethod
+    def validate_history_ids(request, max_length=128):
+        for field in ('user_id', 'session_id'):
+            value = request.get(field)
+            if value is None:
+                continue
+            if not isinstance(value, str) or not value.strip():
+                return f"'{field}' must be a non-empty string"
+            if len(value) > max_length:
+                return f"'{field}' must not exceed {max_length} characters"
+        return None
+    
     @staticmethod
     def create_success_response(request, questions, summary_file):
-        return {
+        response = {
             "status": "success",
             "element_file": request['element_file'],
             "questions_generated": len(questions),
             "questions": questions,
             "summary_file": summary_file
         }
+        if request.get('seed') is not None:
+            response["seed"] = request['seed']
+        return response
     
     @staticmethod
     def create_error_response(error_message, debug_message=None):
@@ -93,6 +186,7 @@ class IOHandler:
             response["debug_message"] = debug_message
         return response
     
+    # Print a response to stdout: indented, or on one line with compact=True
     @staticmethod
-    def output_json(data):
-        print(json.dumps(data, ensure_ascii=False, indent=2))
+    def output_json(data, compact=False):
+        print(serialization.dumps(data, pretty=not compact))
@@ -0,0 +1,238 @@
+import os
+from types import MappingProxyType
+from src.fact_extractor import FactExtractor
+from src.distractors_loader import DistractorsLoader
+from src.element_catalog import ElementCatalog
+from src.question_templates import get_all_templates
+from src.template_planner import resolve_template_schema, answerable_templates
+from src.utils import log_debug
+
+# Loaded-once, read-only data shared by every QuestionGenerator
+"""
+Holds everything that does not change between requests:
+    - distractors: DistractorsLoader over the facts CSV
+    - template_weights: Priority-weighted template table (tuple)
+    - template_table: Template name -> sampling weight
+    - template_specs: Template name -> resolved fact key and CSV column
+    - elements: Parsed element files, keyed by normalized path
+    - plans: Answerable (template, weight) tuples per preloaded element
+    - catalog: ElementCatalog (name/symbol lookup) over the preloaded elements
+
+Build it once at startup and pass it to each per-request QuestionGenerator.
+"""
+class KnowledgeBase:
+    def __init__(self, config, preload_elements=True):
+        self.config = config
+        self.distractors = DistractorsLoader(config['data_paths']['facts_database'])
+        self.template_weights = tuple(build_template_weights(config))
+        self.template_table = build_template_table(self.template_weights)
+        self.template_specs = resolve_template_schema(
+            list(self.template_table), self.distractors.get_categories()
+        )
+
+        elements = {}
+        if preload_elements:
+            elements = self._load_elements(config['data_paths']['chemistry_files'])
+        self.elements = MappingProxyType(elements)
+        self.plans = MappingProxyType({
+            key: self._plan(extracted) for key, extracted in elements.items()
+        })
+        self.catalog = ElementCatalog(self)
+
+        log_debug("Knowledge base ready: %d elements preloaded, %d weighted templates",
+                  len(self.elements), len(self.template_weights))
+
+    # Get parsed facts for an element file
+    """
+    Returns:
+        Read-only dict with 'vietnamese_name', 'english_name', 'facts'.
+        Files outside the preloaded set go through FactExtractor's parse cache.
+    """
+    def get_element(self, element_file):
+        extracted = self.elements.get(_element_key(element_file))
+        if extracted is not None:
+            return extracted
+
+        log_debug("Element not preloaded, parsing on demand: %s", element_file)
+        return FactExtractor().extract_from_file(element_file)
+
+    # Answerable (template, weight) pairs for an element, see template_planner
+    def get_template_plan(self, element_file, extracted):
+        plan = self.plans.get(_element_key(element_file))
+        if plan is not None:
+            return plan
+        return self._plan(extracted)
+
+    def _plan(self, extracted):
+        return answerable_templates(
+            extracted['facts'], self.template_table, self.template_specs, self.distractors
+        )
+
+    def _load_elements(self, elements_dir):
+        elements = {}
+        if not os.path.isdir(elements_dir):
+            log_debug("Elements directory not found: %s", elements_dir, level='WARNING')
+            return elements
+
+        for filename in sorted(os.listdir(elements_dir)):
+            if not filename.endswith('.txt'):
+                continue
+            path = os.path.join(elements_dir, filename)
+            extracted = _load_element(path)
+            if extracted is not None:
+                elements[_element_key(path)] = extracted
+
+        return elements
+
+    # New knowledge base with some sources re-read, sharing everything else
+    """
+    Used by the source watcher (see source_watcher.SourceWatcher). This
+    instance is left untouched, so requests already using it are unaffected.
+
+    Args:
+        config: Config for the new knowledge base
+        reload_facts: Re-read the facts CSV (unchanged columns keep their index)
+        reload_templates: Rebuild the template table from config['question_types']
+        changed_elements: Element file paths that were edited, added or removed
+    Returns:
+        KnowledgeBase
+    """
+    def rebuild(self, config, reload_facts=False, reload_templates=False, changed_elements=()):
+        kb = KnowledgeBase.__new__(KnowledgeBase)
+        kb.config = config
+        kb.distractors = self.distractors
+        if reload_facts:
+            kb.distractors = DistractorsLoader(config['data_paths']['facts_database'], previous=self.distractors)
+
+        kb.template_weights = self.template_weights
+        kb.template_table = self.template_table
+        if reload_templates:
+            kb.template_weights = tuple(build_template_weights(config))
+            kb.template_table = build_template_table(kb.template_weights)
+
+        kb.template_specs = self.template_specs
+        if reload_facts or reload_templates:
+            kb.template_specs = resolve_template_schema(
+                list(kb.template_table), kb.distractors.get_categories()
+            )
+
+        elements = dict(self.elements)
+        changed_keys = set()
+        for path in changed_elements:
+            key = _element_key(path)
+            changed_keys.add(key)
+            extracted = _load_element(path) if os.path.exists(path) else None
+            if extracted is None:
+                elements.pop(key, None)
+            else:
+                elements[key] = extracted
+        kb.elements = MappingProxyType(elements)
+
+        # Plans depend on the facts columns and the template table as well
+        replan_all = reload_facts or reload_templates
+        kb.plans = MappingProxyType({
+            key: kb._plan(extracted) if replan_all or key in changed_keys else self.plans[key]
+            for key, extracted in elements.items()
+        })
+        kb.catalog = ElementCatalog(kb)
+
+        log_debug("Knowledge base rebuilt: facts %s, templates %s, %d element files changed",
+                  "reloaded" if reload_facts else "kept",
+                  "reloaded" if reload_templates else "kept",
+                  len(changed_keys))
+        return kb
+
+    # Pickle support for compiled corpora
+    # Read-only mappings are stored as plain dicts, keyed relative to the
+    # elements directory so a corpus stays valid if the checkout moves.
+    def __getstate__(self):
+        elements_dir = os.path.abspath(self.config['data_paths']['chemistry_files'])
+        elements = {}
+        for key, extracted in self.elements.items():
+            elements[os.path.relpath(key, elements_dir)] = {
+                'vietnamese_name': extracted['vietnamese_name'],
+                'english_name': extracted['english_name'],
+                'facts': dict(extracted['facts'])
+            }
+        plans = {
+            os.path.relpath(key, elements_dir): plan for key, plan in self.plans.items()
+        }
+        return {
+            'config': self.config,
+            'distractors': self.distractors,
+            'template_weights': self.template_weights,
+            'template_table': self.template_table,
+            'template_specs': self.template_specs,
+            'elements': elements,
+            'plans': plans,
+            'catalog': self.catalog
+        }
+
+    def __setstate__(self, state):
+        self.config = state['config']
+        self.distractors = state['distractors']
+        self.template_weights = state['template_weights']
+        self.template_table = state['template_table']
+        self.template_specs = state['template_specs']
+
+        elements_dir = self.config['data_paths']['chemistry_files']
+        self.elements = MappingProxyType({
+            _element_key(os.path.join(elements_dir, name)): MappingProxyType({
+                'vietnamese_name': extracted['vietnamese_name'],
+                'english_name': extracted['english_name'],
+                'facts': MappingProxyType(extracted['facts'])
+            })
+            for name, extracted in state['elements'].items()
+        })
+        self.plans = MappingProxyType({
+            _element_key(os.path.join(elements_dir, name)): plan
+            for name, plan in state['plans'].items()
+        })
+        self.catalog = state['catalog']
+
+# Build a list of templates where higher priority items appear more often.
+def build_template_weights(config):
+    weighted_templates = []
+    q_types = config.get('question_types', {})
+
+    # Max priority to calculate inverse weight
+    max_p = 5
+
+    all_available_templates = get_all_templates()
+
+    for category, settings in q_types.items():
+        if not settings.get('enabled', False):
+            continue
+
+        priority = settings.get('priority', 3)
+        weight = max(1, max_p - priority)
+
+        # For each specific question type in this category
+        for q_type in settings.get('types', []):
+            # Only add if it's a valid template we have defined
+            if q_type in all_available_templates:
+                weighted_templates.extend([q_type] * weight)
+
+    # Fallback if config is empty or invalid
+    if not weighted_templates:
+        return all_available_templates
+
+    return weighted_templates
+
+# Collapse the repeated weighted list into template name -> total weight
+def build_template_table(template_weights):
+    table = {}
+    for name in template_weights:
+        table[name] = table.get(name, 0) + 1
+    return table
+
+# Parsed element file, or None if it cannot be read
+def _load_element(path):
+    try:
+        return FactExtractor().extract_from_file(path)
+    except (OSError, UnicodeDecodeError) as e:
+        log_debug("Could not parse element file %s: %s", path, e, level='WARNING')
+        return None
+
+def _element_key(path):
+    return os.path.normcase(os.path.abspath(path))
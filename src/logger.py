@@ -0,0 +1,260 @@
+import atexit
+import contextvars
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is not coordinated across processes
+    fcntl = None
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+DEFAULT_SETTINGS = {
+    'file': "logs/debug.log",
+    'level': "DEBUG",
+    'max_bytes': 5 * 1024 * 1024,
+    'backup_count': 3,
+    'batch_size': 256,
+    'flush_interval': 0.5
+}
+
+# Correlation ID of the request being handled in the current context
+_correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+# Queue-backed log writer
+"""
+log() only captures (timestamp, level, correlation ID, message, args) and puts
+the tuple on a queue. A background thread drains the queue in batches, formats
+the messages, writes each batch with a single write() and rotates the file
+before it would grow past max_bytes (debug.log -> debug.log.1 -> ... -> .backup_count).
+A record that fails to format is reported on stderr and skipped; the thread
+keeps running.
+
+One writer runs per process; a forked child (e.g. a batch worker) starts its
+own writer on first use. Writers of different processes can share the file:
+rotation is coordinated through a lock file (see append_with_rotation()).
+"""
+class BufferedLogWriter:
+    _STOP = object()
+
+    def __init__(self, settings):
+        self.path = settings['file']
+        self.max_bytes = settings['max_bytes']
+        self.backup_count = settings['backup_count']
+        self.batch_size = settings['batch_size']
+        self.flush_interval = settings['flush_interval']
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        self._queue.put(record)
+
+    # Block until everything submitted so far is on disk
+    def flush(self, timeout=5.0):
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            waiters = []
+            stop = False
+            while True:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    _report_error("writing a batch of log records", e)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write(self, batch):
+        chunks = []
+        for record in batch:
+            try:
+                chunks.append(_format_record(record).encode('utf-8'))
+            except Exception as e:
+                _report_error("formatting a log record", e)
+        if not chunks:
+            return
+        try:
+            append_with_rotation(self.path, b''.join(chunks), self.max_bytes, self.backup_count)
+        except OSError:
+            # Logging must never break generation
+            pass
+
+# Append data to path, rotating it first when data would take it past max_bytes
+"""
+The server, its worker processes, the daemon and the CLI can share one file.
+Size check, rotation and append run under an exclusive lock on path.lock, so
+two processes never both rotate for the same overflow (which would drop a
+backup and fail the second rename) and nobody appends mid-rotation.
+"""
+def append_with_rotation(path, data, max_bytes, backup_count):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with _locked(f"{path}.lock"):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if max_bytes and size and size + len(data) > max_bytes:
+            rotate_file(path, backup_count)
+        with open(path, 'ab') as f:
+            f.write(data)
+
+@contextmanager
+def _locked(lock_path):
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# Size-based rotation: path -> path.1 -> ... -> path.<backup_count>
+def rotate_file(path, backup_count):
+    if backup_count <= 0:
+        os.truncate(path, 0)
+        return
+    for i in range(backup_count - 1, 0, -1):
+        source = f"{path}.{i}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+# The writer thread cannot log its own failures; stderr is the fallback
+def _report_error(action, error):
+    try:
+        sys.stderr.write(f"Logging error while {action}: {type(error).__name__}: {error}\n")
+    except Exception:
+        pass
+
+def _format_record(record):
+    timestamp, level, correlation_id, message, args = record
+    if args:
+        try:
+            message = message % args
+        except (TypeError, ValueError):
+            message = f"{message} {args}"
+    prefix = f"[{timestamp.strftime('%d%m%Y %H:%M:%S')}]"
+    if level != 'DEBUG':
+        prefix += f" [{level}]"
+    if correlation_id:
+        prefix += f" [{correlation_id}]"
+    return f"{prefix} {message}\n"
+
+_settings = dict(DEFAULT_SETTINGS)
+_min_level = LEVELS[_settings['level']]
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+# Apply the 'logging' section of config.json
+"""
+Keys (all optional): file, level, max_bytes, backup_count, batch_size,
+flush_interval. When system.debug_mode is false, DEBUG messages are dropped
+regardless of 'level'.
+"""
+def configure_logging(config):
+    global _settings, _min_level
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(config.get('logging', {}))
+
+    level = LEVELS.get(str(settings['level']).upper(), LEVELS['DEBUG'])
+    if not config.get('system', {}).get('debug_mode', True):
+        level = max(level, LEVELS['INFO'])
+
+    with _writer_lock:
+        _settings = settings
+        _min_level = level
+
+def is_enabled(level='DEBUG'):
+    return LEVELS.get(level, LEVELS['DEBUG']) >= _min_level
+
+# Queue a log message; formatting with args happens on the writer thread
+def log(message, *args, level='DEBUG'):
+    if LEVELS.get(level, LEVELS['DEBUG']) < _min_level:
+        return
+    _get_writer().submit((datetime.now(), level, _correlation_id.get(), message, args))
+
+def _get_writer():
+    global _writer, _writer_pid
+    pid = os.getpid()
+    writer = _writer
+    if writer is not None and _writer_pid == pid and writer.path == _settings['file']:
+        return writer
+
+    with _writer_lock:
+        if _writer is None or _writer_pid != pid or _writer.path != _settings['file']:
+            if _writer is not None and _writer_pid == pid:
+                _writer.close()
+            _writer = BufferedLogWriter(_settings)
+            _writer_pid = pid
+            # Pool workers leave through os._exit(), which skips atexit
+            if 'multiprocessing' in sys.modules:
+                from multiprocessing import util
+                util.Finalize(None, _shutdown, exitpriority=10)
+        return _writer
+
+def flush_logs():
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.flush()
+
+def _shutdown():
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.close()
+
+atexit.register(_shutdown)
+
+def new_correlation_id():
+    return uuid.uuid4().hex[:8]
+
+def get_correlation_id():
+    return _correlation_id.get()
+
+# Tag every message logged inside the block with a correlation ID
+@contextmanager
+def correlation_context(correlation_id=None):
+    token = _correlation_id.set(correlation_id or new_correlation_id())
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
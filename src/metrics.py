@@ -0,0 +1,109 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "quizgen_stage_duration_seconds"
+
+# Stage durations of the request being handled in the current context
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+# Cumulative latency histogram (Prometheus semantics)
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+# Process-wide stage timings, keyed by (stage, template)
+"""
+Stages: fact_extraction, template_selection, distractor_lookup,
+padding_fallback, dedup_check, question_generation, response_serialization.
+Template-specific stages carry the template name; the others use "".
+
+Each process has its own registry, so /metrics on the server does not
+include work done inside batch worker processes.
+"""
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, template=""):
+        key = (stage, template or "")
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    # Prometheus text exposition format (version 0.0.4)
+    def render_prometheus(self):
+        with self._lock:
+            snapshot = [
+                (stage, template, list(h.counts), h.count, h.sum)
+                for (stage, template), h in sorted(self._histograms.items())
+            ]
+
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent per generation stage.",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        for stage, template, counts, count, total in snapshot:
+            labels = f'stage="{_escape(stage)}",template="{_escape(template)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.9f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+registry = MetricsRegistry()
+
+# Time a block into the registry (and the current request's spans, if any)
+@contextmanager
+def timed(stage, template=""):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(stage, elapsed, template)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + elapsed
+
+# Collect per-stage totals for one request (used for the Server-Timing header)
+@contextmanager
+def request_timing():
+    spans = {}
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+# Server-Timing header value, durations in milliseconds
+def server_timing_header(spans):
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in spans.items())
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+
+# One generated multiple-choice question
+"""
+Slotted and immutable. Field names and order are the keys of a question in
+every response; encoders serialize it through to_dict() (see serialization.py).
+"""
+@dataclass(frozen=True, slots=True)
+class Question:
+    question: str
+    answer: str
+    choice1: str
+    choice2: str
+    choice3: str
+    choice4: str
+
+    def to_dict(self):
+        return {
+            'question': self.question,
+            'answer': self.answer,
+            'choice1': self.choice1,
+            'choice2': self.choice2,
+            'choice3': self.choice3,
+            'choice4': self.choice4
+        }
+
+    # The same question tagged with the element it is about (quiz responses)
+    def for_element(self, element_file):
+        return QuizQuestion(self.question, self.answer, self.choice1, self.choice2,
+                            self.choice3, self.choice4, element_file)
+
+    # Immutable: copies (e.g. by the response cache) can share the instance
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+# A quiz question: a Question plus the element file it was generated from
+@dataclass(frozen=True, slots=True)
+class QuizQuestion(Question):
+    element_file: str
+
+    def to_dict(self):
+        data = Question.to_dict(self)
+        data['element_file'] = self.element_file
+        return data
@@ -0,0 +1,362 @@
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+from datetime import datetime
+from src.corpus import compute_source_hash
+from src.question import Question
+from src.question_generator import QuestionGenerator, capitalize_first
+from src.question_templates import generate_question_text
+from src.template_planner import sample_templates
+from src.metrics import timed
+from src.utils import log_debug
+
+# Bump when the bank's tables (or what is stored in them) change
+QUESTION_BANK_FORMAT_VERSION = 1
+
+DEFAULT_SETTINGS = {
+    'path': "data/compiled/question_bank.sqlite",
+    'distractor_sets': 4,
+    'serve': False
+}
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE elements (
+    element TEXT PRIMARY KEY,
+    vietnamese_name TEXT,
+    english_name TEXT,
+    question_count INTEGER NOT NULL
+);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY,
+    element TEXT NOT NULL,
+    template TEXT NOT NULL,
+    weight REAL NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL
+);
+CREATE TABLE distractor_sets (
+    question_id INTEGER NOT NULL,
+    set_index INTEGER NOT NULL,
+    choices TEXT NOT NULL,
+    PRIMARY KEY (question_id, set_index)
+);
+CREATE INDEX questions_by_element ON questions (element);
+"""
+
+# Offline question bank: every answerable question, precomputed
+"""
+One row per (element, template, correct answer), each with up to
+distractor_sets different sets of three wrong answers. Built by
+'python main.py build-question-bank'; when question_bank.serve is enabled,
+requests are answered by sampling the bank (BankQuestionGenerator) instead of
+generating live.
+
+Elements are stored relative to data_paths.chemistry_files, like the compiled
+corpus. The bank is tagged with the same source hash as the corpus, so a bank
+built from older sources is ignored rather than served.
+"""
+
+def get_question_bank_settings(config):
+    return {**DEFAULT_SETTINGS, **config.get('question_bank', {})}
+
+# Bank name of an element file (its path relative to the elements directory)
+def get_bank_element(config, element_file):
+    elements_dir = os.path.normcase(os.path.abspath(config['data_paths']['chemistry_files']))
+    return os.path.relpath(os.path.normcase(os.path.abspath(element_file)), elements_dir)
+
+# Enumerate every answerable question into a SQLite bank
+"""
+Args:
+    config: Loaded config.json
+    knowledge_base: KnowledgeBase with preloaded elements
+    output_path: Bank file (default: question_bank.path in config.json)
+    distractor_sets: Distractor sets to store per question (default from config)
+    seed: Seed for distractor sampling, so rebuilding gives the same bank
+Returns:
+    Tuple: (report, bank_path) where report counts what was stored and lists
+    elements with no questions or with questions that got only one distractor set
+"""
+def build_question_bank(config, knowledge_base, output_path=None, distractor_sets=None, seed=0):
+    settings = get_question_bank_settings(config)
+    output_path = output_path or settings['path']
+    distractor_sets = distractor_sets or settings['distractor_sets']
+
+    generator = QuestionGenerator(config, knowledge_base=knowledge_base, seed=seed)
+    elements_dir = os.path.normcase(os.path.abspath(config['data_paths']['chemistry_files']))
+
+    report = {
+        'elements': 0,
+        'questions': 0,
+        'distractor_sets': 0,
+        'elements_without_questions': [],
+        'questions_with_one_set': 0
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    # Per-process name: concurrent builds (or reloads) never share a half-written file
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        for key in sorted(knowledge_base.elements):
+            extracted = knowledge_base.elements[key]
+            element = os.path.relpath(key, elements_dir)
+            rows = _enumerate_element(generator, knowledge_base, extracted, knowledge_base.plans[key],
+                                      distractor_sets)
+
+            conn.execute(
+                "INSERT INTO elements VALUES (?, ?, ?, ?)",
+                (element, extracted['vietnamese_name'], extracted['english_name'], len(rows))
+            )
+            for template, weight, question, answer, sets in rows:
+                cursor = conn.execute(
+                    "INSERT INTO questions (element, template, weight, question, answer) VALUES (?, ?, ?, ?, ?)",
+                    (element, template, weight, question, answer)
+                )
+                conn.executemany(
+                    "INSERT INTO distractor_sets VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, i, json.dumps(choices, ensure_ascii=False))
+                     for i, choices in enumerate(sets)]
+                )
+                report['distractor_sets'] += len(sets)
+                if len(sets) == 1:
+                    report['questions_with_one_set'] += 1
+
+            report['elements'] += 1
+            report['questions'] += len(rows)
+            if not rows:
+                report['elements_without_questions'].append(element)
+
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('format_version', str(QUESTION_BANK_FORMAT_VERSION)),
+            ('source_hash', compute_source_hash(config)),
+            ('distractor_sets', str(distractor_sets)),
+            ('built_at', datetime.now().isoformat())
+        ])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, output_path)
+    log_debug("Question bank written: %s (%d questions for %d elements)",
+              output_path, report['questions'], report['elements'], level='INFO')
+    return report, output_path
+
+# All (template, weight, question, answer, distractor sets) rows for one element
+def _enumerate_element(generator, knowledge_base, extracted, plan, distractor_sets):
+    rows = []
+    for template, weight in plan:
+        spec = knowledge_base.template_specs[template]
+        raw_fact = extracted['facts'][spec['fact_key']]
+        answers = raw_fact if isinstance(raw_fact, (list, tuple)) else (raw_fact,)
+        all_correct_answers = [str(x).strip().lower() for x in answers]
+        question = generate_question_text(template, extracted['vietnamese_name'])
+
+        for raw_answer in dict.fromkeys(answers):
+            answer = capitalize_first(raw_answer)
+            sets = []
+            seen = set()
+            # Distractor candidates are shuffled per call, so repeated calls give different sets
+            for _ in range(distractor_sets * 3):
+                choices = generator.select_distractors(answer, spec['column'], all_correct_answers, template)
+                if choices is None:
+                    break
+                key = frozenset(choices)
+                if key not in seen:
+                    seen.add(key)
+                    sets.append(choices)
+                    if len(sets) >= distractor_sets:
+                        break
+            if sets:
+                rows.append((template, weight, question, str(answer), sets))
+    return rows
+
+# Read-only access to a built bank (safe to share between threads)
+class QuestionBank:
+    def __init__(self, path):
+        self.path = path
+        uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self.meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+            self.elements = frozenset(row[0] for row in self._conn.execute("SELECT element FROM elements"))
+
+    def has_element(self, element):
+        return element in self.elements
+
+    # Rows (id, template, weight, question, answer) of one element
+    def get_questions(self, element):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, template, weight, question, answer FROM questions WHERE element = ? ORDER BY id",
+                (element,)
+            ).fetchall()
+
+    # Distractor sets of the given questions: question id -> list of [d1, d2, d3]
+    def get_distractor_sets(self, question_ids):
+        if not question_ids:
+            return {}
+        placeholders = ",".join("?" * len(question_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT question_id, choices FROM distractor_sets WHERE question_id IN ({placeholders}) "
+                "ORDER BY question_id, set_index",
+                list(question_ids)
+            ).fetchall()
+        sets = {}
+        for question_id, choices in rows:
+            sets.setdefault(question_id, []).append(json.loads(choices))
+        return sets
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Serves requests by sampling the question bank instead of generating
+"""
+Same interface and statistics as QuestionGenerator. Templates are drawn with
+the same weighted sampling without replacement, one stored answer and one
+distractor set are picked per template, and the usual dedup check still
+applies. With a history, unseen answers are picked first and seen rows are
+only used when there are not enough unseen ones.
+"""
+class BankQuestionGenerator(QuestionGenerator):
+    def __init__(self, config, question_bank, knowledge_base=None, seed=None, history=None):
+        super().__init__(config, knowledge_base=knowledge_base, seed=seed, history=history)
+        self.question_bank = question_bank
+
+    def generate_questions(self, element_file, number_of_questions, on_question=None):
+        element = get_bank_element(self.config, element_file)
+        log_debug("Sampling %d questions from the question bank: %s", number_of_questions, element)
+
+        with timed('template_selection'):
+            rows_by_template = {}
+            plan = []
+            for row in self.question_bank.get_questions(element):
+                if row[1] not in rows_by_template:
+                    rows_by_template[row[1]] = []
+                    plan.append((row[1], row[2]))
+                rows_by_template[row[1]].append(row)
+
+        if len(plan) < number_of_questions:
+            log_debug("Only %d banked templates for %s, %d questions requested",
+                      len(plan), element, number_of_questions, level='WARNING')
+
+        questions = []
+        previously_seen = []
+        for template_name in sample_templates(plan, self.rng):
+            if len(questions) >= number_of_questions:
+                break
+            self.statistics['total_attempts'] += 1
+
+            rows = rows_by_template[template_name]
+            if self.history is not None:
+                rows = [row for row in rows if not self.history.is_seen(template_name, row[4])] or rows
+            row = self.rng.choice(rows)
+            if self.history is not None and self.history.is_seen(template_name, row[4]):
+                self.statistics['previously_seen'] += 1
+                previously_seen.append((template_name, row))
+                continue
+            self._add_row(questions, template_name, row, on_question)
+
+        for template_name, row in previously_seen:
+            if len(questions) >= number_of_questions:
+                break
+            self._add_row(questions, template_name, row, on_question)
+
+        log_debug("Bank sampling complete: %d questions in %d attempts",
+                  len(questions), self.statistics['total_attempts'])
+        return questions
+
+    # Append the question of a bank row (with a random distractor set) unless it is a duplicate
+    def _add_row(self, questions, template_name, row, on_question):
+        question_id, _, _, question_text, answer = row
+        with timed('dedup_check'):
+            is_dup, _, _ = self.deduplicator.is_duplicate(question_text)
+        if is_dup:
+            self.statistics['duplicates_found'] += 1
+            return
+
+        with timed('distractor_lookup', template_name):
+            distractor_sets = self.question_bank.get_distractor_sets([question_id])[question_id]
+        all_choices = [answer] + self.rng.choice(distractor_sets)
+        self.rng.shuffle(all_choices)
+        question = Question(question_text, answer, *all_choices)
+
+        questions.append(question)
+        self.deduplicator.add_question(question_text)
+        if self.history is not None:
+            self.history.add(template_name, answer)
+        self.statistics['successful_generations'] += 1
+        if on_question is not None:
+            on_question(question)
+
+_bank = None
+_bank_pid = None
+_bank_lock = threading.Lock()
+
+# Process-wide question bank, when serving from it is enabled
+"""
+Returns:
+    QuestionBank, or None when question_bank.serve is off or the bank file is
+    missing, from another format version, or built from different sources.
+    The check runs once per process.
+"""
+def get_question_bank(config):
+    global _bank, _bank_pid
+    settings = get_question_bank_settings(config)
+    if not settings['serve']:
+        return None
+
+    with _bank_lock:
+        if _bank_pid != os.getpid():
+            _bank = _open_question_bank(config, settings['path'])
+            _bank_pid = os.getpid()
+        return _bank
+
+# Forget the process-wide bank, so the next get_question_bank() checks it again
+"""
+Called when sources change (a bank built from the old sources is then ignored).
+The old bank is not closed: requests that already hold it may still read it,
+and its connection is closed once it is no longer referenced.
+"""
+def reset_question_bank():
+    global _bank, _bank_pid
+    with _bank_lock:
+        _bank = None
+        _bank_pid = None
+
+def _open_question_bank(config, path):
+    if not os.path.exists(path):
+        log_debug("Question bank not found (%s), generating live", path, level='WARNING')
+        return None
+
+    try:
+        bank = QuestionBank(path)
+    except sqlite3.Error as e:
+        log_debug("Could not open question bank %s: %s", path, e, level='WARNING')
+        return None
+
+    if bank.meta.get('format_version') != str(QUESTION_BANK_FORMAT_VERSION):
+        log_debug("Question bank %s has an old format, generating live", path, level='WARNING')
+    elif bank.meta.get('source_hash') != compute_source_hash(config):
+        log_debug("Question bank %s is stale (sources changed), generating live", path, level='WARNING')
+    else:
+        log_debug("Serving from question bank %s", path, level='INFO')
+        return bank
+
+    bank.close()
+    return None
@@ -1,137 +1,216 @@
 import random
-from src.fact_extractor import FactExtractor
-from src.distractors_loader import DistractorsLoader
-from src.question_templates import generate_question_text, get_all_templates, get_template
+from src.knowledge_base import KnowledgeBase
+from src.question_templates import generate_question_text
+from src.template_planner import sample_templates
 from src.deduplicator import Deduplicator
+from src.question import Question
+from src.metrics import timed
 from src.utils import log_debug
 
+# Per-request generator: holds only the dedup set and statistics.
+# Heavy read-only data (CSV, element facts, template table) lives in a shared KnowledgeBase.
+# With a seed, every random choice comes from a private random.Random, so output is reproducible.
+# A Deduplicator can be passed in to share one duplicate index across several generators.
+# A seen_store.SeenHistory makes it prefer (template, answer) combinations not served before.
 class QuestionGenerator:
-    def __init__(self, config):
+    def __init__(self, config, knowledge_base=None, seed=None, deduplicator=None, history=None):
         self.config = config
-        self.fact_extractor = FactExtractor()
-        self.facts_loader = DistractorsLoader(config['data_paths']['facts_database'])
-        self.deduplicator = Deduplicator(
-            similarity_threshold=config['deduplication']['similarity_threshold']
-        )
+        self.rng = random.Random(seed) if seed is not None else random
+        if knowledge_base is None:
+            knowledge_base = KnowledgeBase(config, preload_elements=False)
+        self.knowledge_base = knowledge_base
+        self.facts_loader = knowledge_base.distractors
+        if deduplicator is None:
+            deduplicator = Deduplicator(
+                similarity_threshold=config['deduplication']['similarity_threshold'],
+                use_index=config['deduplication'].get('use_index', False)
+            )
+        self.deduplicator = deduplicator
+        self.history = history
         
         self.statistics = {
             'total_attempts': 0,
             'successful_generations': 0,
             'failed_generations': 0,
-            'duplicates_found': 0
+            'duplicates_found': 0,
+            'previously_seen': 0
         }
         
-        self.template_weights = self._build_template_weights()
+        self.template_weights = knowledge_base.template_weights
     
     # Main method: Generate questions for an element
     """
     Args:
         element_file: Path to chemistry file
         number_of_questions: Number of questions to generate
+        on_question: Optional callable, called with each question as soon as
+                     it passes the duplicate check (used for streaming)
     
     Returns:
-        List of question dictionaries with 'question', 'answer', 'choice1-4'
+        List of Question records (question, answer, choice1-4)
+    
+    With a history, questions it has seen are set aside and only used (in
+    the order drawn) when there are not enough unseen ones.
     """
-    def generate_questions(self, element_file, number_of_questions):
-        log_debug(f"Starting generation: {element_file}, {number_of_questions} questions")
+    def generate_questions(self, element_file, number_of_questions, on_question=None):
+        log_debug("Starting generation: %s, %d questions", element_file, number_of_questions)
         
-        extracted = self.fact_extractor.extract_from_file(element_file)
+        with timed('fact_extraction'):
+            extracted = self.knowledge_base.get_element(element_file)
         element_name_vi = extracted['vietnamese_name']
         element_name_en = extracted['english_name']
         
-        log_debug(f"Extracted element: {element_name_vi} ({element_name_en})")
+        log_debug("Extracted element: %s (%s)", element_name_vi, element_name_en)
         
         questions = []
+        previously_seen = []
         attempts = 0
         
-        # Track templates that failed for this element so we don't retry them
-        failed_templates = set()
+        # Plan up front: only templates this element can actually answer
+        with timed('template_selection'):
+            plan = self.knowledge_base.get_template_plan(element_file, extracted)
+        if len(plan) < number_of_questions:
+            log_debug("Only %d answerable templates for %s, %d questions requested",
+                      len(plan), element_name_vi, number_of_questions, level='WARNING')
         
-        # Allow multiple attempts in case of failed generations
+        # Upper bound on attempts, kept from the old retry loop
         max_attempts = number_of_questions * self.config.get('question_generation', {}).get('max_attempts', 5)
         
+        # Each template is drawn at most once (its question text is fixed per element)
+        sampler = sample_templates(plan, self.rng)
         while len(questions) < number_of_questions and attempts < max_attempts:
-            # Filter pool to exclude known bad templates
-            valid_pool = [t for t in self.template_weights if t not in failed_templates]
-            
-            if not valid_pool:
-                log_debug("No valid templates remaining for this element.")
+            with timed('template_selection'):
+                template_name = next(sampler, None)
+            if template_name is None:
                 break
             
-            template_name = random.choice(valid_pool)
-            
             attempts += 1
             self.statistics['total_attempts'] += 1
             
             # Try to generate one question
-            question_dict = self._generate_single_question(
-                element_name_vi,
-                extracted['facts'],
-                template_name  # Pass template name directly
-            )
+            with timed('question_generation', template_name):
+                question = self._generate_single_question(
+                    element_name_vi,
+                    extracted['facts'],
+                    template_name  # Pass template name directly
+                )
             
-            if question_dict is None:
-                # Mark as failed so we don't pick it again for this element
-                failed_templates.add(template_name)
+            if question is None:
                 self.statistics['failed_generations'] += 1
                 continue
             
-            # Check for duplicates
-            is_dup, _, _ = self.deduplicator.is_duplicate(question_dict['question'])
-            if is_dup:
-                self.statistics['duplicates_found'] += 1
-                log_debug(f"  ⚠ Duplicate detected, skipping")
+            if self.history is not None and self.history.is_seen(template_name, question.answer):
+                self.statistics['previously_seen'] += 1
+                previously_seen.append((template_name, question))
+                max_attempts += 1  # seen questions do not use up the attempt budget
                 continue
             
-            # Add to results
-            questions.append(question_dict)
-            self.deduplicator.add_question(question_dict['question'])
-            self.statistics['successful_generations'] += 1
-            
-            log_debug(f"Generated question {len(questions)}/{number_of_questions}")
+            self._add_question(questions, template_name, question, number_of_questions, on_question)
         
-        log_debug(f"Generation complete: {len(questions)} questions generated in {attempts} attempts")
+        for template_name, question in previously_seen:
+            if len(questions) >= number_of_questions:
+                break
+            self._add_question(questions, template_name, question, number_of_questions, on_question)
+        
+        log_debug("Generation complete: %d questions generated in %d attempts", len(questions), attempts)
         
         return questions
     
+    # Append question to questions unless it duplicates one already generated
+    def _add_question(self, questions, template_name, question, number_of_questions, on_question):
+        # Check for duplicates
+        with timed('dedup_check'):
+            is_dup, _, _ = self.deduplicator.is_duplicate(question.question)
+        if is_dup:
+            self.statistics['duplicates_found'] += 1
+            log_debug("  ⚠ Duplicate detected, skipping")
+            return
+        
+        # Add to results
+        questions.append(question)
+        self.deduplicator.add_question(question.question)
+        if self.history is not None:
+            self.history.add(template_name, question.answer)
+        self.statistics['successful_generations'] += 1
+        if on_question is not None:
+            on_question(question)
+        
+        log_debug("Generated question %d/%d", len(questions), number_of_questions)
+    
     # Generate a single question
     """
     Returns:
-        Dictionary with question, answer, choice1-4, or None if failed
+        Question, or None if failed
     """
     def _generate_single_question(self, element_name, facts, template_name):
         # NOTE: template_name is passed in, logic removed random choice
         
-        # Get the specific template
-        template_def = get_template(template_name)
-        if not template_def: 
+        # Resolved fact key / CSV column (see template_planner.resolve_template_schema)
+        spec = self.knowledge_base.template_specs.get(template_name)
+        if not spec or spec['column'] is None:
             return None
             
-        vi_key = template_def.get("category")
+        vi_key = spec['fact_key']
+        column = spec['column']
         
         # Get answer value from facts using Vietnamese key
         raw_fact = facts.get(vi_key, None)
         if raw_fact is None:
-            log_debug(f"  ✗ Template '{template_name}': No answer found for key '{vi_key}'")
+            log_debug("  ✗ Template '%s': No answer found for key '%s'", template_name, vi_key)
             return None
             
         all_correct_answers = []
-        if isinstance(raw_fact, list):
+        if isinstance(raw_fact, (list, tuple)):
             all_correct_answers = [str(x).strip().lower() for x in raw_fact]
-            raw_answer = random.choice(raw_fact)
+            candidates = raw_fact
+            if self.history is not None:
+                candidates = [x for x in raw_fact if not self.history.is_seen(template_name, x)] or raw_fact
+            raw_answer = self.rng.choice(candidates)
         else:
             all_correct_answers = [str(raw_fact).strip().lower()]
             raw_answer = raw_fact
             
-        answer = self._capitalize_first(raw_answer)
-        log_debug(f"  ✓ Template '{template_name}': Found answer '{answer}'")
+        answer = capitalize_first(raw_answer)
+        log_debug("  ✓ Template '%s': Found answer '%s'", template_name, answer)
         
         # Generate base question
         question_text = generate_question_text(template_name, element_name)
         
+        formatted_distractors = self.select_distractors(answer, column, all_correct_answers, template_name)
+        if formatted_distractors is None:
+            return None
+        
+        # Shuffle all options (correct + distractors)
+        all_choices = [answer] + formatted_distractors
+        self.rng.shuffle(all_choices)
+        
+        question = Question(
+            question=question_text,
+            answer=str(answer),
+            choice1=str(all_choices[0]),
+            choice2=str(all_choices[1]),
+            choice3=str(all_choices[2]),
+            choice4=str(all_choices[3]) if len(all_choices) > 3 else str(formatted_distractors[0])
+        )
+        
+        log_debug("    ✓ Question generated successfully")
+        return question
+    
+    # Pick three wrong answers for one correct answer
+    """
+    Args:
+        answer: The (capitalized) correct answer
+        column: CSV column to draw distractors from
+        all_correct_answers: Lower-cased correct answers that must not be offered as wrong ones
+        template_name: Template the question is for (metrics label)
+    Returns:
+        List of 3 capitalized distractors, or None if the column has too few values
+    """
+    def select_distractors(self, answer, column, all_correct_answers, template_name):
         # Get distractors (wrong answers)
-        initial_distractors = self.facts_loader.get_distractors(answer, vi_key, 10)
-        log_debug(f"    Got {len(initial_distractors)} candidates from CSV for category '{vi_key}'")
+        with timed('distractor_lookup', template_name):
+            initial_distractors = self.facts_loader.get_distractors(answer, column, 10, rng=self.rng)
+        log_debug("    Got %d candidates from CSV for category '%s'", len(initial_distractors), column)
         
         # Validate Distractors
         valid_distractors = []
@@ -145,83 +224,25 @@ class QuestionGenerator:
                 break
         
         if len(valid_distractors) < 3:
-            log_debug(f"    WARNING: Only {len(valid_distractors)} valid distractors for {vi_key}")
+            log_debug("    Only %d valid distractors for %s", len(valid_distractors), column, level='WARNING')
             # Pad with any available values if needed
-            all_values = self.facts_loader.get_all_values_for_category(vi_key)
-            for val in all_values:
-                val_str = str(val).strip().lower()
+            with timed('padding_fallback', template_name):
+                all_values = self.facts_loader.get_all_values_for_category(column)
+                for val in all_values:
+                    val_str = str(val).strip().lower()
                 
-                # Check against ALL correct answers and existing valid distractors
-                if val_str not in all_correct_answers and val not in valid_distractors:
-                    valid_distractors.append(val)
-                    if len(valid_distractors) >= 3:
-                        break
-            log_debug(f"    After padding: {len(valid_distractors)} distractors available")
+                    # Check against ALL correct answers and existing valid distractors
+                    if val_str not in all_correct_answers and val not in valid_distractors:
+                        valid_distractors.append(val)
+                        if len(valid_distractors) >= 3:
+                            break
+            log_debug("    After padding: %d distractors available", len(valid_distractors))
         
         if len(valid_distractors) < 3:
-            log_debug(f"    ✗ FAILED: Not enough distractors ({len(valid_distractors)} < 3)")
+            log_debug("    ✗ FAILED: Not enough distractors (%d < 3)", len(valid_distractors))
             return None
         
-        # Shuffle all options (correct + distractors)
-        formatted_distractors = [self._capitalize_first(d) for d in valid_distractors]
-        all_choices = [answer] + formatted_distractors[:3]
-        random.shuffle(all_choices)
-        
-        # Create question dict
-        question_dict = {
-            'question': question_text,
-            'answer': str(answer),
-            'choice1': str(all_choices[0]),
-            'choice2': str(all_choices[1]),
-            'choice3': str(all_choices[2]),
-            'choice4': str(all_choices[3]) if len(all_choices) > 3 else str(formatted_distractors[0])
-        }
-        
-        log_debug(f"    ✓ Question generated successfully")
-        return question_dict
-    
-    # Build a list of templates where higher priority items appear more often.
-    def _build_template_weights(self):
-        weighted_templates = []
-        q_types = self.config.get('question_types', {})
-        
-        # Max priority to calculate inverse weight
-        max_p = 5 
-        
-        all_available_templates = get_all_templates()
-        
-        for category, settings in q_types.items():
-            if not settings.get('enabled', False):
-                continue
-                
-            priority = settings.get('priority', 3)
-            weight = max(1, max_p - priority)
-            
-            # For each specific question type in this category
-            for q_type in settings.get('types', []):
-                # Only add if it's a valid template we have defined
-                if q_type in all_available_templates:
-                    weighted_templates.extend([q_type] * weight)
-        
-        # Fallback if config is empty or invalid
-        if not weighted_templates:
-            return all_available_templates
-            
-        return weighted_templates
-    
-    # Capitalize the first letter of the answer if needed
-    def _capitalize_first(self, text):
-        if not text:
-            return text
-        text_str = str(text).strip()
-        if not text_str:
-            return ""
-        
-        first_char = text_str[0]
-        if first_char.isalpha():
-            return first_char.upper() + text_str[1:]
-            
-        return text_str
+        return [capitalize_first(d) for d in valid_distractors[:3]]
     
     def get_statistics(self):
         if self.statistics['total_attempts'] > 0:
@@ -234,3 +255,17 @@ class QuestionGenerator:
             **self.statistics,
             'success_rate': f"{success_rate:.1f}%"
         }
+
+# Capitalize the first letter of an answer or distractor if needed (shared with the question bank)
+def capitalize_first(text):
+    if not text:
+        return text
+    text_str = str(text).strip()
+    if not text_str:
+        return ""
+    
+    first_char = text_str[0]
+    if first_char.isalpha():
+        return first_char.upper() + text_str[1:]
+        
+    return text_str
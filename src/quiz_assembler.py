@@ -0,0 +1,241 @@
+import os
+import random
+from src.deduplicator import Deduplicator
+from src.question_generator import QuestionGenerator
+from src.summary_generator import SummaryGenerator
+from src.summary_aggregator import get_summary_aggregator
+from src.io_handler import IOHandler
+from src.logger import correlation_context, get_correlation_id
+from src.utils import log_debug
+
+DEFAULT_SETTINGS = {
+    'max_questions': 500,
+    'similarity_threshold': 0.99
+}
+
+# Request filter -> element fact it is matched against
+FILTER_FACTS = {
+    'group': 'Nhóm',
+    'period': 'Chu kỳ',
+    'element_type': 'Loại nguyên tố'
+}
+
+def get_quiz_settings(config):
+    return {**DEFAULT_SETTINGS, **config.get('quiz', {})}
+
+# Assemble one multi-element quiz
+"""
+Request fields:
+    - total_questions: Questions in the whole quiz (up to quiz.max_questions)
+    - elements: Optional list of element files (resolved like 'element_file')
+    - filters: Optional {'group', 'period', 'element_type'}, each a value or a
+      list of values, matched against the element files' facts. The facts CSV
+      cannot be used here: its columns are independent pools of distractor
+      values, not one row per element.
+    - weights: Optional element file -> weight; other elements weigh the sum of
+      their answerable templates' weights
+    - seed: Optional, for a reproducible quiz
+    - shuffle: Optional, mix questions of different elements (default: grouped)
+    - user_id / session_id: Optional, prefer questions not served to them
+      before (see seen_store)
+
+Questions are apportioned across elements by weight (largest remainder, capped
+at what each element can answer), and checked against one shared duplicate
+index. That index uses quiz.similarity_threshold instead of the per-request
+0.85: the same template asked about two different elements is up to ~0.98
+similar, which is a different question, not a duplicate.
+
+Returns:
+    Tuple: (response, error_message) like process_generation_request()
+"""
+def assemble_quiz(request, config, knowledge_base, record_summary=None):
+    if record_summary is None:
+        record_summary = get_summary_aggregator(config).record
+
+    request_id = request.get('request_id') if isinstance(request, dict) else None
+    with correlation_context(request_id or get_correlation_id()):
+        return _assemble_quiz(request, config, knowledge_base, record_summary)
+
+def _assemble_quiz(request, config, knowledge_base, record_summary):
+    settings = get_quiz_settings(config)
+    is_valid, error_msg = IOHandler.validate_quiz_request(request, settings['max_questions'])
+    if not is_valid:
+        log_debug("Quiz validation failed: %s", error_msg)
+        return None, error_msg
+
+    selected, error_msg = select_elements(knowledge_base, config, request.get('elements'), request.get('filters'))
+    if error_msg:
+        log_debug("Quiz element selection failed: %s", error_msg)
+        return None, error_msg
+
+    total = request['total_questions']
+    custom_weights = request.get('weights') or {}
+    plans = [knowledge_base.get_template_plan(path, knowledge_base.get_element(path)) for path, _ in selected]
+    weights = [
+        custom_weights.get(name, sum(weight for _, weight in plan))
+        for (_, name), plan in zip(selected, plans)
+    ]
+    allotted = apportion(total, weights, [len(plan) for plan in plans])
+    log_debug("Assembling quiz: %d questions over %d elements", total, len(selected), level='INFO')
+
+    seed = request.get('seed')
+    rng = random.Random(seed) if seed is not None else random
+    deduplicator = Deduplicator(
+        similarity_threshold=settings['similarity_threshold'],
+        use_index=config['deduplication'].get('use_index', False)
+    )
+
+    questions = []
+    element_reports = []
+    carry = 0
+    for (path, name), plan, share in zip(selected, plans, allotted):
+        # Questions another element could not deliver move on to the next one
+        target = min(share + carry, len(plan))
+        generated = []
+        if target:
+            history = _open_history(config, request, path)
+            qg = QuestionGenerator(
+                config, knowledge_base=knowledge_base,
+                seed=rng.randrange(2 ** 32) if seed is not None else None,
+                deduplicator=deduplicator,
+                history=history
+            )
+            generated = qg.generate_questions(path, target)
+            if history is not None:
+                history.save()
+            record_summary(SummaryGenerator().generate_summary(
+                name, len(generated), qg.get_statistics(), success=True
+            ))
+        carry = share + carry - len(generated)
+
+        questions.extend(question.for_element(name) for question in generated)
+        element_reports.append({
+            'element_file': name,
+            'vietnamese_name': knowledge_base.get_element(path)['vietnamese_name'],
+            'allotted': share,
+            'generated': len(generated)
+        })
+
+    if request.get('shuffle'):
+        rng.shuffle(questions)
+
+    if len(questions) < total:
+        log_debug("Quiz short by %d questions (not enough answerable templates)",
+                  total - len(questions), level='WARNING')
+
+    response = {
+        "status": "success",
+        "total_requested": total,
+        "questions_generated": len(questions),
+        "elements": element_reports,
+        "questions": questions
+    }
+    if seed is not None:
+        response["seed"] = seed
+    log_debug("SUCCESS: Assembled quiz with %d questions", len(questions), level='INFO')
+    return response, None
+
+# Elements of a quiz, as [(resolved path, request name), ...]
+"""
+Explicit 'elements' are resolved like a single request's 'element_file' and
+may then be narrowed by 'filters'; without 'elements', filters select from
+all preloaded elements. The same file listed twice is used once.
+
+Returns:
+    Tuple: (selected, error_message)
+"""
+def select_elements(knowledge_base, config, elements=None, filters=None):
+    elements_dir = config['data_paths']['chemistry_files']
+
+    unknown = [name for name in (filters or {}) if name not in FILTER_FACTS]
+    if unknown:
+        return None, f"Unknown filter(s) {unknown} (expected: {', '.join(FILTER_FACTS)})"
+
+    if elements is None:
+        candidates = [
+            (path, os.path.relpath(path, os.path.abspath(elements_dir)))
+            for path in sorted(knowledge_base.elements)
+        ]
+    else:
+        candidates = []
+        for name in elements:
+            is_valid, error_msg, full_path = IOHandler.validate_generation_request(
+                {'element_file': name, 'number_of_questions': 1}, base_path=elements_dir,
+                catalog=knowledge_base.catalog
+            )
+            if not is_valid:
+                return None, error_msg
+            candidates.append((full_path, name))
+
+    selected = []
+    seen = set()
+    for path, name in candidates:
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            continue
+        seen.add(key)
+        if filters and not matches_filters(knowledge_base.get_element(path)['facts'], filters):
+            continue
+        selected.append((path, name))
+
+    if not selected:
+        return None, "No elements match the quiz selection"
+    return selected, None
+
+# True if an element's facts satisfy every filter (case-insensitive, any listed value)
+def matches_filters(facts, filters):
+    for filter_name, wanted in filters.items():
+        fact_key = FILTER_FACTS[filter_name]
+        wanted_values = wanted if isinstance(wanted, list) else [wanted]
+        wanted_norm = {str(v).strip().lower() for v in wanted_values}
+
+        raw_fact = facts.get(fact_key)
+        if raw_fact is None:
+            return False
+        fact_values = raw_fact if isinstance(raw_fact, (list, tuple)) else (raw_fact,)
+        if not any(str(v).strip().lower() in wanted_norm for v in fact_values):
+            return False
+    return True
+
+# Split total across items by weight, never giving an item more than its capacity
+"""
+Largest-remainder apportionment, repeated while some items are full and
+questions are left over. Ties go to the earlier item.
+
+Returns:
+    List of counts, aligned with weights
+"""
+def apportion(total, weights, capacities):
+    counts = [0] * len(weights)
+    remaining = min(total, sum(capacities))
+    active = [i for i, (w, c) in enumerate(zip(weights, capacities)) if w > 0 and c > 0]
+
+    while remaining > 0 and active:
+        weight_sum = sum(weights[i] for i in active)
+        quotas = {i: remaining * weights[i] / weight_sum for i in active}
+
+        given = 0
+        for i in active:
+            share = min(int(quotas[i]), capacities[i] - counts[i])
+            counts[i] += share
+            given += share
+
+        by_remainder = sorted(active, key=lambda i: (-(quotas[i] - int(quotas[i])), i))
+        for i in by_remainder:
+            if given >= remaining:
+                break
+            if counts[i] < capacities[i]:
+                counts[i] += 1
+                given += 1
+
+        remaining -= given
+        active = [i for i in active if counts[i] < capacities[i]]
+
+    return counts
+
+# sqlite3 is only imported for quizzes with a user_id or session_id
+def _open_history(config, request, path):
+    if not request.get('user_id') and not request.get('session_id'):
+        return None
+    from src.seen_store import open_history
+    return open_history(config, request, path)
@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.logger import get_correlation_id
+from src.request_processor import process_generation_request
+from src.worker_pool import create_worker_pool, run_generation_request
+from src.utils import log_debug
+
+DEFAULT_SETTINGS = {
+    'executor': "thread",
+    'max_workers': 4,
+    'max_queue': 16,
+    'queue_timeout': 5.0,
+    'request_timeout': 30.0
+}
+
+# Why a request was not run (see GenerationExecutor.generate)
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_QUEUE_TIMEOUT = "queue_timeout"
+REJECTED_TIMEOUT = "timeout"
+
+# Runs /api/generate work off the event loop, with bounded concurrency
+"""
+Requests use the current snapshot of sources (a source_watcher.KnowledgeBaseHolder),
+read once when the request starts.
+
+Settings come from the 'server' section of config.json:
+    - executor: "thread" (shares the server's KnowledgeBase) or "process"
+      (warm worker processes, see worker_pool.init_worker)
+    - max_workers: requests running at the same time
+    - max_queue: requests allowed to wait for a free worker; beyond that,
+      new requests are rejected immediately
+    - queue_timeout: seconds a request may wait for a free worker
+    - request_timeout: seconds a request may run (null = no limit)
+
+A timed-out request keeps its worker until the work really finishes (threads
+cannot be interrupted), so the limits hold even when clients give up.
+
+Must be used from a single event loop.
+"""
+class GenerationExecutor:
+    def __init__(self, sources, settings=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.sources = sources
+        self.mode = settings['executor']
+        self.max_workers = settings['max_workers']
+        self.max_queue = settings['max_queue']
+        self.queue_timeout = settings['queue_timeout']
+        self.request_timeout = settings['request_timeout']
+
+        if self.mode == "process":
+            self.executor = create_worker_pool(sources.get().config, max_workers=self.max_workers)
+            self._thread_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stream")
+        elif self.mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="generate")
+            self._thread_executor = self.executor
+        else:
+            raise ValueError(f"Unknown server executor '{self.mode}' (expected 'thread' or 'process')")
+
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._running = 0
+        self._waiting = 0
+
+    # Generate questions for one request
+    """
+    Args:
+        request: Request dict ('element_file', 'number_of_questions')
+        record_summary: Callable recording a summary (used in 'process' mode,
+                        where summaries come back from the worker)
+    Returns:
+        Tuple: (response, error_message, rejection)
+        - response, error_message as returned by process_generation_request()
+        - rejection is None, or one of the REJECTED_* reasons when the request
+          was not run or did not finish in time
+    """
+    async def generate(self, request, record_summary=None):
+        if self.mode == "process":
+            result, rejection = await self._run(run_generation_request, request, get_correlation_id())
+            if result is None:
+                return None, None, rejection
+            response, error_msg, summary = result
+            if summary is not None and record_summary is not None:
+                record_summary(summary)
+            return response, error_msg, None
+
+        snapshot = self.sources.get()
+        result, rejection = await self._run(
+            process_generation_request, request, snapshot.config, snapshot.knowledge_base
+        )
+        if result is None:
+            return None, None, rejection
+        response, error_msg = result
+        return response, error_msg, None
+
+    # Current load, for /health
+    def get_stats(self):
+        return {
+            'executor': self.mode,
+            'max_workers': self.max_workers,
+            'running': self._running,
+            'waiting': self._waiting,
+            'max_queue': self.max_queue
+        }
+
+    # Replace the worker processes after a source reload ('process' mode only)
+    """
+    New requests go to fresh workers loaded with config; requests already
+    running on the old workers finish there.
+    """
+    def reload_workers(self, config):
+        if self.mode != "process":
+            return
+        old_executor = self.executor
+        self.executor = create_worker_pool(config, max_workers=self.max_workers)
+        old_executor.shutdown(wait=False)
+        log_debug("Generation workers replaced after a source reload", level='INFO')
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._thread_executor is not self.executor:
+            self._thread_executor.shutdown(wait=False, cancel_futures=True)
+
+    # Start a streaming request; questions are passed to on_question as they are ready
+    """
+    Streaming always runs in a thread of this process (the callback cannot
+    cross a process boundary), under the same admission limits.
+
+    Returns:
+        Tuple: (future, rejection)
+        - future resolves to process_generation_request()'s (response, error_message)
+        - rejection is None, or a REJECTED_* reason when the request was not started
+    """
+    async def start_stream(self, request, on_question, record_summary=None):
+        rejection = await self._admit()
+        if rejection is not None:
+            return None, rejection
+        snapshot = self.sources.get()
+        future = self._submit(
+            self._thread_executor, process_generation_request,
+            request, snapshot.config, snapshot.knowledge_base, record_summary, on_question
+        )
+        return future, None
+
+    # Run func(*args) in a thread of this process, under the same limits
+    """
+    For work that needs the server's own KnowledgeBase (e.g. quiz assembly).
+
+    Returns:
+        Tuple: (result, rejection)
+    """
+    async def run_in_thread(self, func, *args):
+        return await self._run(func, *args, executor=self._thread_executor)
+
+    async def _run(self, func, *args, executor=None):
+        rejection = await self._admit()
+        if rejection is not None:
+            return None, rejection
+
+        future = self._submit(executor or self.executor, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.request_timeout), None
+        except asyncio.TimeoutError:
+            log_debug("Generation timed out after %ss", self.request_timeout, level='WARNING')
+            return None, REJECTED_TIMEOUT
+
+    # Wait for a free worker slot (bounded queue)
+    async def _admit(self):
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            log_debug("Generation queue full (%d waiting)", self._waiting, level='WARNING')
+            return REJECTED_QUEUE_FULL
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            log_debug("No free generation worker after %ss", self.queue_timeout, level='WARNING')
+            return REJECTED_QUEUE_TIMEOUT
+        finally:
+            self._waiting -= 1
+        return None
+
+    # Run func on executor while holding the acquired slot until it finishes
+    def _submit(self, executor, func, *args):
+        self._running += 1
+        loop = asyncio.get_running_loop()
+        if isinstance(executor, ThreadPoolExecutor):
+            # Carry the correlation ID and request timings into the worker thread
+            future = loop.run_in_executor(executor, contextvars.copy_context().run, func, *args)
+        else:
+            future = loop.run_in_executor(executor, func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        self._running -= 1
+        self._slots.release()
+        # Retrieve the exception of abandoned (timed-out) work so asyncio does not warn about it
+        if not future.cancelled() and future.exception() is not None:
+            log_debug("Generation failed: %s", future.exception(), level='DEBUG')
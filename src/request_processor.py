@@ -0,0 +1,137 @@
+from src.utils import log_debug
+from src.logger import correlation_context, get_correlation_id
+from src.question_generator import QuestionGenerator
+from src.summary_generator import SummaryGenerator
+from src.summary_aggregator import get_summary_aggregator
+from src.response_cache import get_response_cache, make_cache_key, compute_config_hash
+from src.io_handler import IOHandler
+
+# Run one generation request end to end (validate, generate, summarize)
+"""
+Shared by main.py, server.py and the batch worker processes.
+
+Args:
+    request: Parsed request dict ('element_file', 'number_of_questions',
+             optional 'seed' for reproducible output, optional 'user_id' or
+             'session_id' to avoid repeating questions served to them before)
+    config: Loaded config.json
+    knowledge_base: Shared KnowledgeBase, or None to build a lazy one
+    record_summary: Callable taking the summary dict and returning where it was
+                    stored; defaults to the process-wide SummaryAggregator
+    on_question: Optional callable, called with each question as soon as it is
+                 ready (for streaming responses)
+Returns:
+    Tuple: (response, error_message)
+    - response is the success response dict, or None if validation failed
+    - error_message explains the validation failure
+
+Log lines are tagged with the request's 'request_id' when given, otherwise
+with the caller's correlation ID (or a fresh one).
+
+With question_bank.serve enabled, elements found in the (up to date) question
+bank are answered by sampling it; other elements are generated live.
+
+Seeded requests are answered from the process-wide ResponseCache when the
+same (element, count, seed, config) was generated recently; cache hits do not
+record a new summary. Requests with a user_id or session_id are never cached:
+their questions depend on what was served to that id before (see seen_store).
+"""
+def process_generation_request(request, config, knowledge_base=None, record_summary=None, on_question=None):
+    if record_summary is None:
+        record_summary = get_summary_aggregator(config).record
+
+    request_id = request.get('request_id') if isinstance(request, dict) else None
+    with correlation_context(request_id or get_correlation_id()):
+        return _process_generation_request(request, config, knowledge_base, record_summary, on_question)
+
+def _process_generation_request(request, config, knowledge_base, record_summary, on_question):
+    # Get base path for elements from config
+    elements_base_path = config['data_paths']['chemistry_files']
+
+    # Validate request (handles path resolution)
+    is_valid, error_msg, full_element_path = IOHandler.validate_generation_request(
+        request,
+        base_path=elements_base_path,
+        catalog=knowledge_base.catalog if knowledge_base is not None else None
+    )
+
+    if not is_valid:
+        log_debug("Validation failed: %s", error_msg)
+        return None, error_msg
+
+    # Seeded requests are deterministic, so repeats can be served from the cache
+    seed = request.get('seed')
+    history = _open_history(config, request, full_element_path)
+    cache = get_response_cache(config) if seed is not None and history is None else None
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(full_element_path, request['number_of_questions'], seed,
+                                   compute_config_hash(config))
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cached['element_file'] = request['element_file']
+            if on_question is not None:
+                for question in cached['questions']:
+                    on_question(question)
+            log_debug("Served from response cache: %s (seed %s)", full_element_path, seed, level='INFO')
+            return cached, None
+
+    # Generate questions using the RESOLVED full_element_path
+    question_bank = _get_question_bank(config)
+    if question_bank is not None and question_bank.has_element(_bank_element(config, full_element_path)):
+        from src.question_bank import BankQuestionGenerator
+        qg = BankQuestionGenerator(config, question_bank, knowledge_base=knowledge_base, seed=seed,
+                                   history=history)
+    else:
+        log_debug("Starting question generation for file: %s", full_element_path)
+        qg = QuestionGenerator(config, knowledge_base=knowledge_base, seed=seed, history=history)
+
+    summary_gen = SummaryGenerator()
+    try:
+        questions = qg.generate_questions(
+            full_element_path,
+            int(request['number_of_questions']),
+            on_question=on_question
+        )
+    except Exception as e:
+        # Still count the failed request in the aggregates
+        record_summary(summary_gen.generate_summary(
+            request['element_file'], 0, qg.get_statistics(), success=False, error_msg=str(e)
+        ))
+        raise
+    if history is not None:
+        history.save()
+
+    # Generate and record summary
+    summary = summary_gen.generate_summary(
+        request['element_file'],  # Use original filename for report
+        len(questions),
+        qg.get_statistics(),
+        success=True
+    )
+    summary_file = record_summary(summary)
+    log_debug("Summary recorded: %s", summary_file)
+
+    response = IOHandler.create_success_response(request, questions, summary_file)
+    if cache_key is not None:
+        cache.put(cache_key, response)
+    log_debug("SUCCESS: Generated %d questions", len(questions), level='INFO')
+    return response, None
+
+# The question bank module (sqlite3) is only imported when serving from a bank is enabled
+def _get_question_bank(config):
+    if not config.get('question_bank', {}).get('serve'):
+        return None
+    from src.question_bank import get_question_bank
+    return get_question_bank(config)
+
+def _bank_element(config, full_element_path):
+    from src.question_bank import get_bank_element
+    return get_bank_element(config, full_element_path)
+
+# The seen-question store (sqlite3) is only imported for requests with a user_id or session_id
+def _open_history(config, request, full_element_path):
+    if not request.get('user_id') and not request.get('session_id'):
+        return None
+    from src.seen_store import open_history
+    return open_history(config, request, full_element_path)
@@ -0,0 +1,102 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'max_entries': 512,
+    'ttl': 300.0
+}
+
+# In-memory LRU cache with a time-to-live, for seeded generation responses
+"""
+Only seeded requests are cached: with the same element, question count, seed
+and config, generation is deterministic, so a repeat can be answered from
+memory. Entries expire ttl seconds after they were stored; the least recently
+used entry is evicted once max_entries is reached.
+
+get() and put() copy the response, so callers may modify what they get back.
+"""
+class ResponseCache:
+    def __init__(self, settings=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.max_entries = settings['max_entries']
+        self.ttl = settings['ttl']
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response = entry[1]
+        return copy.deepcopy(response)
+
+    def put(self, key, response):
+        response = copy.deepcopy(response)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# Hash of the config sections that change generated output
+def compute_config_hash(config):
+    relevant = {
+        key: config.get(key)
+        for key in ('question_generation', 'question_types', 'deduplication', 'data_paths', 'question_bank')
+    }
+    encoded = json.dumps(relevant, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+# Cache key of one seeded request (full_element_path as resolved by validation)
+def make_cache_key(full_element_path, number_of_questions, seed, config_hash):
+    return (os.path.normcase(os.path.abspath(full_element_path)), int(number_of_questions), seed, config_hash)
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+# Process-wide cache, configured from the 'response_cache' section of config.json
+"""
+Returns:
+    ResponseCache, or None when caching is disabled
+"""
+def get_response_cache(config):
+    global _cache, _cache_pid
+    settings = {**DEFAULT_SETTINGS, **config.get('response_cache', {})}
+    if not settings['enabled']:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = ResponseCache(settings)
+            _cache_pid = os.getpid()
+        return _cache
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.bloom_filter import BloomFilter
+from src.utils import log_debug
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'path': "data/state/seen_questions.sqlite",
+    'bloom_capacity': 4096,
+    'bloom_error_rate': 0.01,
+    'max_cached_histories': 1024
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    id INTEGER PRIMARY KEY,
+    history TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    served_at REAL NOT NULL,
+    UNIQUE (history, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS seen_by_history ON seen (history, id);
+"""
+
+# Questions already served to a user or session, kept across requests and restarts
+"""
+Requests carrying a 'user_id' or 'session_id' get a history: the
+fingerprints of every (element, template, answer) served under that id.
+Generators then prefer combinations that are not in it (see
+QuestionGenerator), and what they serve is appended to it. A user_id wins
+over a session_id, so a student's history follows them across sessions.
+
+The history lives in a SQLite file (one row per fingerprint). In front of it
+each process keeps a BloomFilter per recently used history, so "seen
+already?" is a few bit probes in memory, not a query or a similarity scan. A
+false positive only makes an unseen question look seen, i.e. less preferred.
+Each request catches its filter up with rows written since (by other
+requests, worker processes or the daemon) with one indexed query.
+
+Settings come from the 'seen_questions' section of config.json:
+    - enabled: false ignores user_id/session_id
+    - path: SQLite file
+    - bloom_capacity, bloom_error_rate: size of a new history's filter (a
+      history outgrowing it gets a filter twice its size)
+    - max_cached_histories: filters kept in memory (least recently used go)
+"""
+
+def get_seen_store_settings(config):
+    return {**DEFAULT_SETTINGS, **config.get('seen_questions', {})}
+
+# History key of a request, or None for anonymous requests
+def get_history_key(request):
+    if request.get('user_id'):
+        return f"user:{request['user_id']}"
+    if request.get('session_id'):
+        return f"session:{request['session_id']}"
+    return None
+
+# Element name used in fingerprints (the file path relative to the elements directory)
+def get_element_key(config, element_file):
+    elements_dir = os.path.normcase(os.path.abspath(config['data_paths']['chemistry_files']))
+    return os.path.relpath(os.path.normcase(os.path.abspath(element_file)), elements_dir)
+
+# Signed 64-bit fingerprint of one (element, template, answer) combination
+def question_fingerprint(element, template, answer):
+    text = f"{element}\x1f{template}\x1f{str(answer).strip().lower()}"
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+# One request's view of a history, for one element
+"""
+is_seen() probes the history's filter; add() collects what the request
+serves, and save() appends it to the store once the request is done.
+"""
+class SeenHistory:
+    def __init__(self, store, key, element, bloom):
+        self.store = store
+        self.key = key
+        self.element = element
+        self._bloom = bloom
+        self._served = []
+
+    def is_seen(self, template, answer):
+        return question_fingerprint(self.element, template, answer) in self._bloom
+
+    def add(self, template, answer):
+        self._served.append(question_fingerprint(self.element, template, answer))
+
+    def save(self):
+        if self._served:
+            self.store.record(self.key, self._served)
+            self._served = []
+
+# SQLite-backed seen-question histories with an in-memory Bloom filter per history (thread-safe)
+class SeenQuestionStore:
+    def __init__(self, path, settings=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.path = path
+        self.bloom_capacity = settings['bloom_capacity']
+        self.bloom_error_rate = settings['bloom_error_rate']
+        self.max_cached_histories = settings['max_cached_histories']
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._lock = threading.Lock()
+        # history key -> [BloomFilter, id of the last row it contains]
+        self._filters = OrderedDict()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    # SeenHistory of one history key for one element
+    def history(self, key, element):
+        with self._lock:
+            bloom = self._sync(key)
+        return SeenHistory(self, key, element, bloom)
+
+    # Append fingerprints to a history (already stored ones are skipped)
+    def record(self, key, fingerprints):
+        served_at = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO seen (history, fingerprint, served_at) VALUES (?, ?, ?)",
+                        [(key, fingerprint, served_at) for fingerprint in fingerprints]
+                    )
+            except sqlite3.Error as e:
+                log_debug("Could not record seen questions for %s: %s", key, e, level='WARNING')
+                return
+            self._sync(key)
+
+    def close(self):
+        with self._lock:
+            self._filters.clear()
+            self._conn.close()
+
+    # Bring a history's filter up to date with the store (caller holds the lock)
+    def _sync(self, key):
+        entry = self._filters.get(key)
+        last_id = entry[1] if entry is not None else 0
+        try:
+            rows = self._conn.execute(
+                "SELECT id, fingerprint FROM seen WHERE history = ? AND id > ? ORDER BY id",
+                (key, last_id)
+            ).fetchall()
+        except sqlite3.Error as e:
+            log_debug("Could not read seen questions for %s: %s", key, e, level='WARNING')
+            rows = []
+
+        if entry is not None and entry[0].count + len(rows) > entry[0].capacity:
+            # Outgrown: rebuild from the whole history at twice its size
+            del self._filters[key]
+            return self._sync(key)
+        if entry is None:
+            entry = [BloomFilter(max(self.bloom_capacity, 2 * len(rows)), self.bloom_error_rate), 0]
+            self._filters[key] = entry
+
+        for row_id, fingerprint in rows:
+            entry[0].add(fingerprint)
+            entry[1] = row_id
+
+        self._filters.move_to_end(key)
+        while len(self._filters) > self.max_cached_histories:
+            self._filters.popitem(last=False)
+        return entry[0]
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+# Process-wide store, configured from the 'seen_questions' section of config.json
+"""
+Returns:
+    SeenQuestionStore, or None when it is disabled or its file cannot be
+    opened (requests are then served without a history)
+"""
+def get_seen_store(config):
+    global _store, _store_pid
+    settings = get_seen_store_settings(config)
+    if not settings['enabled']:
+        return None
+
+    with _store_lock:
+        if _store_pid != os.getpid():
+            try:
+                _store = SeenQuestionStore(settings['path'], settings)
+            except (OSError, sqlite3.Error) as e:
+                log_debug("Could not open seen-question store %s: %s", settings['path'], e, level='WARNING')
+                _store = None
+            _store_pid = os.getpid()
+        return _store
+
+# SeenHistory for a request, or None when it has no user_id/session_id or the store is off
+def open_history(config, request, element_file):
+    key = get_history_key(request)
+    if key is None:
+        return None
+    store = get_seen_store(config)
+    if store is None:
+        return None
+    return store.history(key, get_element_key(config, element_file))
@@ -0,0 +1,47 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: the standard json module is used instead
+    orjson = None
+
+# JSON encoding of responses
+"""
+With orjson installed, responses are encoded in one call, straight to bytes.
+Question records go through to_dict() with either encoder: orjson's own
+dataclass path reads slotted fields one getattr at a time and measured about
+twice as slow as handing it the dict.
+
+Output is compact (no whitespace) unless pretty is set, which gives the
+indent=2 layout of json.dumps(..., ensure_ascii=False, indent=2). Non-ASCII
+text is written as UTF-8, never escaped.
+"""
+
+def _default(obj):
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+# Encode to UTF-8 bytes (for HTTP bodies and sockets)
+def dumps_bytes(data, pretty=False):
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATACLASS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    return dumps(data, pretty).encode('utf-8')
+
+# Encode to str (for text streams)
+def dumps(data, pretty=False):
+    if orjson is not None:
+        return dumps_bytes(data, pretty).decode('utf-8')
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2, default=_default)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_default)
+
+# Decode JSON from str or bytes; raises ValueError on invalid input
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,111 @@
+import math
+from collections import defaultdict
+import numpy as np
+
+# Character n-gram TF-IDF index over the values of one CSV column
+"""
+Built once per column. Each value is lowercased, padded with a space on both
+sides and split into character n-grams (2 and 3 by default). Weights are
+TF-IDF, L2-normalized per value, and stored as an inverted sparse matrix:
+
+    term_indptr[t]:term_indptr[t+1] -> slice of (doc_ids, weights) for term t
+
+A query is scored against every value with a single weighted bincount over
+the posting lists of its n-grams (cosine similarity).
+"""
+class NgramIndex:
+    def __init__(self, values, ngram_sizes=(2, 3)):
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.size = len(values)
+
+        doc_terms = [self._ngram_counts(str(v).lower()) for v in values]
+
+        document_frequency = defaultdict(int)
+        for counts in doc_terms:
+            for term in counts:
+                document_frequency[term] += 1
+
+        self.vocabulary = {term: i for i, term in enumerate(sorted(document_frequency))}
+        self.idf = np.array([
+            math.log((1 + self.size) / (1 + document_frequency[term])) + 1.0
+            for term in sorted(document_frequency)
+        ], dtype=np.float64)
+
+        # Collect (term, doc, weight) triples, then sort by term for the inverted layout
+        postings = []
+        for doc_id, counts in enumerate(doc_terms):
+            weighted = {term: tf * self.idf[self.vocabulary[term]] for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weighted.values())) or 1.0
+            for term, w in weighted.items():
+                postings.append((self.vocabulary[term], doc_id, w / norm))
+        postings.sort()
+
+        term_ids = np.array([p[0] for p in postings], dtype=np.int64)
+        self.doc_ids = np.array([p[1] for p in postings], dtype=np.int64)
+        self.weights = np.array([p[2] for p in postings], dtype=np.float64)
+        self.term_indptr = np.searchsorted(term_ids, np.arange(len(self.vocabulary) + 1))
+
+    def _ngram_counts(self, text):
+        padded = f" {text.strip()} "
+        counts = defaultdict(int)
+        for n in self.ngram_sizes:
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+        return counts
+
+    # Cosine similarity of text against every indexed value
+    """
+    Returns:
+        NumPy array of length `size`; values sharing no n-gram score 0.0
+    """
+    def scores(self, text):
+        counts = self._ngram_counts(str(text).lower())
+
+        slices = []
+        query_weights = []
+        for term, tf in counts.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_indptr[term_id], self.term_indptr[term_id + 1]
+            slices.append(np.arange(start, end))
+            query_weights.append(np.full(end - start, tf * self.idf[term_id]))
+
+        if not slices:
+            return np.zeros(self.size)
+
+        positions = np.concatenate(slices)
+        query = np.concatenate(query_weights)
+        query_norm = math.sqrt(sum(
+            (tf * self.idf[self.vocabulary[t]]) ** 2 for t, tf in counts.items() if t in self.vocabulary
+        ))
+
+        return np.bincount(
+            self.doc_ids[positions],
+            weights=self.weights[positions] * query,
+            minlength=self.size
+        ) / query_norm
+
+    # Positions of the k most similar values, best first
+    """
+    Args:
+        exclude: Positions that must never be returned (e.g. the correct answer)
+    """
+    def top_k(self, text, k, exclude=()):
+        scores = self.scores(text)
+        exclude = set(exclude)
+        if exclude:
+            scores[list(exclude)] = -1.0
+
+        available = self.size - len(exclude)
+        k = min(k, available)
+        if k <= 0:
+            return []
+
+        if k < self.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(self.size)
+        # Stable order: score descending, then position (CSV order)
+        ordered = sorted(top.tolist(), key=lambda pos: (-scores[pos], pos))
+        return [pos for pos in ordered if scores[pos] >= 0.0]
@@ -0,0 +1,205 @@
+import os
+import threading
+from collections import namedtuple
+from src.corpus import compute_source_hash, get_corpus_path, write_corpus
+from src.knowledge_base import KnowledgeBase
+from src.response_cache import get_response_cache
+from src.utils import load_config, log_debug
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'poll_interval': 2.0
+}
+
+DEFAULT_CONFIG_PATH = "config/config.json"
+
+# One consistent (config, knowledge base) pair; never modified once published
+Snapshot = namedtuple('Snapshot', ['version', 'config', 'knowledge_base'])
+
+def get_hot_reload_settings(config):
+    return {**DEFAULT_SETTINGS, **config.get('hot_reload', {})}
+
+# Current snapshot of the live-editable sources
+"""
+Readers call get() once per request and use that snapshot throughout, so a
+request never mixes an old config with a new knowledge base. swap() replaces
+the snapshot with a single attribute assignment.
+"""
+class KnowledgeBaseHolder:
+    def __init__(self, config, knowledge_base):
+        self._snapshot = Snapshot(1, config, knowledge_base)
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._snapshot
+
+    def swap(self, config, knowledge_base):
+        with self._lock:
+            self._snapshot = Snapshot(self._snapshot.version + 1, config, knowledge_base)
+            return self._snapshot
+
+# Polls config.json, the facts CSV and the element files, and swaps in rebuilt snapshots
+"""
+Each poll compares (mtime, size) of every source with the last poll. A change
+is applied once it has been stable for one poll interval (so half-written
+files are not loaded), rebuilding only what it affects:
+    - an element file: that element's facts and template plan
+    - the facts CSV: the indexes of columns whose values changed, and the plans
+    - config question_types: the template table and the plans
+    - config data_paths: everything
+    - any other config change: only the config itself
+The rebuild runs in the watcher thread; if it fails (or config.json does not
+parse), the old snapshot keeps being served until the sources change again. After a swap the response cache is cleared, the question bank is
+re-checked against the new sources, the compiled corpus is rewritten and
+listeners are called with the new snapshot.
+
+Sections read once at startup (server, batch, daemon, logging, summaries,
+hot_reload) still need a restart.
+"""
+class SourceWatcher:
+    def __init__(self, holder, config_path=DEFAULT_CONFIG_PATH, settings=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.holder = holder
+        self.config_path = config_path
+        self.poll_interval = settings['poll_interval']
+        self._listeners = []
+        self._state = self._scan(holder.get().config)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="source-watcher", daemon=True)
+
+    # Call listener(snapshot) after every swap (from the watcher thread)
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def start(self):
+        self._thread.start()
+        log_debug("Watching sources for changes every %ss", self.poll_interval, level='INFO')
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                log_debug("Source watcher failed: %s", e, level='ERROR')
+
+    # One poll
+    """
+    Args:
+        settle: Wait for a change to be seen unchanged on a second poll
+                before applying it (False applies it right away)
+    Returns:
+        The new Snapshot if one was swapped in, else None
+    """
+    def check(self, settle=True):
+        with self._lock:
+            snapshot = self.holder.get()
+            state = self._scan(snapshot.config)
+            if state == self._state:
+                self._pending = None
+                return None
+            if settle and state != self._pending:
+                self._pending = state
+                return None
+
+            changed = {path for path in set(state) | set(self._state) if state.get(path) != self._state.get(path)}
+            self._state = state
+            self._pending = None
+            return self._reload(snapshot, changed)
+
+    def _reload(self, snapshot, changed):
+        config = snapshot.config
+        if self.config_path in changed:
+            try:
+                config = load_config(self.config_path)
+            except (OSError, ValueError) as e:
+                log_debug("Could not reload %s, keeping the current config: %s", self.config_path, e, level='ERROR')
+                return None
+
+        old_paths = snapshot.config['data_paths']
+        new_paths = config['data_paths']
+        log_debug("Sources changed: %s", sorted(changed), level='INFO')
+        try:
+            if (new_paths['chemistry_files'] != old_paths['chemistry_files']
+                    or new_paths['facts_database'] != old_paths['facts_database']):
+                knowledge_base = KnowledgeBase(config)
+                self._state = self._scan(config)
+            else:
+                knowledge_base = snapshot.knowledge_base.rebuild(
+                    config,
+                    reload_facts=new_paths['facts_database'] in changed,
+                    reload_templates=config.get('question_types') != snapshot.config.get('question_types'),
+                    changed_elements=[path for path in changed if _is_element_file(path, new_paths)]
+                )
+        except Exception as e:
+            log_debug("Could not rebuild the knowledge base, keeping the current one: %s", e, level='ERROR')
+            return None
+
+        new_snapshot = self.holder.swap(config, knowledge_base)
+        log_debug("Swapped in sources version %d", new_snapshot.version, level='INFO')
+        self._after_swap(new_snapshot, snapshot.config)
+        return new_snapshot
+
+    def _after_swap(self, snapshot, old_config):
+        config = snapshot.config
+        response_cache = get_response_cache(config)
+        if response_cache is not None:
+            response_cache.clear()
+
+        if config.get('question_bank', {}).get('serve') or old_config.get('question_bank', {}).get('serve'):
+            from src.question_bank import reset_question_bank
+            reset_question_bank()
+
+        # New worker processes (and the next cold start) load this instead of re-parsing
+        try:
+            write_corpus(snapshot.knowledge_base, compute_source_hash(config), get_corpus_path(config))
+        except OSError as e:
+            log_debug("Could not write compiled corpus: %s", e, level='WARNING')
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                log_debug("Source reload listener failed: %s", e, level='ERROR')
+
+    # path -> (mtime, size) of config.json, the facts CSV and every element file
+    def _scan(self, config):
+        paths = [self.config_path, config['data_paths']['facts_database']]
+        elements_dir = config['data_paths']['chemistry_files']
+        if os.path.isdir(elements_dir):
+            paths.extend(
+                os.path.join(elements_dir, name)
+                for name in sorted(os.listdir(elements_dir))
+                if name.endswith('.txt')
+            )
+
+        state = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+def _is_element_file(path, data_paths):
+    elements_dir = os.path.normpath(data_paths['chemistry_files'])
+    return os.path.dirname(os.path.normpath(path)) == elements_dir and path.endswith('.txt')
+
+# Watch the holder's sources in the background, if hot_reload is enabled
+"""
+Returns:
+    The started SourceWatcher, or None when hot_reload.enabled is false
+"""
+def start_source_watcher(holder, config_path=DEFAULT_CONFIG_PATH):
+    settings = get_hot_reload_settings(holder.get().config)
+    if not settings['enabled']:
+        return None
+    return SourceWatcher(holder, config_path, settings).start()
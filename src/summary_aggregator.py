@@ -0,0 +1,177 @@
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from src.logger import append_with_rotation
+from src.utils import log_debug
+
+DEFAULT_SETTINGS = {
+    'sink': "output/summaries/summaries.jsonl",
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'flush_interval': 1.0,
+    'max_pending': 10000
+}
+
+# In-process summary aggregator with an asynchronously flushed JSONL sink
+"""
+Replaces one summary_<timestamp>.json file per request:
+    - record() updates rolling per-element stats and queues the summary
+    - a background thread appends queued summaries to one JSONL file,
+      rotating it by size (summaries.jsonl -> .1 -> ... -> .backup_count)
+      under the same cross-process lock as the log file
+    - summaries a failed write could not store stay queued for the next
+      flush, up to max_pending; beyond that the oldest are dropped and
+      counted as 'lost_summaries'
+    - get_aggregates() returns the rolling stats (served by /api/summary)
+"""
+class SummaryAggregator:
+    def __init__(self, settings=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.sink_path = settings['sink']
+        self.max_bytes = settings['max_bytes']
+        self.backup_count = settings['backup_count']
+        self.flush_interval = settings['flush_interval']
+        self.max_pending = settings['max_pending']
+
+        self.started = datetime.now().isoformat()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._elements = {}
+        self._pending = []
+        self._lost = 0
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="summary-flusher", daemon=True)
+        self._thread.start()
+
+    # Add one SummaryGenerator summary to the aggregates and the sink queue
+    """
+    Returns:
+        Path of the JSONL sink the summary will be written to
+    """
+    def record(self, summary):
+        metadata = summary['metadata']
+        performance = summary['performance']
+        quality = summary['quality_metrics']
+        element = metadata['element_file']
+
+        with self._lock:
+            stats = self._elements.get(element)
+            if stats is None:
+                stats = self._elements[element] = {
+                    'requests': 0,
+                    'failed_requests': 0,
+                    'questions_generated': 0,
+                    'total_attempts': 0,
+                    'failed_generations': 0,
+                    'duplicates_found': 0,
+                    'confidence_sum': 0.0,
+                    'last_request': None
+                }
+            stats['requests'] += 1
+            if not metadata['success']:
+                stats['failed_requests'] += 1
+            stats['questions_generated'] += performance['questions_generated']
+            stats['total_attempts'] += performance['total_attempts']
+            stats['failed_generations'] += quality.get('failed_template_generations', 0)
+            stats['duplicates_found'] += quality.get('duplicates_found_and_removed', 0)
+            stats['confidence_sum'] += summary['debug_info']['confidence_score']
+            stats['last_request'] = metadata['timestamp']
+
+            self._pending.append(summary)
+
+        return self.sink_path
+
+    # Rolling stats per element plus overall totals
+    def get_aggregates(self):
+        with self._lock:
+            elements = {name: dict(stats) for name, stats in self._elements.items()}
+            lost = self._lost
+
+        totals = {
+            'requests': 0,
+            'failed_requests': 0,
+            'questions_generated': 0,
+            'total_attempts': 0,
+            'failed_generations': 0,
+            'duplicates_found': 0
+        }
+        confidence_sum = 0.0
+        for stats in elements.values():
+            for key in totals:
+                totals[key] += stats[key]
+            element_confidence = stats.pop('confidence_sum')
+            confidence_sum += element_confidence
+            stats['average_confidence'] = round(element_confidence / stats['requests'], 4)
+
+        totals['average_confidence'] = round(confidence_sum / totals['requests'], 4) if totals['requests'] else 0.0
+
+        return {
+            'since': self.started,
+            'sink_file': self.sink_path,
+            'lost_summaries': lost,
+            'totals': totals,
+            'elements': elements
+        }
+
+    # Write everything recorded so far (blocks until done)
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except OSError as e:
+                self._requeue(pending)
+                log_debug("Could not write summaries to %s (%d kept for the next flush): %s",
+                          self.sink_path, len(pending), e, level='ERROR')
+
+    # Put unwritten summaries back in front of newer ones, dropping the oldest past max_pending
+    def _requeue(self, summaries):
+        with self._lock:
+            self._pending = summaries + self._pending
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self._lost += overflow
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(5.0)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log_debug("Could not flush summaries: %s", e, level='ERROR')
+
+    def _write(self, summaries):
+        data = ''.join(json.dumps(s, ensure_ascii=False) + '\n' for s in summaries).encode('utf-8')
+        append_with_rotation(self.sink_path, data, self.max_bytes, self.backup_count)
+
+def get_summary_sink_path(config):
+    return config.get('summaries', {}).get('sink', DEFAULT_SETTINGS['sink'])
+
+_aggregator = None
+_aggregator_pid = None
+_aggregator_lock = threading.Lock()
+
+# Process-wide aggregator, configured from the 'summaries' section of config.json
+def get_summary_aggregator(config):
+    global _aggregator, _aggregator_pid
+    with _aggregator_lock:
+        if _aggregator is None or _aggregator_pid != os.getpid():
+            _aggregator = SummaryAggregator(config.get('summaries'))
+            _aggregator_pid = os.getpid()
+            atexit.register(_aggregator.close)
+        return _aggregator
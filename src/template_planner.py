@@ -0,0 +1,106 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from src.question_templates import get_template
+from src.utils import log_debug
+
+# Minimum number of wrong answers a question needs
+REQUIRED_DISTRACTORS = 3
+
+# Resolve every template's fact key and CSV column once, at startup
+"""
+Catches template/CSV schema mismatches up front instead of per request:
+    - categories with stray whitespace (e.g. "Loại nguyên tố ") are matched
+      on their stripped name, which is how element facts and CSV headers
+      are stored
+    - duplicated CSV headers (the second "Loại nguyên tố" is loaded as
+      "Loại nguyên tố.1") are reported; the first column is used
+    - categories with no CSV column are reported and never planned
+
+Returns:
+    Dict: template name -> {'fact_key': str, 'column': str or None}
+"""
+def resolve_template_schema(template_names, column_names):
+    columns = set(column_names)
+    specs = {}
+
+    for name in template_names:
+        category = get_template(name)['category']
+        key = category.strip()
+        if key != category:
+            log_debug("Template '%s': category '%s' has surrounding whitespace, using '%s'",
+                      name, category, key, level='WARNING')
+
+        column = key if key in columns else None
+        if column is None:
+            log_debug("Template '%s': no CSV column for category '%s'", name, key, level='WARNING')
+        else:
+            duplicates = [c for c in column_names
+                          if c.startswith(key + '.') and c[len(key) + 1:].isdigit()]
+            if duplicates:
+                log_debug("Template '%s': CSV column '%s' is duplicated as %s, using the first one",
+                          name, key, duplicates, level='WARNING')
+
+        specs[name] = {'fact_key': key, 'column': column}
+
+    return specs
+
+# Templates that can produce a question for one element
+"""
+A template is answerable when the element has the fact, the CSV has the
+column, and the column holds at least REQUIRED_DISTRACTORS values that are
+not one of the element's correct answers (the padding fallback can always
+reach them).
+
+Args:
+    facts: The element's facts mapping
+    template_table: Dict template name -> sampling weight
+    template_specs: Output of resolve_template_schema()
+    distractors: DistractorsLoader
+Returns:
+    Tuple of (template name, weight), in template_table order
+"""
+def answerable_templates(facts, template_table, template_specs, distractors):
+    plan = []
+    for name, weight in template_table.items():
+        spec = template_specs.get(name)
+        if spec is None or spec['column'] is None:
+            continue
+
+        raw_fact = facts.get(spec['fact_key'])
+        if raw_fact is None:
+            continue
+
+        answers = raw_fact if isinstance(raw_fact, (list, tuple)) else (raw_fact,)
+        correct = {str(x).strip().lower() for x in answers}
+
+        wrong_values = set()
+        for value in distractors.get_all_values_for_category(spec['column']):
+            value_str = str(value).strip().lower()
+            if value_str not in correct:
+                wrong_values.add(value_str)
+                if len(wrong_values) >= REQUIRED_DISTRACTORS:
+                    break
+
+        if len(wrong_values) >= REQUIRED_DISTRACTORS:
+            plan.append((name, weight))
+
+    return tuple(plan)
+
+# Weighted sampling without replacement
+"""
+Yields template names from plan [(name, weight), ...] in a random order where
+heavier templates tend to come first. Each draw is a bisect over cumulative
+weights; the drawn template is then removed, so every template is yielded at
+most once.
+"""
+def sample_templates(plan, rng=random):
+    names = [name for name, _ in plan]
+    weights = [weight for _, weight in plan]
+
+    while names:
+        cumulative = list(accumulate(weights))
+        pick = bisect_right(cumulative, rng.random() * cumulative[-1])
+        pick = min(pick, len(names) - 1)
+        yield names.pop(pick)
+        weights.pop(pick)
@@ -2,6 +2,7 @@ import json
 import os
 from datetime import datetime
 import re
+from src.logger import log, is_enabled
 
 # Load configuration from config.json
 def load_config(config_path="config/config.json"):
@@ -74,11 +75,17 @@ def extract_vietnamese_name(element_file_path):
     return None
 
 # Debug logging
-def log_debug(message, debug_file="logs/debug.log"):
-    os.makedirs(os.path.dirname(debug_file) or '.', exist_ok=True)
-    timestamp = datetime.now().strftime("%d%m%Y %H:%M:%S")
-    with open(debug_file, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] {message}\n")
+"""
+Queued to the background writer in src.logger. Pass values as %-style args
+(log_debug("Got %d items", n)) so the string is only built when the level is
+enabled, and on the writer thread.
+"""
+def log_debug(message, *args, level='DEBUG'):
+    log(message, *args, level=level)
+
+# True when DEBUG messages are written (skip building expensive log data otherwise)
+def is_debug_enabled():
+    return is_enabled('DEBUG')
 
 # Extract number from string
 def extract_number(text):
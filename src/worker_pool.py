@@ -0,0 +1,124 @@
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from src.corpus import load_knowledge_base
+from src.request_processor import process_generation_request
+from src.io_handler import IOHandler
+from src.utils import log_debug
+from src.logger import configure_logging, correlation_context
+from src.summary_aggregator import get_summary_sink_path
+
+# Per-process state, filled once by init_worker()
+_worker_state = {}
+
+# Process pool initializer: load config-dependent data once per worker
+def init_worker(config):
+    configure_logging(config)
+    _worker_state['config'] = config
+    _worker_state['knowledge_base'] = load_knowledge_base(config)
+    log_debug("Batch worker ready")
+
+# Generate one batch item inside a worker process
+"""
+Args:
+    index: Position of the item in the batch request
+    request: Item dict ('element_file', 'number_of_questions')
+    correlation_id: Log correlation ID for this item (contextvars do not
+                    cross the process boundary, so it is passed explicitly)
+Returns:
+    Tuple: (result, summary)
+    - result is the response dict tagged with 'index'; validation and
+      unexpected errors become error responses so one bad item never fails
+      the whole batch
+    - summary is the generation summary (or None), returned so the parent
+      process can record it in its SummaryAggregator
+"""
+def run_batch_item(index, request, correlation_id=None):
+    with correlation_context(correlation_id):
+        return _run_batch_item(index, request)
+
+def _run_batch_item(index, request):
+    return generate_batch_item(index, request, _worker_state['config'], _worker_state['knowledge_base'])
+
+# Generate one batch item with the given knowledge base (any process)
+"""
+Shared by the batch worker processes and main.py's in-process batch mode.
+Returns the same (result, summary) tuple as run_batch_item(); the result also
+carries the request's 'request_id' when it has one.
+"""
+def generate_batch_item(index, request, config, knowledge_base):
+    summaries = []
+
+    def collect_summary(summary):
+        summaries.append(summary)
+        return get_summary_sink_path(config)
+
+    try:
+        response, error_msg = process_generation_request(
+            request,
+            config,
+            knowledge_base=knowledge_base,
+            record_summary=collect_summary
+        )
+        if response is None:
+            response = IOHandler.create_error_response(error_msg, "Request validation failed")
+    except Exception as e:
+        log_debug("BATCH WORKER ERROR: %s", e, level='ERROR')
+        log_debug(traceback.format_exc(), level='ERROR')
+        response = IOHandler.create_error_response(str(e), f"Unexpected error: {type(e).__name__}")
+
+    result = {'index': index, **response}
+    if isinstance(request, dict):
+        result.setdefault('element_file', request.get('element_file'))
+        if request.get('request_id') is not None:
+            result['request_id'] = request['request_id']
+    return result, (summaries[0] if summaries else None)
+
+# Generate one /api/generate request inside a worker process
+"""
+Used when the server's generation executor runs in 'process' mode.
+
+Returns:
+    Tuple: (response, error_message, summary)
+    - response and error_message as returned by process_generation_request()
+    - summary is the generation summary (or None), for the parent process to
+      record in its SummaryAggregator
+
+Unexpected errors are re-raised to the caller.
+"""
+def run_generation_request(request, correlation_id=None):
+    with correlation_context(correlation_id):
+        config = _worker_state['config']
+        summaries = []
+
+        def collect_summary(summary):
+            summaries.append(summary)
+            return get_summary_sink_path(config)
+
+        response, error_msg = process_generation_request(
+            request,
+            config,
+            knowledge_base=_worker_state['knowledge_base'],
+            record_summary=collect_summary
+        )
+        return response, error_msg, (summaries[0] if summaries else None)
+
+# Create a process pool whose workers each hold a warm KnowledgeBase
+"""
+Workers are started with 'spawn', not fork: they start on the first
+submitted item, when the parent already runs background threads (log
+writer, summary flusher, source watcher), and a forked child inherits any
+lock one of them held at that moment, locked for good. init_worker() builds
+all worker state from config, so nothing is lost by not forking.
+
+Spawn does run the parent's main script again in each worker (imported as
+__mp_main__), so a script using the pool must keep its set-up out of module
+level: server.py loads config and knowledge base in its startup event.
+"""
+def create_worker_pool(config, max_workers=None):
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(config,)
+    )
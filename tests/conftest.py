@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.utils import load_config
+from src.logger import configure_logging
+
+# Paths in config.json are relative to the repository root
+os.chdir(ROOT_DIR)
+
+@pytest.fixture(scope="session")
+def config(tmp_path_factory):
+    config = load_config()
+    # Keep test runs out of logs/debug.log
+    config['logging'] = {**config.get('logging', {}), 'file': str(tmp_path_factory.mktemp("logs") / "debug.log")}
+    configure_logging(config)
+    return config
+
+@pytest.fixture(scope="session")
+def knowledge_base(config):
+    from src.corpus import load_knowledge_base
+    return load_knowledge_base(config)
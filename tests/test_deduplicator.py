@@ -0,0 +1,85 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from src.char_count_index import CharCountIndex
+from src.deduplicator import Deduplicator
+
+ALPHABET = "aab cdeéêơư  "
+
+def random_texts(rng, count):
+    bases = [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12))) for _ in range(5)]
+    texts = []
+    for _ in range(count):
+        chars = list(rng.choice(bases))
+        for _ in range(rng.randint(0, 3)):
+            if chars and rng.random() < 0.5:
+                del chars[rng.randrange(len(chars))]
+            else:
+                chars.insert(rng.randrange(len(chars) + 1), rng.choice(ALPHABET))
+        texts.append(''.join(chars))
+    return texts
+
+# One to three character edits, as a typo'd resubmission would have
+def perturb(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        position = rng.randrange(len(chars))
+        if rng.random() < 0.5 or len(chars) == 1:
+            chars[position] = rng.choice("abcdeghiklmnopqrstuvxy ")
+        else:
+            del chars[position]
+    return ''.join(chars)
+
+# Candidates are exactly the stored texts passing difflib's quick_ratio() bound
+@pytest.mark.parametrize("threshold", [0.0, 0.5, 0.7, 0.85, 0.99, 1.0])
+def test_candidates_match_quick_ratio(threshold):
+    rng = random.Random(threshold)
+    index = CharCountIndex(threshold)
+    stored = []
+    for text in random_texts(rng, 300):
+        limit = rng.choice([None, rng.randint(0, len(stored) + 1)])
+        size = len(stored) if limit is None else min(limit, len(stored))
+        expected = [
+            position for position in range(size)
+            if SequenceMatcher(None, text, stored[position]).quick_ratio() >= threshold
+        ]
+        assert index.candidates(text, limit=limit) == expected
+        stored.append(text)
+        index.add(text)
+
+def test_empty_texts_only_match_each_other():
+    index = CharCountIndex(0.85)
+    index.add("")
+    index.add("abc")
+    assert index.candidates("") == [0]
+    assert index.candidates("abc") == [1]
+
+@pytest.mark.parametrize("threshold", [0.7, 0.85, 0.99])
+def test_indexed_verdicts_match_linear_scan(knowledge_base, threshold):
+    rng = random.Random(7)
+    names = sorted(
+        {extracted['vietnamese_name'] for extracted in knowledge_base.elements.values()} |
+        {extracted['english_name'] for extracted in knowledge_base.elements.values() if extracted['english_name']}
+    )
+    stored = names[:60]
+    queries = [perturb(rng.choice(stored), rng) for _ in range(200)] + names[60:]
+
+    linear = Deduplicator(similarity_threshold=threshold, use_index=False)
+    indexed = Deduplicator(similarity_threshold=threshold, use_index=True)
+    for text in stored:
+        linear.add_question(text)
+        indexed.add_question(text)
+
+    for query in queries:
+        assert indexed.is_duplicate(query) == linear.is_duplicate(query)
+    batch = stored[:30] + queries[:70]
+    assert indexed.get_duplicates_in_batch(batch) == linear.get_duplicates_in_batch(batch)
+
+# One-character typos of short names were missed by the word-shingle MinHash index
+def test_short_typo_is_found():
+    for use_index in (False, True):
+        dedup = Deduplicator(similarity_threshold=0.85, use_index=use_index)
+        dedup.add_question("Photphorus")
+        assert dedup.is_duplicate("Photphoros") == (True, "Photphorus", 0.9)
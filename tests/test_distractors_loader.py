@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from src.distractors_loader import read_csv_columns
+
+CSV_PATH = "data/facts_database/chemistry_facts.csv"
+
+def _same(left, right):
+    if isinstance(left, float) and isinstance(right, float) and math.isnan(left) and math.isnan(right):
+        return True
+    return left == right and type(left) is type(right)
+
+# The csv-module reader returns what the pandas-based loader used to
+def test_matches_pandas_on_facts_csv():
+    pd = pytest.importorskip("pandas")
+    frame = pd.read_csv(CSV_PATH)
+    row_count, column_names, columns = read_csv_columns(CSV_PATH)
+
+    assert row_count == len(frame)
+    assert column_names == list(frame.columns)
+    for name in column_names:
+        expected = [value.item() if hasattr(value, 'item') else value
+                    for value in frame[name].dropna().unique().tolist()]
+        assert len(columns[name]) == len(expected), name
+        assert all(_same(a, b) for a, b in zip(columns[name], expected)), name
+
+def test_column_types_and_missing_cells(tmp_path):
+    path = tmp_path / "facts.csv"
+    path.write_text("a,b,c,a\n1,1.5,x,1\n2,,NA,2\n1,2.5,x,\n", encoding='utf-8')
+    row_count, column_names, columns = read_csv_columns(str(path))
+
+    assert row_count == 3
+    assert column_names == ["a", "b", "c", "a.1"]
+    assert columns["a"] == [1, 2]
+    assert columns["b"] == [1.5, 2.5]
+    assert columns["c"] == ["x"]
+    assert columns["a.1"] == [1.0, 2.0] and isinstance(columns["a.1"][0], float)
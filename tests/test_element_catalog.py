@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from src.io_handler import IOHandler
+
+def validate(config, knowledge_base, element_file):
+    request = {'element_file': element_file, 'number_of_questions': 1}
+    return IOHandler.validate_generation_request(
+        request, base_path=config['data_paths']['chemistry_files'], catalog=knowledge_base.catalog
+    )
+
+# Existing files are used as given, never swapped for a similar catalog entry
+@pytest.mark.parametrize("directory", ["data/chemistry_files", "data/questions_context_fetching_database"])
+def test_existing_paths_resolve_to_themselves(config, knowledge_base, directory):
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        is_valid, error, full_path = validate(config, knowledge_base, path)
+        assert is_valid, error
+        assert full_path == path
+
+def test_near_namesakes_are_not_redirected(config, knowledge_base):
+    for name in ("Terbi.txt", "Protactini.txt", "Yterbi.txt"):
+        path = os.path.join("data/chemistry_files", name)
+        assert validate(config, knowledge_base, path)[2] == path
+
+@pytest.mark.parametrize("name", ["Copper.txt", "Copper", "Cu", "copper", "Đồng", "dong", "cuprum"])
+def test_exact_names_resolve(config, knowledge_base, name):
+    is_valid, error, full_path = validate(config, knowledge_base, name)
+    assert is_valid, error
+    assert os.path.basename(full_path) == "Copper.txt"
+
+# Typos are rejected, with the intended element suggested
+@pytest.mark.parametrize("name", ["Coper", "Copperr.txt", "Terbi"])
+def test_typos_are_suggested_not_substituted(config, knowledge_base, name):
+    is_valid, error, full_path = validate(config, knowledge_base, name)
+    assert not is_valid
+    assert full_path is None
+    assert "Did you mean" in error
+    assert knowledge_base.catalog.resolve(name) is None
+
+def test_paths_are_not_looked_up_by_name(config, knowledge_base):
+    is_valid, _, _ = validate(config, knowledge_base, "missing_dir/Copper.txt")
+    assert not is_valid
+
+def test_search_ranks_the_closest_element_first(knowledge_base):
+    entry, similarity = knowledge_base.catalog.search("Coper")[0]
+    assert entry['element_file'] == "Copper.txt"
+    assert 0 < similarity < 1
@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import pytest
+
+from src import fact_extractor
+from src.fact_extractor import FactExtractor
+
+SOURCE = "data/chemistry_files/Actini.txt"
+
+def test_unchanged_file_is_parsed_once(tmp_path, monkeypatch):
+    path = tmp_path / "Actini.txt"
+    shutil.copy(SOURCE, path)
+    calls = []
+    parse_content = fact_extractor.parse_content
+    monkeypatch.setattr(fact_extractor, 'parse_content',
+                        lambda content: calls.append(1) or parse_content(content))
+
+    first = FactExtractor().extract_from_file(str(path))
+    second = FactExtractor().extract_from_file(str(path))
+    assert second is first
+    assert len(calls) == 1
+    assert first['facts']
+
+def test_changed_file_is_parsed_again(tmp_path):
+    path = tmp_path / "Actini.txt"
+    shutil.copy(SOURCE, path)
+    extractor = FactExtractor()
+    before = extractor.extract_from_file(str(path))
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("\nTest fact: 42\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    after = extractor.extract_from_file(str(path))
+    assert after is not before
+    assert extractor.get_fact("Test fact") == "42"
+    assert "Test fact" not in before['facts']
+
+# Cached results are shared between callers, so they must not be modifiable
+def test_parsed_facts_are_read_only():
+    extracted = FactExtractor().extract_from_file(SOURCE)
+    with pytest.raises(TypeError):
+        extracted['facts']["Test fact"] = "1"
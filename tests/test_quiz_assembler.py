@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from src.quiz_assembler import apportion
+
+def test_proportional_split():
+    assert apportion(10, [1, 1], [10, 10]) == [5, 5]
+    assert apportion(12, [3, 1], [20, 20]) == [9, 3]
+
+def test_largest_remainders_get_the_leftover():
+    assert apportion(10, [1, 1, 1], [10, 10, 10]) == [4, 3, 3]
+    assert sum(apportion(7, [2, 2, 1], [10, 10, 10])) == 7
+
+def test_capped_share_is_redistributed():
+    assert apportion(10, [1, 1], [2, 20]) == [2, 8]
+    assert apportion(9, [1, 1, 1], [1, 10, 10]) == [1, 4, 4]
+
+def test_zero_weights_and_capacities_get_nothing():
+    assert apportion(10, [0, 1, 1], [10, 10, 10]) == [0, 5, 5]
+    assert apportion(10, [1, 1], [0, 10]) == [0, 10]
+    assert apportion(5, [0, 0], [5, 5]) == [0, 0]
+
+def test_total_beyond_capacity():
+    assert apportion(100, [1, 2], [3, 4]) == [3, 4]
+    assert apportion(0, [1, 2], [3, 4]) == [0, 0]
+    assert apportion(3, [], []) == []
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_invariants(seed):
+    rng = random.Random(seed)
+    size = rng.randint(1, 8)
+    weights = [rng.choice([0, 0.5, 1, 2, 3.5]) for _ in range(size)]
+    capacities = [rng.randint(0, 12) for _ in range(size)]
+    total = rng.randint(0, 60)
+
+    counts = apportion(total, weights, capacities)
+    usable = sum(c for w, c in zip(weights, capacities) if w > 0)
+    assert sum(counts) == min(total, usable)
+    assert all(0 <= n <= c for n, c in zip(counts, capacities))
+    assert all(n == 0 for n, w in zip(counts, weights) if w == 0)
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT_DIR
+
+SCRIPT = os.path.join(ROOT_DIR, "benchmarks", "run_benchmarks.py")
+
+def run_script(*args):
+    return subprocess.run([sys.executable, SCRIPT, *args], cwd=ROOT_DIR, capture_output=True, text=True)
+
+def test_help():
+    for args in ([], ["run"], ["compare"]):
+        result = run_script(*args, "--help")
+        assert result.returncode == 0, result.stderr
+
+# One full run, then compare against it (and against a copy reporting dedup mismatches)
+def test_run_and_compare(tmp_path):
+    output = tmp_path / "latest.json"
+    result = run_script("run", "--repeat", "1", "--output", str(output))
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['checks']['dedup_equivalence']['mismatches'] == 0
+
+    result = run_script("compare", str(output), "--current", str(output))
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    report['checks']['dedup_equivalence']['mismatches'] = 1
+    mismatched = tmp_path / "mismatched.json"
+    mismatched.write_text(json.dumps(report), encoding='utf-8')
+    result = run_script("compare", str(output), "--current", str(mismatched))
+    assert result.returncode == 1
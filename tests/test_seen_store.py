@@ -0,0 +1,60 @@
+import random
+
+from src.bloom_filter import BloomFilter
+from src.seen_store import SeenQuestionStore, get_history_key, question_fingerprint
+
+SETTINGS = {'bloom_capacity': 8, 'bloom_error_rate': 0.01, 'max_cached_histories': 2}
+
+def fingerprints(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) - 2 ** 63 for _ in range(count)]
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(1000, 0.01)
+    added = fingerprints(1000)
+    for fingerprint in added:
+        bloom.add(fingerprint)
+    assert all(fingerprint in bloom for fingerprint in added)
+    assert bloom.is_full()
+
+    others = fingerprints(20000, seed=1)
+    false_positives = sum(fingerprint in bloom for fingerprint in others)
+    assert false_positives / len(others) < 0.03
+
+def test_history_keys():
+    assert get_history_key({'user_id': "u", 'session_id': "s"}) == "user:u"
+    assert get_history_key({'session_id': "s"}) == "session:s"
+    assert get_history_key({}) is None
+
+def test_history_outgrowing_its_filter_is_rebuilt(tmp_path):
+    store = SeenQuestionStore(str(tmp_path / "seen.sqlite"), SETTINGS)
+    history = store.history("user:a", "Copper.txt")
+    served = [(f"template {i}", f"answer {i}") for i in range(50)]
+    for template, answer in served:
+        history.add(template, answer)
+    history.save()
+
+    history = store.history("user:a", "Copper.txt")
+    assert all(history.is_seen(template, answer) for template, answer in served)
+    assert history._bloom.capacity >= 50
+    # Seen per element and per history
+    assert not store.history("user:a", "Gold.txt").is_seen("template 0", "answer 0")
+    assert not store.history("user:b", "Copper.txt").is_seen("template 0", "answer 0")
+    store.close()
+
+# Another process (here: another store on the same file) sees what was recorded since
+def test_filters_catch_up_with_other_writers(tmp_path):
+    path = str(tmp_path / "seen.sqlite")
+    reader = SeenQuestionStore(path, SETTINGS)
+    writer = SeenQuestionStore(path, SETTINGS)
+    assert not reader.history("user:a", "Copper.txt").is_seen("t", "x")
+
+    writer.record("user:a", [question_fingerprint("Copper.txt", "t", "x")])
+    assert reader.history("user:a", "Copper.txt").is_seen("t", "x")
+
+    # Filters evicted from the cache are rebuilt from the file
+    for key in ("user:b", "user:c", "user:d"):
+        reader.history(key, "Copper.txt")
+    assert reader.history("user:a", "Copper.txt").is_seen("t", "X ")
+    reader.close()
+    writer.close()
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from conftest import ROOT_DIR
+from src.worker_pool import create_worker_pool, run_batch_item
+
+def test_pool_spawns_workers_that_generate(config):
+    pool = create_worker_pool(config, max_workers=1)
+    try:
+        assert pool._mp_context.get_start_method() == 'spawn'
+        result, summary = pool.submit(
+            run_batch_item, 3, {'element_file': "Copper.txt", 'number_of_questions': 2}
+        ).result(timeout=120)
+    finally:
+        pool.shutdown()
+    assert result['index'] == 3
+    assert result['status'] == "success"
+    assert len(result['questions']) == 2
+    assert summary is not None
+
+# Spawned workers import the parent's main script again: server.py must not
+# load config or data, or start threads, at import
+def test_server_import_has_no_side_effects():
+    code = (
+        "import threading, server\n"
+        "print(server.config is None, server.sources is None, server.summary_aggregator is None,"
+        " threading.active_count())"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", "True", "True", "1"]